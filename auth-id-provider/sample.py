@@ -10,6 +10,7 @@ from base64 import b64encode
 from os.path import dirname, join, abspath
 sys.path.insert(0, abspath(join(dirname(__file__), '..', 'common')))
 from panopto_oauth2 import PanoptoOAuth2
+from panopto_transport import create_requests_transport
 
 def parse_argument():
     parser = argparse.ArgumentParser(description='Sample of Authorization for ID provider integration')
@@ -28,10 +29,9 @@ def main():
         # This line is needed to suppress annoying warning message.
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-    # Use requests module's Session object in this example.
+    # Use requests module's Session object in this example, with connect / read timeouts and TCP keep-alive.
     # ref. https://2.python-requests.org/en/master/user/advanced/#session-objects
-    requests_session = requests.Session()
-    requests_session.verify = not args.skip_verify
+    requests_session = create_requests_transport(not args.skip_verify)
     
     # Load OAuth2 logic
     oauth2 = PanoptoOAuth2(args.server, args.client_id, args.client_secret, not args.skip_verify)
@@ -46,6 +46,8 @@ def main():
         url = 'https://{0}/Panopto/api/v1/folders/{1}/children'.format(args.server, folder_id)
         resp = requests_session.get(url = url)
         if inspect_response_is_unauthorized(resp):
+            # Discard the rejected access token, so that re-authorization does not return it again.
+            oauth2.invalidate_access_token(requests_session.headers['Authorization'][len('Bearer '):])
             # Re-authorization
             authorization(requests_session, oauth2, args.application_key, args.username)
             # Re-try now
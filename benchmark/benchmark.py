@@ -0,0 +1,227 @@
+#!python3
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+from mock_panopto_server import MockDataset, MockPanoptoServer, GUID_TOPLEVEL
+
+from os.path import dirname, join, abspath
+sys.path.insert(0, abspath(join(dirname(__file__), '..', 'common')))
+sys.path.insert(0, abspath(join(dirname(__file__), '..', 'folders-cli')))
+sys.path.insert(0, abspath(join(dirname(__file__), '..', 'sessions-cli')))
+from panopto_oauth2 import PanoptoOAuth2
+from panopto_token_store import TokenStore
+from panopto_api_client import PanoptoApiClient
+from panopto_transport import create_transport, TRANSPORT_NAMES
+from panopto_response_cache import ResponseCache
+from panopto_metrics import MetricsCollector
+from panopto_models import Session
+from panopto_json import get_decoder, JSON_BACKEND_NAMES
+from panopto_folders import PanoptoFolders
+from panopto_sessions import PanoptoSessions
+
+CLIENT_ID = 'benchmark-client'
+CLIENT_SECRET = 'benchmark-secret'
+
+class BenchmarkContext:
+    '''
+    Objects shared by the scenarios: the mock server, and the handlers connected to it.
+    '''
+    def __init__(self, server, args):
+        self.server = server
+        self.args = args
+        dataset = server.dataset
+        # The first top level folder has the largest number of sessions.
+        self.large_folder_id = dataset.children[GUID_TOPLEVEL][0]
+        self.folder_ids = list(dataset.folders)[:args.operations]
+        self.session_ids = list(dataset.sessions)[:args.operations]
+
+        self.oauth2 = PanoptoOAuth2(server.url, CLIENT_ID, CLIENT_SECRET, True)
+        # PanoptoApiClient authorizes on construction. Seed the token cache with a refresh token,
+        # so that it is done by the refresh, without the browser.
+        TokenStore(self.oauth2.cache_file).save({'access_token': 'seed', 'refresh_token': 'seed', 'token_type': 'Bearer', 'expires_at': 0})
+        self.metrics = MetricsCollector()
+        self.client = PanoptoApiClient(server.url, True, self.oauth2, max_workers = args.max_workers,
+                                       cache = ResponseCache() if args.cache else None, instruments = [self.metrics],
+                                       transport = create_transport(args.transport, True), decoder = get_decoder(args.json_backend),
+                                       single_flight = not args.no_single_flight)
+        self.folders = PanoptoFolders(server.url, True, self.oauth2, client = self.client)
+        self.sessions = PanoptoSessions(server.url, True, self.oauth2, client = self.client)
+
+
+def run_parallel(context, function, arguments):
+    '''
+    Call function for each argument with max_workers threads, and return the list of (latency, item count).
+    '''
+    with ThreadPoolExecutor(max_workers = context.args.max_workers) as executor:
+        return list(executor.map(lambda argument: measure(function, argument), arguments))
+
+def measure(function, argument):
+    '''
+    Call function with the argument, and return (latency, item count).
+    '''
+    start = time.perf_counter()
+    count = function(argument)
+    return time.perf_counter() - start, count
+
+def scenario_oauth2_refresh(context):
+    # Invalidate the current token, so that each call goes to the token endpoint.
+    def refresh(index):
+        context.oauth2.invalidate_access_token(context.oauth2.get_cached_access_token())
+        context.oauth2.get_access_token_authorization_code_grant()
+        return 1
+    return [measure(refresh, index) for index in range(min(context.args.operations, 50))]
+
+def scenario_folders_get_folder(context):
+    return run_parallel(context, lambda folder_id: context.folders.get_folder(folder_id) and 1, context.folder_ids)
+
+def scenario_folders_get_parent_folders(context):
+    # Many sessions share a few parent folders, e.g. a crawl which looks up the folder of each session.
+    parent_ids = context.folder_ids[:5]
+    return run_parallel(context, lambda folder_id: context.folders.get_folder(folder_id) and 1,
+                        [parent_ids[index % len(parent_ids)] for index in range(len(context.folder_ids))])
+
+def scenario_folders_get_children(context):
+    return run_parallel(context, lambda folder_id: len(context.folders.get_children(folder_id)), [GUID_TOPLEVEL] + context.folder_ids[:10])
+
+def scenario_folders_get_sessions(context):
+    return [measure(lambda folder_id: len(context.folders.get_sessions(folder_id)), context.large_folder_id)]
+
+def scenario_folders_iter_sessions(context):
+    return [measure(lambda folder_id: sum(1 for _ in context.folders.iter_sessions(folder_id)), context.large_folder_id)]
+
+def scenario_folders_session_records(context):
+    # Same listing as folders_get_sessions, kept as compact Session records instead of dictionaries.
+    return [measure(lambda folder_id: len(list(Session.wrap(context.folders.iter_sessions(folder_id)))), context.large_folder_id)]
+
+def scenario_folders_search(context):
+    return [measure(lambda query: len(context.folders.search_folders(query)), 'Folder 0')]
+
+def scenario_sessions_get_session(context):
+    return run_parallel(context, lambda session_id: context.sessions.get_session(session_id) and 1, context.session_ids)
+
+def scenario_sessions_update_session_name(context):
+    return run_parallel(context, lambda session_id: 1 if context.sessions.update_session_name(session_id, 'Renamed') else 0, context.session_ids)
+
+def scenario_sessions_search(context):
+    return [measure(lambda query: len(context.sessions.search_sessions(query)), 'Session 0000')]
+
+SCENARIOS = {
+    'oauth2_refresh': scenario_oauth2_refresh,
+    'folders_get_folder': scenario_folders_get_folder,
+    'folders_get_parent_folders': scenario_folders_get_parent_folders,
+    'folders_get_children': scenario_folders_get_children,
+    'folders_get_sessions': scenario_folders_get_sessions,
+    'folders_iter_sessions': scenario_folders_iter_sessions,
+    'folders_session_records': scenario_folders_session_records,
+    'folders_search': scenario_folders_search,
+    'sessions_get_session': scenario_sessions_get_session,
+    'sessions_update_session_name': scenario_sessions_update_session_name,
+    'sessions_search': scenario_sessions_search,
+}
+
+def percentile(values, ratio):
+    '''
+    Nearest-rank percentile of the list.
+    '''
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(ratio * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def run_scenario(context, name, function, repeat):
+    '''
+    Run the scenario repeat times for timing, then once more with tracemalloc for memory.
+    Return the dictionary of the results.
+    '''
+    samples = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        samples.extend(function(context))
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    function(context)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies = [latency for latency, count in samples]
+    items = sum(count for latency, count in samples)
+    return {
+        'Scenario': name,
+        'Operations': len(samples),
+        'Items': items,
+        'OperationsPerSecond': len(samples) / elapsed,
+        'ItemsPerSecond': items / elapsed,
+        'P50Milliseconds': percentile(latencies, 0.50) * 1000,
+        'P99Milliseconds': percentile(latencies, 0.99) * 1000,
+        'PeakMemoryKiB': peak / 1024,
+    }
+
+def parse_argument():
+    parser = argparse.ArgumentParser(description='Benchmark of the client classes against the mock Panopto server')
+    parser.add_argument('--scenario', dest='scenarios', action='append', choices=sorted(SCENARIOS), help='Scenario to run. May be repeated. All scenarios by default.')
+    parser.add_argument('--repeat', dest='repeat', type=int, default=3, help='Number of times each scenario is timed')
+    parser.add_argument('--operations', dest='operations', type=int, default=200, help='Number of objects each per-object scenario touches')
+    parser.add_argument('--max-workers', dest='max_workers', type=int, default=8, help='Number of threads calling the API')
+    parser.add_argument('--cache', dest='cache', action='store_true', help='Enable in-memory response cache of the client')
+    parser.add_argument('--no-single-flight', dest='no_single_flight', action='store_true', help='Disable sharing of concurrent identical GET calls by the client')
+    parser.add_argument('--folders', dest='folders', type=int, default=1000, help='Number of folders')
+    parser.add_argument('--fanout', dest='fanout', type=int, default=10, help='Number of sub folders per folder')
+    parser.add_argument('--sessions-per-folder', dest='sessions_per_folder', type=int, default=20, help='Number of sessions per folder')
+    parser.add_argument('--large-folder-sessions', dest='large_folder_sessions', type=int, default=5000, help='Number of sessions in the first folder')
+    parser.add_argument('--page-size', dest='page_size', type=int, default=50, help='Number of entries per page')
+    parser.add_argument('--latency', dest='latency', type=float, default=0.01, help='Latency added to each API call in seconds')
+    parser.add_argument('--throttle-rate', dest='throttle_rate', type=float, default=0.0, help='Probability of 429 response')
+    parser.add_argument('--unauthorized-rate', dest='unauthorized_rate', type=float, default=0.0, help='Probability of 401 response')
+    parser.add_argument('--token-ttl', dest='token_ttl', type=int, default=3600, help='Lifetime of access token in seconds')
+    parser.add_argument('--include-total', dest='include_total', action='store_true', help='Add TotalNumberOfResults to list responses')
+    parser.add_argument('--metrics', dest='metrics', required=False, help='Output file of API call metrics of the client. JSON if the name ends with .json, Prometheus text format otherwise.')
+    parser.add_argument('--transport', dest='transport', choices=TRANSPORT_NAMES, default='requests', help='HTTP transport of the client')
+    parser.add_argument('--json-backend', dest='json_backend', choices=JSON_BACKEND_NAMES, default=None, help='JSON decoder of the client. The fastest installed one by default.')
+    parser.add_argument('--json', dest='json_file', required=False, help='Write the results to this JSON file as well')
+    return parser.parse_args()
+
+def main():
+    args = parse_argument()
+    dataset = MockDataset(args.folders, args.fanout, args.sessions_per_folder, args.large_folder_sessions)
+    # Injected 429 asks to wait for 1 sec, which is the smallest value of integer Retry-After.
+    with MockPanoptoServer(dataset, page_size = args.page_size, latency = args.latency, throttle_rate = args.throttle_rate,
+                           unauthorized_rate = args.unauthorized_rate, token_ttl = args.token_ttl,
+                           include_total = args.include_total) as server, \
+            tempfile.TemporaryDirectory() as work_dir:
+        # Token cache is created in the current directory.
+        original_dir = os.getcwd()
+        os.chdir(work_dir)
+        context = None
+        results = []
+        # Mute progress messages of OAuth2 and retry logic.
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            context = BenchmarkContext(server, args)
+            for name in args.scenarios or SCENARIOS:
+                results.append(run_scenario(context, name, SCENARIOS[name], args.repeat))
+        os.chdir(original_dir)
+
+    print('{0:<30} {1:>6} {2:>8} {3:>10} {4:>10} {5:>9} {6:>9} {7:>10}'.format(
+        'Scenario', 'Ops', 'Items', 'Ops/s', 'Items/s', 'p50 ms', 'p99 ms', 'Peak KiB'))
+    for result in results:
+        print('{Scenario:<30} {Operations:>6} {Items:>8} {OperationsPerSecond:>10.1f} {ItemsPerSecond:>10.1f} '
+              '{P50Milliseconds:>9.2f} {P99Milliseconds:>9.2f} {PeakMemoryKiB:>10.1f}'.format(**result))
+    print('API calls served by the mock server:')
+    for endpoint, count in sorted(server.request_counts.items()):
+        print('  {0:<45} {1:>8}'.format(endpoint, count))
+
+    if args.metrics:
+        context.metrics.write(args.metrics)
+
+    if args.json_file:
+        with open(args.json_file, 'w', encoding = 'utf-8') as fw:
+            json.dump({'Arguments': vars(args), 'Results': results, 'RequestCounts': server.request_counts}, fw, indent = 2)
+
+if __name__ == '__main__':
+    main()
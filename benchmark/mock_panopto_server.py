@@ -0,0 +1,383 @@
+#!python3
+import re
+import json
+import time
+import uuid
+import random
+import hashlib
+import argparse
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Top level folder is represented by zero GUID.
+GUID_TOPLEVEL = '00000000-0000-0000-0000-000000000000'
+
+class MockDataset:
+    '''
+    In-memory data of the mock server: folder tree, sessions, remote recorders and scheduled recordings.
+
+    Folders form a tree where each folder has up to fanout sub folders, filled breadth-first from the top level.
+    Each folder has sessions_per_folder sessions, except that the first folder has large_folder_sessions sessions.
+    All data is generated deterministically, so that the IDs are same across runs.
+    '''
+    def __init__(self, folder_count = 1000, fanout = 10, sessions_per_folder = 20, large_folder_sessions = 5000, recorder_count = 50):
+        self.lock = threading.Lock()
+        self.folders = {}
+        self.children = {GUID_TOPLEVEL: []}
+        self.sessions = {}
+        self.folder_sessions = {}
+        self.recorders = []
+        self.scheduled_recordings = {}
+
+        base_time = 1700000000
+        folder_ids = [self.__make_id(1, index) for index in range(folder_count)]
+        for index, folder_id in enumerate(folder_ids):
+            parent_id = GUID_TOPLEVEL if index < fanout else folder_ids[index // fanout - 1]
+            name = 'Folder {0:06d}'.format(index)
+            self.folders[folder_id] = {
+                'Id': folder_id,
+                'Name': name,
+                'Description': 'Description of {0}'.format(name),
+                'ParentFolder': None if parent_id == GUID_TOPLEVEL else {'Id': parent_id, 'Name': self.folders[parent_id]['Name']},
+                'Urls': {
+                    'FolderUrl': 'https://mock/Panopto/Pages/Sessions/List.aspx#folderID={0}'.format(folder_id),
+                    'EmbedUrl': 'https://mock/Panopto/Pages/EmbeddedList.aspx?folderID={0}'.format(folder_id),
+                    'ShareSettingsUrl': 'https://mock/Panopto/Pages/Sessions/List.aspx#folderID={0}&status=6'.format(folder_id),
+                },
+            }
+            self.children[parent_id].append(folder_id)
+            self.children[folder_id] = []
+
+        session_index = 0
+        for index, folder_id in enumerate(folder_ids):
+            count = large_folder_sessions if index == 0 else sessions_per_folder
+            session_ids = []
+            for _ in range(count):
+                session_id = self.__make_id(2, session_index)
+                created = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(base_time + session_index * 60))
+                name = 'Session {0:08d}'.format(session_index)
+                self.sessions[session_id] = {
+                    'Id': session_id,
+                    'Name': name,
+                    'Description': 'Description of {0}'.format(name),
+                    'StartTime': created,
+                    'CreatedDate': created,
+                    'Duration': 3600.0,
+                    'MostRecentViewPosition': None,
+                    'CreatedBy': {'Id': self.__make_id(4, session_index % 100), 'Username': 'user{0}'.format(session_index % 100)},
+                    'Urls': {
+                        'ViewerUrl': 'https://mock/Panopto/Pages/Viewer.aspx?id={0}'.format(session_id),
+                        'EmbedUrl': 'https://mock/Panopto/Pages/Embed.aspx?id={0}'.format(session_id),
+                        'ShareSettingsUrl': 'https://mock/Panopto/Pages/Sessions/List.aspx#shareSettings={0}'.format(session_id),
+                        'DownloadUrl': 'https://mock/Panopto/Podcast/Download/{0}.mp4'.format(session_id),
+                        'CaptionDownloadUrl': None,
+                        'EditorUrl': 'https://mock/Panopto/Pages/Editor.aspx?id={0}'.format(session_id),
+                        'ThumbnailUrl': '/Panopto/Services/FrameGrabber.svc/FrameRedirect?objectId={0}'.format(session_id),
+                    },
+                    'Folder': folder_id,
+                    'FolderDetails': {'Id': folder_id, 'Name': self.folders[folder_id]['Name']},
+                }
+                session_ids.append(session_id)
+                session_index += 1
+            # Newest first, as sortField=CreatedDate&sortOrder=Desc.
+            session_ids.reverse()
+            self.folder_sessions[folder_id] = session_ids
+
+        for index in range(recorder_count):
+            folder_id = folder_ids[index % folder_count] if folder_count else GUID_TOPLEVEL
+            self.recorders.append({
+                'Id': self.__make_id(3, index),
+                'Name': 'Recorder {0:04d}'.format(index),
+                'State': 'Stopped',
+                'DefaultRecordingFolder': {'Id': folder_id, 'Name': self.folders[folder_id]['Name'] if folder_count else None},
+                'Devices': [],
+            })
+
+    @staticmethod
+    def __make_id(kind, index):
+        return str(uuid.UUID(int = (kind << 96) | index))
+
+
+class MockPanoptoServer:
+    '''
+    Local stand-in of Panopto server, implementing the endpoints used by the samples:
+      POST /Panopto/oauth2/connect/token
+      GET /Panopto/api/v1/folders/{id}, PUT and DELETE as well
+      GET /Panopto/api/v1/folders/{id}/children, /folders/{id}/sessions, /folders/search
+      GET /Panopto/api/v1/sessions/{id}, PUT and DELETE as well
+      GET /Panopto/api/v1/sessions/search
+      POST /Panopto/api/v1/scheduledRecordings, GET, PUT and DELETE /Panopto/api/v1/scheduledRecordings/{id}
+      GET /Panopto/api/v1/remoteRecorders/search
+
+    latency is added to each API call in seconds. throttle_rate and unauthorized_rate are the probability of
+    injected 429 (with Retry-After of retry_after seconds) and 401 responses. Access tokens expire in token_ttl seconds.
+    If include_total is set, list responses have TotalNumberOfResults.
+    '''
+    def __init__(self, dataset = None, port = 0, page_size = 50, latency = 0.0, throttle_rate = 0.0, retry_after = 1,
+                 unauthorized_rate = 0.0, token_ttl = 3600, include_total = False):
+        self.dataset = dataset if dataset is not None else MockDataset()
+        self.page_size = page_size
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.unauthorized_rate = unauthorized_rate
+        self.token_ttl = token_ttl
+        self.include_total = include_total
+
+        self.lock = threading.Lock()
+        self.tokens = {}
+        self.request_counts = {}
+        self.random = random.Random(0)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), MockRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+        self.thread = None
+
+    @property
+    def url(self):
+        '''
+        Base URL of the server, which can be passed as server parameter of PanoptoOAuth2 and PanoptoApiClient.
+        '''
+        return 'http://127.0.0.1:{0}'.format(self.httpd.server_address[1])
+
+    def start(self):
+        '''
+        Start serving in a background thread.
+        '''
+        self.thread = threading.Thread(target = self.httpd.serve_forever, daemon = True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def issue_token(self):
+        '''
+        Return a new token object, as the token endpoint does.
+        '''
+        access_token = uuid.uuid4().hex
+        with self.lock:
+            self.tokens[access_token] = time.time() + self.token_ttl
+        return {
+            'access_token': access_token,
+            'refresh_token': uuid.uuid4().hex,
+            'token_type': 'Bearer',
+            'expires_in': self.token_ttl,
+            'scope': 'openid api offline_access',
+        }
+
+    def is_token_valid(self, access_token):
+        with self.lock:
+            expires_at = self.tokens.get(access_token)
+        return expires_at is not None and time.time() < expires_at
+
+    def count(self, endpoint):
+        with self.lock:
+            self.request_counts[endpoint] = self.request_counts.get(endpoint, 0) + 1
+
+    def inject(self, rate):
+        '''
+        Return True with the given probability.
+        '''
+        if rate <= 0:
+            return False
+        with self.lock:
+            return self.random.random() < rate
+
+    def page(self, items, query):
+        '''
+        Return a list response of the page given by pageNumber query parameter.
+        '''
+        page_number = int(query.get('pageNumber', ['0'])[0])
+        start = page_number * self.page_size
+        result = {'Results': items[start:start + self.page_size]}
+        if self.include_total:
+            result['TotalNumberOfResults'] = len(items)
+        return result
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    '''
+    Request handler of MockPanoptoServer.
+    '''
+    # Keep-alive, as the real server does.
+    protocol_version = 'HTTP/1.1'
+    # Send the body without waiting for ACK of the headers. Otherwise Nagle's algorithm and delayed ACK add about 40 ms to each
+    # call on a kept-alive connection, which the benchmark would measure instead of the client.
+    disable_nagle_algorithm = True
+
+    API_PREFIX = '/Panopto/api/v1/'
+    TOKEN_PATH = '/Panopto/oauth2/connect/token'
+
+    def log_message(self, format, *args):
+        # Keep the console quiet.
+        pass
+
+    def do_GET(self):
+        self.__handle('GET')
+
+    def do_POST(self):
+        self.__handle('POST')
+
+    def do_PUT(self):
+        self.__handle('PUT')
+
+    def do_DELETE(self):
+        self.__handle('DELETE')
+
+    def __handle(self, method):
+        mock = self.server.mock
+        url = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+
+        if url.path == self.TOKEN_PATH and method == 'POST':
+            mock.count('oauth2/connect/token')
+            self.__send_json(200, mock.issue_token())
+            return
+
+        if not url.path.startswith(self.API_PREFIX):
+            self.__send_json(404, {'Message': 'Not found'})
+            return
+        path = url.path[len(self.API_PREFIX):]
+        mock.count('{0} {1}'.format(method, re.sub(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', '{id}', path)))
+
+        if mock.latency > 0:
+            time.sleep(mock.latency)
+
+        authorization = self.headers.get('Authorization', '')
+        if not authorization.startswith('Bearer ') or not mock.is_token_valid(authorization[len('Bearer '):]) \
+                or mock.inject(mock.unauthorized_rate):
+            self.__send_json(401, {'Message': 'Authorization has been denied for this request.'})
+            return
+        if mock.inject(mock.throttle_rate):
+            self.__send_json(429, {'Message': 'Too many requests'}, {'Retry-After': str(mock.retry_after)})
+            return
+
+        payload = json.loads(body) if body else None
+        try:
+            status, result = self.__route(mock, method, path.split('/'), query, payload)
+        except KeyError:
+            status, result = 404, {'Message': 'Not found'}
+        if status == 200 and method == 'GET':
+            etag = '"{0}"'.format(hashlib.sha1(json.dumps(result, sort_keys = True).encode('utf-8')).hexdigest())
+            if self.headers.get('If-None-Match') == etag:
+                self.__send_json(304, None, {'ETag': etag})
+                return
+            self.__send_json(status, result, {'ETag': etag})
+            return
+        self.__send_json(status, result)
+
+    def __route(self, mock, method, segments, query, payload):
+        '''
+        Private method of the class. Return (status code, response object) of the API call.
+        '''
+        data = mock.dataset
+        resource = segments[0]
+        with data.lock:
+            if resource == 'folders' and len(segments) == 2 and segments[1] == 'search':
+                keyword = query.get('searchQuery', [''])[0].lower()
+                matched = [folder for folder in data.folders.values() if keyword in folder['Name'].lower()]
+                return 200, mock.page(matched, query)
+            if resource == 'folders' and len(segments) == 3 and segments[2] == 'children':
+                return 200, mock.page([data.folders[child] for child in data.children[segments[1]]], query)
+            if resource == 'folders' and len(segments) == 3 and segments[2] == 'sessions':
+                return 200, mock.page([data.sessions[session] for session in data.folder_sessions[segments[1]]], query)
+            if resource == 'folders' and len(segments) == 2:
+                return self.__crud(data.folders, segments[1], method, payload, self.__delete_folder)
+            if resource == 'sessions' and len(segments) == 2 and segments[1] == 'search':
+                keyword = query.get('searchQuery', [''])[0].lower()
+                matched = [session for session in data.sessions.values() if keyword in session['Name'].lower()]
+                return 200, mock.page(matched, query)
+            if resource == 'sessions' and len(segments) == 2:
+                return self.__crud(data.sessions, segments[1], method, payload, self.__delete_session)
+            if resource == 'remoteRecorders' and len(segments) == 2 and segments[1] == 'search':
+                keyword = query.get('searchQuery', [''])[0].lower()
+                return 200, mock.page([recorder for recorder in data.recorders if keyword in recorder['Name'].lower()], query)
+            if resource == 'scheduledRecordings' and len(segments) == 1 and method == 'POST':
+                session_id = str(uuid.uuid4())
+                data.scheduled_recordings[session_id] = dict(payload, Id = session_id)
+                return 200, {'Id': session_id, 'ConflictsExist': False, 'ConflictingSessions': []}
+            if resource == 'scheduledRecordings' and len(segments) == 2:
+                return self.__crud(data.scheduled_recordings, segments[1], method, payload, None)
+        return 404, {'Message': 'Not found'}
+
+    def __crud(self, collection, item_id, method, payload, on_delete):
+        '''
+        Private method of the class. Handle GET, PUT and DELETE of a single object.
+        '''
+        item = collection[item_id]
+        if method == 'GET':
+            return 200, item
+        if method == 'PUT':
+            item.update(payload or {})
+            return 200, item
+        if method == 'DELETE':
+            del collection[item_id]
+            if on_delete is not None:
+                on_delete(item)
+            return 200, {}
+        return 405, {'Message': 'Method not allowed'}
+
+    def __delete_folder(self, folder):
+        data = self.server.mock.dataset
+        parent_id = folder['ParentFolder']['Id'] if folder['ParentFolder'] else GUID_TOPLEVEL
+        data.children[parent_id].remove(folder['Id'])
+
+    def __delete_session(self, session):
+        data = self.server.mock.dataset
+        data.folder_sessions[session['Folder']].remove(session['Id'])
+
+    def __send_json(self, status, result, headers = None):
+        content = json.dumps(result).encode('utf-8') if result is not None else b''
+        self.send_response(status)
+        if content:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def parse_argument():
+    parser = argparse.ArgumentParser(description='Mock Panopto server for offline test and benchmark')
+    parser.add_argument('--port', dest='port', type=int, default=8000, help='Port to listen at 127.0.0.1')
+    parser.add_argument('--folders', dest='folders', type=int, default=1000, help='Number of folders')
+    parser.add_argument('--fanout', dest='fanout', type=int, default=10, help='Number of sub folders per folder')
+    parser.add_argument('--sessions-per-folder', dest='sessions_per_folder', type=int, default=20, help='Number of sessions per folder')
+    parser.add_argument('--large-folder-sessions', dest='large_folder_sessions', type=int, default=5000, help='Number of sessions in the first folder')
+    parser.add_argument('--page-size', dest='page_size', type=int, default=50, help='Number of entries per page')
+    parser.add_argument('--latency', dest='latency', type=float, default=0.0, help='Latency added to each API call in seconds')
+    parser.add_argument('--throttle-rate', dest='throttle_rate', type=float, default=0.0, help='Probability of 429 response')
+    parser.add_argument('--retry-after', dest='retry_after', type=int, default=1, help='Retry-After of 429 response in seconds')
+    parser.add_argument('--unauthorized-rate', dest='unauthorized_rate', type=float, default=0.0, help='Probability of 401 response')
+    parser.add_argument('--token-ttl', dest='token_ttl', type=int, default=3600, help='Lifetime of access token in seconds')
+    parser.add_argument('--include-total', dest='include_total', action='store_true', help='Add TotalNumberOfResults to list responses')
+    return parser.parse_args()
+
+def main():
+    args = parse_argument()
+    dataset = MockDataset(args.folders, args.fanout, args.sessions_per_folder, args.large_folder_sessions)
+    server = MockPanoptoServer(dataset, args.port, args.page_size, args.latency, args.throttle_rate, args.retry_after,
+                               args.unauthorized_rate, args.token_ttl, args.include_total)
+    print('Mock Panopto server is running at {0}. Use it as --server parameter. Ctrl+C to stop.'.format(server.url))
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == '__main__':
+    main()
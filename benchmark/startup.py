@@ -0,0 +1,117 @@
+#!python3
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+from os.path import dirname, join, abspath
+ROOT_DIR = abspath(join(dirname(__file__), '..'))
+
+# Command line applications, and the budget of their import time in milliseconds.
+# The budget is the sum of the cumulative import time of the modules imported by the application, reported by python -X importtime.
+# It includes requests and urllib3 (most of it), and excludes the modules of the interpreter startup (site, encodings, etc.).
+CLI_BUDGETS = {
+    'auth-id-provider/sample.py': 160,
+    'auth-server-side-web-app/sample.py': 160,
+    'auth-user-based-app/sample.py': 160,
+    'folders-cli/bulk.py': 200,
+    'folders-cli/crawl.py': 200,
+    'folders-cli/export.py': 200,
+    'folders-cli/index.py': 200,
+    'folders-cli/sample.py': 200,
+    'folders-cli/sync.py': 200,
+    'proxy-daemon/proxy.py': 200,
+    'scheduled-recording-crud/bulk_import.py': 200,
+    'scheduled-recording-crud/sample.py': 200,
+    'sessions-cli/bulk.py': 200,
+    'sessions-cli/sample.py': 200,
+}
+
+# Modules which the applications should not load at startup. They are needed only for the first authorization by the browser,
+# refresh of the token, Resource Owner Grant, the proxy daemon, asyncio clients, Parquet export or the first JSON parsing.
+LAZY_MODULES = ['requests_oauthlib', 'oauthlib', 'webbrowser', 'pprint', 'http.server', 'socketserver', 'asyncio', 'httpx', 'pyarrow', 'orjson', 'msgspec']
+
+# Lazy modules which the application needs anyway.
+EAGER_MODULES = {
+    'proxy-daemon/proxy.py': ['http.server', 'socketserver'],
+}
+
+def parse_importtime(stderr):
+    '''
+    Parse the output of python -X importtime into the dictionary of top level module name -> cumulative microseconds,
+    and the set of all module names imported.
+    '''
+    top_level = {}
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.add(name.strip())
+        # Nested imports are indented by two spaces per level.
+        if not name[1:].startswith(' '):
+            top_level[name.strip()] = int(cumulative_us)
+    return top_level, modules
+
+def measure(script, python, startup_modules = ()):
+    '''
+    Start the application with --help under python -X importtime, which imports all modules at the top of the script and exits.
+    script None runs an empty program, to get the modules of the interpreter startup.
+    Return (wall clock milliseconds, top level modules except startup_modules, all modules).
+    '''
+    command = [python, '-X', 'importtime'] + ([join(ROOT_DIR, script), '--help'] if script else ['-c', 'pass'])
+    start = time.perf_counter()
+    completed = subprocess.run(command, stdout = subprocess.DEVNULL, stderr = subprocess.PIPE, text = True, cwd = ROOT_DIR)
+    wall = (time.perf_counter() - start) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError('{0} failed: {1}'.format(script, completed.stderr.splitlines()[-1:]))
+    top_level, modules = parse_importtime(completed.stderr)
+    top_level = {name: value for name, value in top_level.items() if name not in startup_modules}
+    return wall, top_level, modules
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+def parse_argument():
+    parser = argparse.ArgumentParser(description='Startup time of the command line applications, measured by python -X importtime')
+    parser.add_argument('--cli', dest='clis', action='append', choices=sorted(CLI_BUDGETS), help='Application to measure. May be repeated. All applications by default.')
+    parser.add_argument('--repeat', dest='repeat', type=int, default=5, help='Number of runs of each application. The median is reported.')
+    parser.add_argument('--budget-scale', dest='budget_scale', type=float, default=1.0, help='Multiply the budgets, e.g. 2 for a slow machine.')
+    parser.add_argument('--top', dest='top', type=int, default=0, help='Print this many modules of the largest import time of each application.')
+    parser.add_argument('--python', dest='python', default=sys.executable, help='Python interpreter to run the applications.')
+    parser.add_argument('--json', dest='json_file', required=False, help='Write the results to this JSON file as well')
+    return parser.parse_args()
+
+def main():
+    args = parse_argument()
+    results = []
+    # Modules imported by the interpreter itself, before the application starts.
+    startup_modules = measure(None, args.python)[2]
+    print('{0:<42} {1:>10} {2:>10} {3:>10}  {4}'.format('Application', 'Import ms', 'Budget ms', 'Wall ms', 'Result'))
+    for script in args.clis or CLI_BUDGETS:
+        runs = [measure(script, args.python, startup_modules) for _ in range(args.repeat)]
+        import_ms = median([sum(top_level.values()) / 1000 for wall, top_level, modules in runs])
+        wall_ms = median([wall for wall, top_level, modules in runs])
+        budget_ms = CLI_BUDGETS[script] * args.budget_scale
+        loaded = sorted(name for name in LAZY_MODULES if name in runs[0][2] and name not in EAGER_MODULES.get(script, []))
+        status = 'OK' if import_ms <= budget_ms and not loaded else 'OVER' if import_ms > budget_ms else 'EAGER'
+        print('{0:<42} {1:>10.1f} {2:>10.1f} {3:>10.1f}  {4}{5}'.format(
+            script, import_ms, budget_ms, wall_ms, status, ' ({0})'.format(', '.join(loaded)) if loaded else ''))
+        top_level = runs[-1][1]
+        for name in sorted(top_level, key = top_level.get, reverse = True)[:args.top]:
+            print('    {0:<38} {1:>10.1f}'.format(name, top_level[name] / 1000))
+        results.append({'Application': script, 'ImportMilliseconds': import_ms, 'BudgetMilliseconds': budget_ms,
+                        'WallMilliseconds': wall_ms, 'EagerModules': loaded, 'Result': status})
+
+    if args.json_file:
+        with open(args.json_file, 'w', encoding = 'utf-8') as fw:
+            json.dump({'Arguments': vars(args), 'Results': results}, fw, indent = 2)
+
+    # Exit with an error if any application is over the budget or loads a lazy module, so that this can run in CI.
+    if any(result['Result'] != 'OK' for result in results):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,350 @@
+#!python3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from panopto_rate_limiter import AdaptiveRateLimiter, parse_retry_after
+from panopto_metrics import RequestRecord, endpoint_template
+from panopto_transport import create_requests_transport, DEFAULT_POOL_MAXSIZE, DEFAULT_TIMEOUT
+from panopto_single_flight import SingleFlight
+from panopto_api_common import build_url, cache_key, page_params, Pagination, DEFAULT_MAX_THROTTLE_RETRIES
+import panopto_json
+
+# Number of pages fetched in parallel by get_all_pages.
+DEFAULT_MAX_WORKERS = 8
+
+class PanoptoApiClient:
+    '''
+    Shared core of Panopto REST API handlers (PanoptoFolders, PanoptoSessions, and the samples).
+    This owns the connection pool (transport), the authorization header, the retry policy and URL building.
+    Resource classes are layered on top of this, so that multiple of them can share one instance and one keep-alive pool.
+    '''
+    def __init__(self, server, ssl_verify, oauth2, get_access_token = None, max_workers = DEFAULT_MAX_WORKERS,
+                 rate_limiter = None, max_throttle_retries = DEFAULT_MAX_THROTTLE_RETRIES, cache = None, instruments = None,
+                 transport = None, pool_maxsize = None, timeout = DEFAULT_TIMEOUT, decoder = None, single_flight = True, log = print):
+        '''
+        Constructor of API client instance.
+        This goes through authorization step of the target server.
+
+        get_access_token is a function that returns a new access token. If it is omitted,
+        OAuth2 Authorization Code Grant flow of oauth2 is used.
+        max_workers is the number of pages fetched in parallel by get_all_pages.
+        rate_limiter paces all calls of this client. If it is omitted, a new AdaptiveRateLimiter is created.
+        max_throttle_retries is the number of retries of a call on 429 (Too many requests) before it fails.
+        cache is ResponseCache to keep GET responses. None disables caching.
+        instruments is a list of callables, e.g. MetricsCollector, which receive RequestRecord of each call.
+        transport sends the HTTP requests. It is requests' Session, or any object with the same request(method, url, json, headers)
+        method and response, e.g. httpx.Client of create_http2_transport. Pass the same transport to multiple clients to share its pool.
+        If it is omitted, a new requests' Session is created by create_requests_transport with pool_maxsize and timeout:
+        pool_maxsize is the number of connections kept alive in the pool. The larger of DEFAULT_POOL_MAXSIZE and max_workers by default.
+        timeout is (connect, read) in seconds, or a number for both.
+        decoder parses the response body (bytes) into Python objects. The fastest installed JSON backend by default (see panopto_json.get_decoder).
+        single_flight makes concurrent GET calls of the same path and parameters share one request (see SingleFlight).
+        log is the function to write messages of retries, e.g. a partial of print to standard error. print by default.
+        '''
+        self.server = server
+        # server may have explicit scheme, e.g. 'http://localhost:8000' for the mock server. HTTPS by default.
+        self.base_url = server if '://' in server else 'https://' + server
+        self.ssl_verify = ssl_verify
+        self.oauth2 = oauth2
+        self.max_workers = max_workers
+        if rate_limiter is None:
+            rate_limiter = AdaptiveRateLimiter()
+        self.rate_limiter = rate_limiter
+        self.max_throttle_retries = max_throttle_retries
+        self.cache = cache
+        self.instruments = list(instruments or [])
+        self.decoder = decoder if decoder is not None else panopto_json.loads
+        self.single_flight = SingleFlight() if single_flight else None
+        self.log = log
+        # Page size of each paginated endpoint, learned from the responses.
+        self.page_sizes = {}
+        if get_access_token is None:
+            get_access_token = oauth2.get_access_token_authorization_code_grant
+        self.get_access_token = get_access_token
+
+        if transport is None:
+            if pool_maxsize is None:
+                pool_maxsize = max(DEFAULT_POOL_MAXSIZE, max_workers)
+            transport = create_requests_transport(self.ssl_verify, pool_maxsize, timeout)
+        self.transport = transport
+
+        # Initial authorization.
+        # With Authorization Code Grant, it goes through browser UI for the first time.
+        # It refreshes the access token after that and no user interfaction is requetsed.
+        self.get_access_token()
+
+    def close(self):
+        '''
+        Close the connections of the transport.
+        '''
+        self.transport.close()
+
+    def __inspect_response_is_retry_needed(self, response, access_token, throttle_retries, record):
+        '''
+        Inspect the response of a requets' call.
+        True indicates the retry needed, False indicates success. Othrwise an exception is thrown.
+        Reference: https://stackoverflow.com/a/24519419
+
+        This method detects 401 (Unauthorized), discard the access token sent, and returns as "is retry needed".
+        This method also detects 429 (Too many request) which means API throttling by the server.
+        Wait as the rate limiter tells and return as "is retry needed", unless it has been retried throttle_retries times already.
+        The time waited is added to record (RequestRecord).
+        Prodcution code should handle other failure cases and errors as appropriate.
+        '''
+        if response.status_code // 100 == 2 or response.status_code == 304:
+            # Success on 2xx response, or 304 (Not Modified) to a conditional request.
+            self.rate_limiter.on_success()
+            return False
+
+        if response.status_code == 401:
+            self.log('Unauthorized. Refresh access token.')
+            self.oauth2.invalidate_access_token(access_token)
+            return True
+
+        if response.status_code == 429 and throttle_retries < self.max_throttle_retries:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            delay = self.rate_limiter.on_throttled(throttle_retries + 1, retry_after)
+            self.log('Too many requests. Wait {0:.1f} sec, and retry.'.format(delay))
+            time.sleep(delay)
+            record.throttle_wait += delay
+            return True
+
+        # Throw unhandled cases.
+        response.raise_for_status()
+
+    def build_url(self, path, params = None):
+        '''
+        Return the full URL of the API endpoint, e.g. 'folders/{id}' with optional query parameters as dictionary.
+        '''
+        return build_url(self.base_url, path, params)
+
+    def request(self, method, path, params = None, json = None, headers = None, stats = None):
+        '''
+        Call the API with given HTTP method, retrying as __inspect_response_is_retry_needed tells, and return the response.
+        The access token is obtained for each call, so that the one refreshed in the background is picked up.
+        An exception is thrown if the call fails.
+        If stats dictionary is given, 'status_code' of the last response and the number of 'retries' are set to it, even on failure.
+        Each instrument receives RequestRecord of the call when it completes or fails.
+        '''
+        url = self.build_url(path, params)
+        retries = 0
+        throttle_retries = 0
+        record = RequestRecord(method, endpoint_template(path))
+        start = time.perf_counter()
+        try:
+            while True:
+                token_start = time.perf_counter()
+                access_token = self.get_access_token()
+                limiter_start = time.perf_counter()
+                record.token_wait += limiter_start - token_start
+                request_headers = dict(headers or {})
+                request_headers['Authorization'] = 'Bearer ' + access_token
+                self.rate_limiter.acquire()
+                record.rate_limit_wait += time.perf_counter() - limiter_start
+                resp = self.transport.request(method, url = url, json = json, headers = request_headers)
+                record.status_code = resp.status_code
+                record.retries = retries
+                record.response_bytes = len(resp.content)
+                if stats is not None:
+                    stats['status_code'] = resp.status_code
+                    stats['retries'] = retries
+                if self.__inspect_response_is_retry_needed(resp, access_token, throttle_retries, record):
+                    retries += 1
+                    if resp.status_code == 429:
+                        throttle_retries += 1
+                    continue
+                return resp
+        except Exception as e:
+            record.error = str(e)
+            raise
+        finally:
+            record.latency = time.perf_counter() - start
+            for instrument in self.instruments:
+                instrument(record)
+
+    def get(self, path, params = None, stats = None):
+        '''
+        Call GET API and return the parsed response.
+        If stats dictionary is given, 'status_code' of the response is set to it and its 'retries' are added (see request).
+        'status_code' is left as is if the response is served from the cache without a call.
+
+        If single_flight is enabled, a call of the same path and parameters as another one in flight, e.g. the same parent folder
+        asked by many threads of a crawl, waits for that one and returns the same response instead of sending its own request.
+
+        If cache is enabled, the cached response is returned without a call while it is fresh.
+        After it expires, it is revalidated by a conditional request (If-None-Match / If-Modified-Since) if the server gave
+        ETag or Last-Modified, and reused when the server returns 304 (Not Modified).
+        '''
+        # Stats of the request are collected separately and returned with the data or the error, so that callers sharing
+        # a request by single_flight all receive the stats of that request, even on failure.
+        def call():
+            call_stats = {'status_code': None, 'retries': 0}
+            try:
+                return self.__get(path, params, call_stats), None, call_stats
+            except Exception as e:
+                return None, e, call_stats
+
+        if self.single_flight is None:
+            data, error, call_stats = call()
+        else:
+            data, error, call_stats = self.single_flight.do(self.cache_key(path, params), call)
+        if stats is not None:
+            add_stats(stats, call_stats)
+        if error is not None:
+            raise error
+        return data
+
+    def __get(self, path, params, stats):
+        '''
+        Private method of the class. Body of get, with the cache.
+        '''
+        if self.cache is None:
+            return self.parse_response(self.request('GET', path, params = params, stats = stats))
+
+        key = self.cache_key(path, params)
+        entry = self.cache.get(key)
+        if entry is not None and entry.is_fresh():
+            return entry.data
+
+        headers = {}
+        if entry is not None and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        resp = self.request('GET', path, params = params, headers = headers, stats = stats)
+        if resp.status_code == 304 and entry is not None:
+            self.cache.touch(key, entry)
+            return entry.data
+
+        data = self.parse_response(resp)
+        self.cache.put(key, data, resp.headers.get('ETag'), resp.headers.get('Last-Modified'))
+        return data
+
+    def parse_response(self, resp):
+        '''
+        Parse JSON body of the response by decoder.
+        '''
+        return self.decoder(resp.content)
+
+    def cache_key(self, path, params = None):
+        '''
+        Return the key of the cache entry, which is the path with query parameters, e.g. 'folders/{id}/children?pageNumber=0'.
+        '''
+        return cache_key(path, params)
+
+    def invalidate_cache(self, *patterns):
+        '''
+        Remove cache entries whose key matches any of the patterns with shell-style wildcards, e.g. 'folders/*/children*'.
+        This is called after the data is modified by PUT or DELETE.
+        '''
+        if self.cache is None:
+            return
+        for pattern in patterns:
+            self.cache.invalidate(pattern)
+
+    def post(self, path, payload, params = None):
+        '''
+        Call POST API with JSON payload and return the parsed response.
+        '''
+        return self.parse_response(self.request('POST', path, params = params, json = payload))
+
+    def put(self, path, payload, params = None):
+        '''
+        Call PUT API with JSON payload and return the parsed response.
+        '''
+        return self.parse_response(self.request('PUT', path, params = params, json = payload))
+
+    def delete(self, path, params = None):
+        '''
+        Call DELETE API and return the parsed response.
+        '''
+        return self.parse_response(self.request('DELETE', path, params = params))
+
+    def __get_page(self, path, params, page_number, stats = None):
+        '''
+        Call GET on one page of a paginated API and return the parsed response.
+        '''
+        return self.get(path, page_params(params, page_number), stats = stats)
+
+    def get_all_pages(self, path, params = None, stats = None):
+        '''
+        Call GET on all pages of a paginated API and return the list of entries in page order.
+
+        Page 0 is fetched first. The rest of pages are fetched in parallel by up to max_workers threads sharing the same transport,
+        all at once if the total count is known, or in batches of max_workers until the last page otherwise (see Pagination).
+        If stats dictionary is given, 'status_code' of the last page (or the failed one) and 'retries' of all pages are added to it.
+        '''
+        # Pages are fetched by multiple threads. Each page has its own stats, which are added in page order at the end.
+        page_stats = {}
+        try:
+            return self.__get_all_pages(path, params, page_stats if stats is not None else None)
+        finally:
+            if stats is not None:
+                for page_number in sorted(page_stats):
+                    add_stats(stats, page_stats[page_number])
+
+    def __get_all_pages(self, path, params, page_stats):
+        '''
+        Private method of the class. Body of get_all_pages. Stats of each page are set to page_stats if it is not None.
+        '''
+        def get_page(page_number):
+            stats = None
+            if page_stats is not None:
+                stats = page_stats[page_number] = {'status_code': None, 'retries': 0}
+            return self.__get_page(path, params, page_number, stats)
+
+        pagination = Pagination(self.page_sizes, path)
+        data = get_page(0)
+        result = list(data['Results'])
+        if pagination.add_page(0, data):
+            return result
+
+        page_count = pagination.page_count()
+        page_number = 1
+        if page_count is None and pagination.needs_probe():
+            data = get_page(1)
+            result.extend(data['Results'])
+            if pagination.add_page(1, data):
+                return result
+            page_number = 2
+
+        with ThreadPoolExecutor(max_workers = self.max_workers) as executor:
+            if page_count is not None:
+                for data in executor.map(get_page, range(1, page_count)):
+                    result.extend(data['Results'])
+                return result
+
+            while True:
+                batch = executor.map(get_page, range(page_number, page_number + self.max_workers))
+                for data in batch:
+                    result.extend(data['Results'])
+                    if pagination.add_page(page_number, data):
+                        return result
+                    page_number += 1
+
+    def iter_pages(self, path, params = None):
+        '''
+        Generator version of get_all_pages. Yield entries of a paginated API in page order as each page arrives.
+        The next page is prefetched in the background while the caller processes the current one.
+        If the total count or the page size of the endpoint is known, the last page ends the iteration without prefetching another one.
+        '''
+        pagination = Pagination(self.page_sizes, path)
+        with ThreadPoolExecutor(max_workers = 1) as executor:
+            future = executor.submit(self.__get_page, path, params, 0)
+            page_number = 0
+            while True:
+                data = future.result()
+                if pagination.add_page(page_number, data):
+                    yield from data['Results']
+                    return
+                page_number += 1
+                future = executor.submit(self.__get_page, path, params, page_number)
+                yield from data['Results']
+
+def add_stats(stats, call_stats):
+    '''
+    Add stats of a call (see PanoptoApiClient.request) to the stats of an operation which may consist of multiple calls.
+    'status_code' is that of the latest call, unless an earlier one has failed. 'retries' is the sum of all calls.
+    '''
+    if call_stats['status_code'] is not None and (stats.get('status_code') or 0) < 400:
+        stats['status_code'] = call_stats['status_code']
+    stats['retries'] = stats.get('retries', 0) + call_stats['retries']
@@ -0,0 +1,260 @@
+#!python3
+import time
+import asyncio
+from panopto_rate_limiter import AdaptiveRateLimiter, parse_retry_after
+from panopto_api_common import build_url, cache_key, page_params, Pagination, DEFAULT_MAX_THROTTLE_RETRIES
+from panopto_metrics import RequestRecord, endpoint_template
+from panopto_transport import to_httpx_timeout, DEFAULT_TIMEOUT
+from panopto_single_flight import AsyncSingleFlight
+import panopto_json
+
+# Number of API calls in flight at the same time.
+DEFAULT_MAX_CONCURRENCY = 50
+
+class PanoptoApiClientAsync:
+    '''
+    asyncio version of PanoptoApiClient, built on httpx.AsyncClient.
+    Thousands of calls can be awaited concurrently from one thread. The number of calls in flight is bounded by a semaphore.
+
+    Use this as an async context manager, so that the connection pool is opened and closed:
+        async with PanoptoApiClientAsync(server, ssl_verify, oauth2) as client:
+            folder = await client.get('folders/{0}'.format(folder_id))
+    '''
+    def __init__(self, server, ssl_verify, oauth2, get_access_token = None, max_concurrency = DEFAULT_MAX_CONCURRENCY,
+                 rate_limiter = None, max_throttle_retries = DEFAULT_MAX_THROTTLE_RETRIES, instruments = None,
+                 http2 = False, timeout = DEFAULT_TIMEOUT, decoder = None, single_flight = True, log = print):
+        '''
+        Constructor of asyncio API client instance. Parameters are same as PanoptoApiClient, except:
+        max_concurrency is the number of API calls in flight at the same time.
+        http2 enables HTTP/2, which multiplexes the concurrent calls over one connection. This requires h2 module (pip install httpx[http2]).
+        timeout is (connect, read) in seconds, or a number for both.
+        single_flight makes concurrent GET calls of the same path and parameters share one request (see AsyncSingleFlight).
+        '''
+        self.server = server
+        # server may have explicit scheme, e.g. 'http://localhost:8000' for the mock server. HTTPS by default.
+        self.base_url = server if '://' in server else 'https://' + server
+        self.ssl_verify = ssl_verify
+        self.oauth2 = oauth2
+        if get_access_token is None:
+            get_access_token = oauth2.get_access_token_authorization_code_grant
+        self.get_access_token_blocking = get_access_token
+        if rate_limiter is None:
+            rate_limiter = AdaptiveRateLimiter()
+        self.rate_limiter = rate_limiter
+        self.max_throttle_retries = max_throttle_retries
+        self.max_concurrency = max_concurrency
+        self.instruments = list(instruments or [])
+        self.decoder = decoder if decoder is not None else panopto_json.loads
+        self.http2 = http2
+        self.timeout = timeout
+        self.single_flight = AsyncSingleFlight() if single_flight else None
+        self.log = log
+
+        # Page size of each paginated endpoint, learned from the responses.
+        self.page_sizes = {}
+
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.token_lock = asyncio.Lock()
+        self.http_client = None
+
+    async def __aenter__(self):
+        # httpx is imported here, so that importing this module does not load it until a client is opened.
+        import httpx
+        limits = httpx.Limits(max_connections = self.max_concurrency, max_keepalive_connections = self.max_concurrency)
+        self.http_client = httpx.AsyncClient(verify = self.ssl_verify, limits = limits, http2 = self.http2,
+                                             timeout = to_httpx_timeout(self.timeout))
+        # Initial authorization.
+        await self.get_access_token()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.http_client.aclose()
+        self.http_client = None
+
+    async def get_access_token(self):
+        '''
+        Return a valid access token.
+        If the current one is expiring or rejected, get a new one in a worker thread, so that the event loop is not blocked.
+        Concurrent tasks share one refresh.
+        '''
+        access_token = self.oauth2.get_cached_access_token()
+        if access_token:
+            return access_token
+        async with self.token_lock:
+            access_token = self.oauth2.get_cached_access_token()
+            if access_token:
+                return access_token
+            return await asyncio.to_thread(self.get_access_token_blocking)
+
+    async def __inspect_response_is_retry_needed(self, response, access_token, throttle_retries, record):
+        '''
+        Same as PanoptoApiClient's one, but waits by asyncio.sleep.
+        '''
+        if response.status_code // 100 == 2:
+            # Success on 2xx response.
+            self.rate_limiter.on_success()
+            return False
+
+        if response.status_code == 401:
+            self.log('Unauthorized. Refresh access token.')
+            self.oauth2.invalidate_access_token(access_token)
+            return True
+
+        if response.status_code == 429 and throttle_retries < self.max_throttle_retries:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            delay = self.rate_limiter.on_throttled(throttle_retries + 1, retry_after)
+            self.log('Too many requests. Wait {0:.1f} sec, and retry.'.format(delay))
+            await asyncio.sleep(delay)
+            record.throttle_wait += delay
+            return True
+
+        # Throw unhandled cases.
+        response.raise_for_status()
+
+    def build_url(self, path, params = None):
+        '''
+        Return the full URL of the API endpoint, e.g. 'folders/{id}' with optional query parameters as dictionary.
+        '''
+        return build_url(self.base_url, path, params)
+
+    async def request(self, method, path, params = None, json = None):
+        '''
+        Call the API with given HTTP method, retrying as __inspect_response_is_retry_needed tells, and return the response.
+        An exception is thrown if the call fails. Each instrument receives RequestRecord of the call, same as PanoptoApiClient.
+        '''
+        url = self.build_url(path, params)
+        retries = 0
+        throttle_retries = 0
+        record = RequestRecord(method, endpoint_template(path))
+        start = time.perf_counter()
+        try:
+            async with self.semaphore:
+                while True:
+                    token_start = time.perf_counter()
+                    access_token = await self.get_access_token()
+                    limiter_start = time.perf_counter()
+                    record.token_wait += limiter_start - token_start
+                    while True:
+                        wait = self.rate_limiter.reserve()
+                        if wait <= 0:
+                            break
+                        await asyncio.sleep(wait)
+                    record.rate_limit_wait += time.perf_counter() - limiter_start
+                    resp = await self.http_client.request(method, url, json = json, headers = {'Authorization': 'Bearer ' + access_token})
+                    record.status_code = resp.status_code
+                    record.retries = retries
+                    record.response_bytes = len(resp.content)
+                    if await self.__inspect_response_is_retry_needed(resp, access_token, throttle_retries, record):
+                        retries += 1
+                        if resp.status_code == 429:
+                            throttle_retries += 1
+                        continue
+                    return resp
+        except Exception as e:
+            record.error = str(e)
+            raise
+        finally:
+            record.latency = time.perf_counter() - start
+            for instrument in self.instruments:
+                instrument(record)
+
+    def parse_response(self, response):
+        '''
+        Parse JSON body of the response by decoder.
+        '''
+        return self.decoder(response.content)
+
+    async def get(self, path, params = None):
+        '''
+        Call GET API and return the parsed response.
+        Same as PanoptoApiClient, concurrent calls of the same path and parameters share one request if single_flight is enabled.
+        '''
+        if self.single_flight is None:
+            return self.parse_response(await self.request('GET', path, params = params))
+        return await self.single_flight.do(cache_key(path, params), lambda: self.__get(path, params))
+
+    async def __get(self, path, params):
+        '''
+        Private method of the class.
+        '''
+        return self.parse_response(await self.request('GET', path, params = params))
+
+    async def post(self, path, payload, params = None):
+        '''
+        Call POST API with JSON payload and return the parsed response.
+        '''
+        return self.parse_response(await self.request('POST', path, params = params, json = payload))
+
+    async def put(self, path, payload, params = None):
+        '''
+        Call PUT API with JSON payload and return the parsed response.
+        '''
+        return self.parse_response(await self.request('PUT', path, params = params, json = payload))
+
+    async def delete(self, path, params = None):
+        '''
+        Call DELETE API and return the parsed response.
+        '''
+        return self.parse_response(await self.request('DELETE', path, params = params))
+
+    async def __get_page(self, path, params, page_number):
+        '''
+        Call GET on one page of a paginated API and return the parsed response.
+        '''
+        return await self.get(path, page_params(params, page_number))
+
+    async def get_all_pages(self, path, params = None, batch_size = 8):
+        '''
+        Call GET on all pages of a paginated API and return the list of entries in page order.
+        Same as PanoptoApiClient.get_all_pages, with batch_size pages fetched concurrently when the total count is not known.
+        '''
+        pagination = Pagination(self.page_sizes, path)
+        data = await self.__get_page(path, params, 0)
+        result = list(data['Results'])
+        if pagination.add_page(0, data):
+            return result
+
+        page_count = pagination.page_count()
+        if page_count is not None:
+            for data in await asyncio.gather(*[self.__get_page(path, params, n) for n in range(1, page_count)]):
+                result.extend(data['Results'])
+            return result
+
+        page_number = 1
+        if pagination.needs_probe():
+            data = await self.__get_page(path, params, 1)
+            result.extend(data['Results'])
+            if pagination.add_page(1, data):
+                return result
+            page_number = 2
+
+        while True:
+            batch = await asyncio.gather(*[self.__get_page(path, params, n) for n in range(page_number, page_number + batch_size)])
+            for data in batch:
+                result.extend(data['Results'])
+                if pagination.add_page(page_number, data):
+                    return result
+                page_number += 1
+
+    async def iter_pages(self, path, params = None):
+        '''
+        Async generator version of get_all_pages. Yield entries of a paginated API in page order as each page arrives.
+        The next page is prefetched in the background while the caller processes the current one.
+        Same as PanoptoApiClient, the last page ends the iteration if the total count or the page size of the endpoint is known.
+        '''
+        pagination = Pagination(self.page_sizes, path)
+        task = asyncio.ensure_future(self.__get_page(path, params, 0))
+        try:
+            page_number = 0
+            while True:
+                data = await task
+                if pagination.add_page(page_number, data):
+                    for entry in data['Results']:
+                        yield entry
+                    return
+                page_number += 1
+                task = asyncio.ensure_future(self.__get_page(path, params, page_number))
+                for entry in data['Results']:
+                    yield entry
+        finally:
+            task.cancel()
@@ -0,0 +1,94 @@
+#!python3
+import urllib.parse
+
+# Helpers and constants shared by PanoptoApiClient and PanoptoApiClientAsync. The clients do the calls (by threads or tasks),
+# and this module decides what to call.
+
+# Number of retries on 429 (Too many requests) before giving up.
+DEFAULT_MAX_THROTTLE_RETRIES = 10
+
+def build_url(base_url, path, params = None):
+    '''
+    Return the full URL of the API endpoint, e.g. 'folders/{id}' with optional query parameters as dictionary.
+    '''
+    url = '{0}/Panopto/api/v1/{1}'.format(base_url, path)
+    if params:
+        url += '?' + urllib.parse.urlencode(params)
+    return url
+
+def cache_key(path, params = None):
+    '''
+    Return the key of the response, which is the path with query parameters, e.g. 'folders/{id}/children?pageNumber=0'.
+    '''
+    if params:
+        return path + '?' + urllib.parse.urlencode(params)
+    return path
+
+def page_params(params, page_number):
+    '''
+    Return the query parameters of one page of a paginated API.
+    '''
+    result = dict(params or {})
+    result['pageNumber'] = page_number
+    return result
+
+def endpoint_of(path):
+    '''
+    Return the endpoint of the path without IDs, e.g. ('folders', 'children') for 'folders/{id}/children', to learn its page size.
+    '''
+    segments = path.split('/')
+    return (segments[0], segments[-1])
+
+
+class Pagination:
+    '''
+    State of the pagination of one call of get_all_pages or iter_pages.
+
+    Page 0 tells the page size, and the total count if the response has one, which tells how many pages remain.
+    If the total count is not known, a page shorter than page 0 is the last one.
+    The page size of each endpoint is learned in page_sizes (dictionary shared by the calls of a client) when page 1 is not empty,
+    so that a single short page needs no more calls after that.
+    '''
+    def __init__(self, page_sizes, path):
+        self.page_sizes = page_sizes
+        self.endpoint = endpoint_of(path)
+        self.page_size = None
+        self.total = None
+
+    def add_page(self, page_number, data):
+        '''
+        Record the parsed response of the page. Return True if it is the last page. Pages must be added in page order.
+        '''
+        entries = data['Results']
+        if page_number == 0:
+            self.page_size = len(entries)
+            self.total = data.get('TotalNumberOfResults')
+            if self.page_size == 0:
+                return True
+            if self.total is not None:
+                return self.total <= self.page_size
+            known_page_size = self.page_sizes.get(self.endpoint)
+            # Page 0 is not full, so it is the only page.
+            return known_page_size is not None and self.page_size < known_page_size
+
+        if page_number == 1 and len(entries) > 0:
+            # Page 0 was full.
+            self.page_sizes[self.endpoint] = self.page_size
+        if self.total is not None:
+            return (page_number + 1) * self.page_size >= self.total
+        return len(entries) < self.page_size
+
+    def page_count(self):
+        '''
+        Return the number of pages if the total count is known, None otherwise.
+        '''
+        if self.total is None:
+            return None
+        return (self.total + self.page_size - 1) // self.page_size
+
+    def needs_probe(self):
+        '''
+        Return True if page 1 should be fetched alone to tell whether page 0 is full, because neither the total count
+        nor the page size of the endpoint is known, instead of fetching a batch of pages which may be all empty.
+        '''
+        return self.total is None and self.endpoint not in self.page_sizes
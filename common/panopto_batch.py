@@ -0,0 +1,75 @@
+#!python3
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from panopto_bulk import BulkItemResult, DEFAULT_BULK_MAX_WORKERS
+
+def parse_batch_line(line, commands, default_command):
+    '''
+    Parse a line of batch input into (command name, list of arguments).
+
+    A line is a command name followed by its arguments separated by spaces, e.g. 'rename {id} New name'.
+    The last argument takes the rest of the line verbatim (spaces, quotes and backslashes included), so that names and queries
+    need no quotes. Single or double quotes are removed only if they wrap the whole last argument, e.g. 'rename {id} "New name"'.
+    A line of an ID alone is default_command of the ID.
+    commands is the dictionary of command name -> (number of arguments, function).
+    ValueError is thrown for an unknown command or missing arguments.
+    '''
+    words = line.split(None, 1)
+    name = words[0].lower()
+    rest = words[1] if len(words) > 1 else ''
+    if name not in commands:
+        if not rest:
+            return default_command, [words[0]]
+        raise ValueError('Unknown command: {0}'.format(words[0]))
+    count = commands[name][0]
+    arguments = rest.split(None, count - 1) if count > 0 else rest.split()
+    if len(arguments) < count:
+        raise ValueError('{0} needs {1} argument(s)'.format(name, count))
+    if count > 0:
+        last = arguments[-1]
+        if len(last) >= 2 and last[0] == last[-1] and last[0] in '"\'' and last[0] not in last[1:-1]:
+            arguments[-1] = last[1:-1]
+    return name, arguments
+
+def run_batch(lines, commands, default_command, emit, max_workers = DEFAULT_BULK_MAX_WORKERS):
+    '''
+    Run the commands of lines (e.g. a file or standard input) in parallel by a thread pool, with one shared client.
+    Empty lines and lines starting with '#' are skipped. lines may be endless, e.g. a pipe, as only max_workers lines are run at a time.
+
+    commands is the dictionary of command name -> (number of arguments, function), where function(stats, *arguments) returns
+    the output of the command, and passes stats to PanoptoApiClient.request if it calls it directly.
+    emit is called with the dictionary of each line as soon as it completes, even while the next line is not available yet:
+    'Line' number, 'Command' text, and 'Success', 'StatusCode', 'Retries', 'Latency', 'Error' and 'Output' same as BulkItemResult.
+    Calls of emit are serialized. Commands run concurrently, so use max_workers = 1 if a line depends on the previous one.
+    '''
+    slots = threading.Semaphore(max_workers)
+    emit_lock = threading.Lock()
+
+    def run_one(number, line):
+        stats = {'status_code': None, 'retries': 0}
+        start = time.perf_counter()
+        output = None
+        try:
+            name, arguments = parse_batch_line(line, commands, default_command)
+            output = commands[name][1](stats, *arguments)
+            success, error = True, None
+        except Exception as e:
+            success, error = False, str(e)
+        result = BulkItemResult(number, success, stats['status_code'], stats['retries'], time.perf_counter() - start, error, output)
+        record = {'Line': number, 'Command': line}
+        record.update(result.to_dict())
+        del record['Id']
+        try:
+            with emit_lock:
+                emit(record)
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers = max_workers) as executor:
+        for number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            slots.acquire()
+            executor.submit(run_one, number, line)
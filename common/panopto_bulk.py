@@ -0,0 +1,188 @@
+#!python3
+import os
+import sys
+import csv
+import time
+import json
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Number of items processed in parallel.
+DEFAULT_BULK_MAX_WORKERS = 8
+
+class BulkItemResult:
+    '''
+    Result of one item of bulk operation.
+    output is the value returned by the operation, e.g. the ID of the created object. None if the operation returns nothing.
+    '''
+    __slots__ = ('item_id', 'success', 'status_code', 'retries', 'latency', 'error', 'output')
+
+    def __init__(self, item_id, success, status_code, retries, latency, error, output = None):
+        self.item_id = item_id
+        self.success = success
+        self.status_code = status_code
+        self.retries = retries
+        self.latency = latency
+        self.error = error
+        self.output = output
+
+    def to_dict(self):
+        result = {
+            'Id': self.item_id,
+            'Success': self.success,
+            'StatusCode': self.status_code,
+            'Retries': self.retries,
+            'Latency': self.latency,
+            'Error': self.error,
+        }
+        if self.output is not None:
+            result['Output'] = self.output
+        return result
+
+
+class BulkOperationRunner:
+    '''
+    Run an operation on many items through a bounded thread pool, and report the result of each item.
+
+    API calls of all workers go through the same PanoptoApiClient, and therefore share its rate limiter.
+    If checkpoint_file is given, each result is appended to it as a line of JSON.
+    When the same checkpoint file is given again, the items that succeeded already are skipped, so that an interrupted run can resume.
+    '''
+    def __init__(self, max_workers = DEFAULT_BULK_MAX_WORKERS, checkpoint_file = None):
+        self.max_workers = max_workers
+        self.checkpoint_file = checkpoint_file
+
+    def run(self, items, operation):
+        '''
+        Run operation(item_id, argument, stats) for each (item_id, argument) of items, and yield BulkItemResult in completion order.
+        operation should pass stats dictionary to PanoptoApiClient.request, and throw an exception on failure.
+        The value returned by operation is kept as output of BulkItemResult.
+        items may be a generator. Only a limited number of items are read ahead.
+        '''
+        completed = self.__load_completed()
+        checkpoint = None
+        if self.checkpoint_file is not None:
+            checkpoint = open(self.checkpoint_file, 'a', encoding = 'utf-8')
+        try:
+            with ThreadPoolExecutor(max_workers = self.max_workers) as executor:
+                pending = set()
+                for item_id, argument in items:
+                    if item_id in completed:
+                        continue
+                    if len(pending) >= self.max_workers * 2:
+                        done, pending = wait(pending, return_when = FIRST_COMPLETED)
+                        yield from self.__complete(done, checkpoint)
+                    pending.add(executor.submit(self.__run_one, operation, item_id, argument))
+                while pending:
+                    done, pending = wait(pending, return_when = FIRST_COMPLETED)
+                    yield from self.__complete(done, checkpoint)
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+
+    def __run_one(self, operation, item_id, argument):
+        '''
+        Private method of the class, called by worker threads.
+        '''
+        stats = {'status_code': None, 'retries': 0}
+        start = time.perf_counter()
+        output = None
+        try:
+            output = operation(item_id, argument, stats)
+            success, error = True, None
+        except Exception as e:
+            success, error = False, str(e)
+        latency = time.perf_counter() - start
+        return BulkItemResult(item_id, success, stats['status_code'], stats['retries'], latency, error, output)
+
+    def __complete(self, done, checkpoint):
+        '''
+        Private method of the class. Record the results of completed futures to the checkpoint file, and return them.
+        '''
+        results = [future.result() for future in done]
+        if checkpoint is not None:
+            for result in results:
+                checkpoint.write(json.dumps(result.to_dict()) + '\n')
+            checkpoint.flush()
+        return results
+
+    def __load_completed(self):
+        '''
+        Private method of the class. Return the set of item IDs which succeeded in the checkpoint file.
+        '''
+        completed = set()
+        if self.checkpoint_file is None or not os.path.exists(self.checkpoint_file):
+            return completed
+        with open(self.checkpoint_file, 'r', encoding = 'utf-8') as fr:
+            for line in fr:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # The last line may be partially written when the previous run was killed.
+                    continue
+                if record.get('Success'):
+                    completed.add(record['Id'])
+        return completed
+
+
+def summarize_bulk_results(results):
+    '''
+    Return a dictionary of the number of succeeded and failed items, total retries, and average latency of BulkItemResult list.
+    '''
+    succeeded = sum(1 for result in results if result.success)
+    return {
+        'Succeeded': succeeded,
+        'Failed': len(results) - succeeded,
+        'Retries': sum(result.retries for result in results),
+        'AverageLatency': sum(result.latency for result in results) / len(results) if results else 0,
+    }
+
+def run_bulk_csv(input_file, operation, bulk_update_names, bulk_delete, max_workers = DEFAULT_BULK_MAX_WORKERS,
+                 checkpoint_file = None, report_file = None):
+    '''
+    Main loop of bulk.py of folders-cli and sessions-cli. Return the list of BulkItemResult.
+
+    input_file is CSV of ID per line, followed by new name if operation is 'rename' ('delete' otherwise).
+    bulk_update_names(id_name_pairs, max_workers, checkpoint_file) or bulk_delete(ids, max_workers, checkpoint_file) is called,
+    e.g. PanoptoFolders.bulk_update_folder_names, and each result is written to report_file (standard output by default) as JSON line.
+    A malformed row (no ID, or no new name for rename) is reported as a failed item of its line number, without calling the API,
+    so that it does not stop the other rows.
+    '''
+    invalid = []
+
+    def read_items(reader):
+        for row in reader:
+            if not row:
+                continue
+            item_id = row[0]
+            if not item_id.strip():
+                error = 'ID is missing'
+            elif operation == 'rename' and len(row) < 2:
+                error = 'New name is missing'
+            else:
+                yield item_id, row[1] if operation == 'rename' else None
+                continue
+            invalid.append(BulkItemResult(item_id or None, False, None, 0, 0.0, 'Line {0}: {1}'.format(reader.line_num, error)))
+
+    with open(input_file, 'r', encoding = 'utf-8', newline = '') as fr:
+        items = read_items(csv.reader(fr))
+        if operation == 'rename':
+            results = bulk_update_names(items, max_workers, checkpoint_file)
+        else:
+            results = bulk_delete((item_id for item_id, argument in items), max_workers, checkpoint_file)
+
+        report = open(report_file, 'w', encoding = 'utf-8') if report_file else sys.stdout
+        completed = []
+        try:
+            for result in results:
+                # Malformed rows found while the input is read ahead are written along with the results.
+                for item in [result] + invalid:
+                    report.write(json.dumps(item.to_dict()) + '\n')
+                    completed.append(item)
+                invalid.clear()
+            for item in invalid:
+                report.write(json.dumps(item.to_dict()) + '\n')
+                completed.append(item)
+        finally:
+            if report is not sys.stdout:
+                report.close()
+    return completed
@@ -0,0 +1,69 @@
+#!python3
+import json
+
+# Names of JSON backends in the order of preference. orjson and msgspec are used only if they are installed.
+JSON_BACKEND_NAMES = ['orjson', 'msgspec', 'json']
+
+def get_decoder(name = None):
+    '''
+    Return the function which parses JSON response body (bytes) into Python objects, same as json.loads.
+    name is one of JSON_BACKEND_NAMES. If it is omitted, the fastest installed one is used.
+    orjson and msgspec decode from bytes directly, without decoding the body to str first as requests' Response.json() does.
+    '''
+    for backend in ([name] if name else JSON_BACKEND_NAMES):
+        if backend == 'orjson':
+            try:
+                import orjson
+                return orjson.loads
+            except ImportError:
+                if name:
+                    raise
+        elif backend == 'msgspec':
+            try:
+                import msgspec
+                return msgspec.json.decode
+            except ImportError:
+                if name:
+                    raise
+        elif backend == 'json':
+            return json.loads
+        else:
+            raise ValueError('Unknown JSON backend: {0}'.format(backend))
+
+def get_encoder(name = None):
+    '''
+    Return the function which serializes Python objects into compact JSON str, same as json.dumps without spaces.
+    name is same as get_decoder.
+    '''
+    for backend in ([name] if name else JSON_BACKEND_NAMES):
+        if backend == 'orjson':
+            try:
+                import orjson
+                return lambda obj: orjson.dumps(obj).decode('utf-8')
+            except ImportError:
+                if name:
+                    raise
+        elif backend == 'msgspec':
+            try:
+                import msgspec
+                encode = msgspec.json.encode
+                return lambda obj: encode(obj).decode('utf-8')
+            except ImportError:
+                if name:
+                    raise
+        elif backend == 'json':
+            return lambda obj: json.dumps(obj, separators = (',', ':'))
+        else:
+            raise ValueError('Unknown JSON backend: {0}'.format(backend))
+
+def __getattr__(name):
+    # Default decoder (loads) and encoder (dumps) of this process, by the fastest installed backend.
+    # They are resolved at the first use and kept in the module, so that importing this module does not load orjson or msgspec.
+    if name == 'loads':
+        value = get_decoder()
+    elif name == 'dumps':
+        value = get_encoder()
+    else:
+        raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
+    globals()[name] = value
+    return value
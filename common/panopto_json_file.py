@@ -0,0 +1,74 @@
+#!python3
+import os
+import json
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+class JsonFile:
+    '''
+    JSON file shared by multiple processes, e.g. a token, a cached list or the state of a resumable job.
+
+    The content is saved as compact JSON and written atomically (to a temporary file, then renamed),
+    so that a reader never sees partially written content, and an interrupted process leaves the previous content.
+    lock() provides an inter-process lock with a separate lock file, so that a read-modify-write is done by one process at a time.
+    '''
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = path + '.lock'
+
+    def load(self):
+        '''
+        Return the saved content. None if it does not exist or is not readable.
+        '''
+        try:
+            with open(self.path, 'r', encoding = 'utf-8') as fr:
+                return json.load(fr)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, data):
+        '''
+        Save the content (JSON serializable object) atomically.
+        '''
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(dir = directory, prefix = os.path.basename(self.path), suffix = '.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding = 'utf-8') as fw:
+                json.dump(data, fw, separators = (',', ':'))
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    @contextmanager
+    def lock(self):
+        '''
+        Context manager to hold the inter-process lock of this file. This is not reentrant.
+        '''
+        with open(self.lock_path, 'a+b') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                while True:
+                    try:
+                        lock_file.seek(0)
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        # LK_LOCK gives up after 10 seconds. Keep waiting.
+                        continue
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
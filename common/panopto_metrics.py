@@ -0,0 +1,203 @@
+#!python3
+import re
+import json
+import threading
+
+# Upper bounds of histogram buckets. Waits and latencies are in seconds, sizes are in bytes.
+DEFAULT_SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+DEFAULT_BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+GUID_PATTERN = re.compile(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}')
+
+def endpoint_template(path):
+    '''
+    Return the path with IDs replaced, e.g. 'folders/{id}/children' for 'folders/8c1e.../children',
+    so that calls of the same endpoint are aggregated together.
+    '''
+    return GUID_PATTERN.sub('{id}', path)
+
+
+class RequestRecord:
+    '''
+    Measurement of one PanoptoApiClient.request call, including all of its retries. Times are in seconds.
+      latency: total time of the call.
+      throttle_wait: time waited on 429 (Too many requests) before the retries.
+      rate_limit_wait: time waited for the client side rate limiter.
+      token_wait: time spent to get the access token, which includes the refresh if it happened during the call.
+      response_bytes: size of the body of the last response.
+      error: message of the exception if the call failed, None otherwise.
+    '''
+    __slots__ = ('method', 'endpoint', 'status_code', 'latency', 'response_bytes', 'retries',
+                 'throttle_wait', 'rate_limit_wait', 'token_wait', 'error')
+
+    def __init__(self, method, endpoint):
+        self.method = method
+        self.endpoint = endpoint
+        self.status_code = None
+        self.latency = 0.0
+        self.response_bytes = 0
+        self.retries = 0
+        self.throttle_wait = 0.0
+        self.rate_limit_wait = 0.0
+        self.token_wait = 0.0
+        self.error = None
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Histogram:
+    '''
+    Histogram with fixed bucket upper bounds, as Prometheus' one. Not thread safe by itself.
+    '''
+    __slots__ = ('bounds', 'counts', 'count', 'sum')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def cumulative_counts(self):
+        '''
+        Return the list of (upper bound, number of values less than or equal to it), followed by ('+Inf', count).
+        '''
+        result = []
+        total = 0
+        for bound, count in zip(self.bounds, self.counts):
+            total += count
+            result.append((bound, total))
+        result.append(('+Inf', self.count))
+        return result
+
+    def quantile(self, ratio):
+        '''
+        Estimate the quantile by linear interpolation within the bucket, as Prometheus' histogram_quantile does.
+        None if no value is observed.
+        '''
+        if self.count == 0:
+            return None
+        rank = ratio * self.count
+        lower = 0.0
+        previous = 0
+        for bound, total in self.cumulative_counts()[:-1]:
+            if total >= rank:
+                count = total - previous
+                return lower + (bound - lower) * ((rank - previous) / count if count else 1.0)
+            lower, previous = bound, total
+        # The value is beyond the highest bound.
+        return self.bounds[-1]
+
+
+class MetricsCollector:
+    '''
+    Instrument of PanoptoApiClient / PanoptoApiClientAsync, which aggregates RequestRecord in memory:
+    number of calls per status code, retries, and histograms of latency, response size, throttle wait,
+    rate limiter wait and token wait, per HTTP method and endpoint template.
+
+    Pass an instance in instruments parameter of the client, then export the result by to_prometheus or to_dict.
+    This is thread safe, so that one instance can be shared by multiple clients and threads.
+    '''
+    HISTOGRAMS = (
+        ('latency', 'panopto_api_request_duration_seconds', 'Time of API call including retries.', DEFAULT_SECONDS_BUCKETS),
+        ('response_bytes', 'panopto_api_response_bytes', 'Size of API response body.', DEFAULT_BYTES_BUCKETS),
+        ('throttle_wait', 'panopto_api_throttle_wait_seconds', 'Time waited on 429 (Too many requests) responses.', DEFAULT_SECONDS_BUCKETS),
+        ('rate_limit_wait', 'panopto_api_rate_limit_wait_seconds', 'Time waited for the client side rate limiter.', DEFAULT_SECONDS_BUCKETS),
+        ('token_wait', 'panopto_api_token_wait_seconds', 'Time spent to get the access token, including refresh.', DEFAULT_SECONDS_BUCKETS),
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (method, endpoint, status) -> number of calls. status is the status code, or 'error' if no response.
+        self.requests = {}
+        # (method, endpoint) -> number of retries.
+        self.retries = {}
+        # (field, method, endpoint) -> Histogram.
+        self.histograms = {}
+
+    def __call__(self, record):
+        '''
+        Receive RequestRecord of a completed call from the client.
+        '''
+        labels = (record.method, record.endpoint)
+        status = str(record.status_code) if record.status_code is not None else 'error'
+        with self.lock:
+            self.requests[labels + (status,)] = self.requests.get(labels + (status,), 0) + 1
+            self.retries[labels] = self.retries.get(labels, 0) + record.retries
+            for field, name, description, bounds in self.HISTOGRAMS:
+                histogram = self.histograms.get((field,) + labels)
+                if histogram is None:
+                    histogram = self.histograms[(field,) + labels] = Histogram(bounds)
+                histogram.observe(getattr(record, field))
+
+    def to_dict(self):
+        '''
+        Return the metrics as a dictionary, which can be serialized as JSON.
+        Each histogram has count, sum, p50, p90, p99 and cumulative bucket counts.
+        '''
+        with self.lock:
+            endpoints = {}
+            for (method, endpoint, status), count in sorted(self.requests.items()):
+                entry = endpoints.setdefault('{0} {1}'.format(method, endpoint), {'Requests': {}, 'Retries': self.retries[(method, endpoint)]})
+                entry['Requests'][status] = count
+            for (field, method, endpoint), histogram in sorted(self.histograms.items()):
+                endpoints['{0} {1}'.format(method, endpoint)][field] = {
+                    'count': histogram.count,
+                    'sum': histogram.sum,
+                    'p50': histogram.quantile(0.50),
+                    'p90': histogram.quantile(0.90),
+                    'p99': histogram.quantile(0.99),
+                    'buckets': [[str(bound), count] for bound, count in histogram.cumulative_counts()],
+                }
+        return endpoints
+
+    def to_prometheus(self):
+        '''
+        Return the metrics in Prometheus text exposition format.
+        '''
+        lines = []
+        with self.lock:
+            lines.append('# HELP panopto_api_requests_total Number of API calls by the final status code.')
+            lines.append('# TYPE panopto_api_requests_total counter')
+            for (method, endpoint, status), count in sorted(self.requests.items()):
+                lines.append('panopto_api_requests_total{{{0},status="{1}"}} {2}'.format(self.__labels(method, endpoint), status, count))
+            lines.append('# HELP panopto_api_retries_total Number of retries on 401 and 429 responses.')
+            lines.append('# TYPE panopto_api_retries_total counter')
+            for (method, endpoint), count in sorted(self.retries.items()):
+                lines.append('panopto_api_retries_total{{{0}}} {1}'.format(self.__labels(method, endpoint), count))
+            for field, name, description, bounds in self.HISTOGRAMS:
+                lines.append('# HELP {0} {1}'.format(name, description))
+                lines.append('# TYPE {0} histogram'.format(name))
+                for (histogram_field, method, endpoint), histogram in sorted(self.histograms.items()):
+                    if histogram_field != field:
+                        continue
+                    labels = self.__labels(method, endpoint)
+                    for bound, count in histogram.cumulative_counts():
+                        lines.append('{0}_bucket{{{1},le="{2}"}} {3}'.format(name, labels, bound, count))
+                    lines.append('{0}_sum{{{1}}} {2}'.format(name, labels, histogram.sum))
+                    lines.append('{0}_count{{{1}}} {2}'.format(name, labels, histogram.count))
+        return '\n'.join(lines) + '\n'
+
+    def __labels(self, method, endpoint):
+        '''
+        Private method of the class. Return label string of Prometheus format.
+        '''
+        return 'method="{0}",endpoint="{1}"'.format(method, endpoint.replace('\\', '\\\\').replace('"', '\\"'))
+
+    def write(self, file_name):
+        '''
+        Write the metrics to the file, as JSON if the name ends with .json, or Prometheus text format otherwise.
+        '''
+        with open(file_name, 'w', encoding = 'utf-8') as fw:
+            if file_name.endswith('.json'):
+                json.dump(self.to_dict(), fw, indent = 2)
+            else:
+                fw.write(self.to_prometheus())
@@ -0,0 +1,106 @@
+#!python3
+import panopto_json
+
+class ApiRecord:
+    '''
+    Compact, read-only record of an object returned by API, e.g. an entry of a session listing.
+
+    The fields in FIELDS, which most consumers use, are kept in slots. The other fields, e.g. nested Urls and CreatedBy,
+    are kept together as one compact JSON string and decoded when they are accessed, so that a large listing does not keep
+    thousands of small nested dictionaries alive. Keep the returned value if a nested field is used repeatedly.
+
+    If fields is given, only those fields are kept (projection). Accessing the others raises KeyError / AttributeError.
+
+    Fields are read as record['Name'], record.get('Name') or record.Name, so that code written for the dictionaries works as it is.
+    to_dict returns the dictionary, e.g. for json.dumps.
+    '''
+    __slots__ = ('_extra',)
+    FIELDS = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_set = frozenset(cls.FIELDS)
+
+    def __init__(self, data, fields = None):
+        extra = {}
+        for name, value in data.items():
+            if fields is not None and name not in fields:
+                continue
+            if name in self._field_set:
+                setattr(self, name, value)
+            else:
+                extra[name] = value
+        self._extra = panopto_json.dumps(extra) if extra else None
+
+    @classmethod
+    def wrap(cls, entries, fields = None):
+        '''
+        Yield a record of each dictionary of entries, e.g. from iter_sessions, so that only the records are kept.
+        '''
+        for entry in entries:
+            yield cls(entry, fields)
+
+    def __decode_extra(self):
+        '''
+        Private method of the class. Return the dictionary of the fields not in slots.
+        '''
+        return panopto_json.loads(self._extra) if self._extra is not None else {}
+
+    def __getattr__(self, name):
+        # Called only when the attribute is not in the slots.
+        if name.startswith('_') or name in self._field_set:
+            raise AttributeError(name)
+        extra = self.__decode_extra()
+        if name not in extra:
+            raise AttributeError(name)
+        return extra[name]
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name)
+
+    def __contains__(self, name):
+        return name in self.keys()
+
+    def get(self, name, default = None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def keys(self):
+        '''
+        Return the list of the names of the fields kept by this record.
+        '''
+        return [name for name in self.FIELDS if hasattr(self, name)] + list(self.__decode_extra())
+
+    def to_dict(self):
+        '''
+        Return the fields kept by this record as a dictionary.
+        '''
+        result = {name: getattr(self, name) for name in self.FIELDS if hasattr(self, name)}
+        result.update(self.__decode_extra())
+        return result
+
+    def __repr__(self):
+        return '{0}({1!r})'.format(type(self).__name__, self.to_dict())
+
+class Folder(ApiRecord):
+    '''
+    Folder object of Folders API.
+    '''
+    __slots__ = FIELDS = ('Id', 'Name', 'Description', 'ParentFolder')
+
+class Session(ApiRecord):
+    '''
+    Session object of Sessions API and folders/{id}/sessions. Urls, CreatedBy and FolderDetails are decoded on access.
+    '''
+    __slots__ = FIELDS = ('Id', 'Name', 'Description', 'Folder', 'StartTime', 'CreatedDate', 'Duration')
+
+class ScheduledRecording(ApiRecord):
+    '''
+    Scheduled recording object of Scheduled Recordings API. Recorders is decoded on access.
+    '''
+    __slots__ = FIELDS = ('Id', 'Name', 'Description', 'StartTime', 'EndTime', 'FolderId', 'IsBroadcast')
@@ -1,15 +1,12 @@
 #!python3
 import os
+import re
 import time
-import json
-import requests
-from requests_oauthlib import OAuth2Session
-from oauthlib.oauth2 import LegacyApplicationClient  # specific to Resource Owner Grant
-import pickle
-import pprint
-import webbrowser
-from http.server import BaseHTTPRequestHandler
-from socketserver import ThreadingTCPServer
+import threading
+from panopto_token_store import TokenStore
+
+# requests_oauthlib, webbrowser, pprint and the redirect server (panopto_redirect_server) are imported when they are used,
+# so that a process starting with a valid cached token does not load them.
 
 # This code uses this local URL as redirect target for Authorization Code Grant (Server-side Web Application)
 REDIRECT_URL = 'http://localhost:9127/redirect'
@@ -18,18 +15,36 @@ REDIRECT_PORT = 9127
 # Typical scope for accessing Panopto API.
 DEFAULT_SCOPE = ('openid', 'api')
 
+# Access token is refreshed this many seconds before it expires, or at the half of its lifetime if it is shorter than twice of this.
+REFRESH_MARGIN_SECONDS = 60
+
 class PanoptoOAuth2():
-    def __init__(self, server, client_id, client_secret, ssl_verify):
+    def __init__(self, server, client_id, client_secret, ssl_verify, log = print):
+        '''
+        log is the function to write messages of the authorization, e.g. a partial of print to standard error. print by default.
+        '''
         self.client_id = client_id
         self.client_secret = client_secret
         self.ssl_verify = ssl_verify
+        self.log = log
         
-        # Create URI from
-        self.authorization_endpoint = 'https://{0}/Panopto/oauth2/connect/authorize'.format(server)
-        self.access_token_endpoint = 'https://{0}/Panopto/oauth2/connect/token'.format(server)
+        # Create URI from server, which may have explicit scheme, e.g. 'http://localhost:8000' for the mock server.
+        base_url = server if '://' in server else 'https://' + server
+        self.authorization_endpoint = '{0}/Panopto/oauth2/connect/authorize'.format(base_url)
+        self.access_token_endpoint = '{0}/Panopto/oauth2/connect/token'.format(base_url)
 
         # Create cache file name to store the refresh token. Use server & client ID combination.
-        self.cache_file = 'token_{0}_{1}.cache'.format(server, client_id)
+        # The file is shared by all processes running with the same server & client ID.
+        self.cache_file = 'token_{0}_{1}.cache'.format(re.sub(r'[^\w.-]', '_', server), client_id)
+        self.token_store = TokenStore(self.cache_file)
+
+        # The most recent token object, the user name it was issued for (Resource Owner Grant only),
+        # and the timer to refresh it in the background before it expires.
+        # The lock is held while getting a token, so that concurrent callers share one refresh.
+        self.token = None
+        self.token_username = None
+        self.token_lock = threading.RLock()
+        self.refresh_timer = None
 
         # Make oauthlib library accept non-HTTPS redirection.
         # This should not be applied if the redirect is hosted by actual server (not localhost).
@@ -38,36 +53,53 @@ class PanoptoOAuth2():
     def get_access_token_authorization_code_grant(self):
         '''
         Get OAuth2 access token by Authorization Code Grant (Server-side Web Application).
-        
-        This method initially tries to get a new access token from refresh token.
-        
+
+        This method returns the current access token if it is not going to expire within REFRESH_MARGIN_SECONDS.
+        Otherwise, this method reuses the cached access token if another process has already refreshed it,
+        or tries to get a new access token from refresh token.
+
         If refresh token is not available or does not work, proceed to new authorization flow:
          1. To launch the browser to navigate authorization URL.
          2. To start temporary HTTP server at localhost:REDIRECT_PORT and block.
          3. When the redirect is received, HTTP server exits.
          4. To get access token and refresh token with given authentication code by redirection.
          5. Save the token object, which includes refersh_token, for later refrehsh operation.
+        The token is refreshed in the background shortly before it expires.
+        The cache file is locked during the whole process, so that concurrent processes refresh the token only once.
         '''
-        
-        # First, try getting a new access token from refesh token.
-        access_token = self.__get_refreshed_access_token()
+        with self.token_lock:
+            if self.token_username is None and self.__is_token_fresh(self.token):
+                return self.token['access_token']
+            with self.token_store.lock():
+                return self.__get_access_token_authorization_code_grant()
+
+    def __get_access_token_authorization_code_grant(self):
+        '''
+        Private method of the class. Body of get_access_token_authorization_code_grant, called with the locks held.
+        '''
+        # First, try reusing the cached access token or getting a new access token from refesh token.
+        access_token = self.__get_cached_or_refreshed_access_token()
         if access_token:
             return access_token
 
         # Then, fallback to the full autorization path. Offline access scope is needed to get refresh token.
+        from requests_oauthlib import OAuth2Session
+        import webbrowser
+        import pprint
+        from panopto_redirect_server import RedirectTCPServer
         scope = list(DEFAULT_SCOPE) + ['offline_access']
         session = OAuth2Session(self.client_id, scope = scope, redirect_uri = REDIRECT_URL)
         
         # Open the authorization page by the browser.
         authorization_url, state = session.authorization_url(self.authorization_endpoint)
-        print()
-        print('Opening the browser for authorization: {0}'.format(authorization_url))
+        self.log()
+        self.log('Opening the browser for authorization: {0}'.format(authorization_url))
         webbrowser.open_new_tab(authorization_url)
 
         # Launch HTTP server to receive the redirect after authorization.
         redirected_path = ''
-        with RedirectTCPServer() as httpd:
-            print('HTTP server started at port {0}. Waiting for redirect.'.format(REDIRECT_PORT))
+        with RedirectTCPServer(REDIRECT_PORT) as httpd:
+            self.log('HTTP server started at port {0}. Waiting for redirect.'.format(REDIRECT_PORT))
             # Serve one request.
             httpd.handle_request()
             # The property may not be readable immediately. Wait until it becomes valid.
@@ -75,14 +107,44 @@ class PanoptoOAuth2():
                 time.sleep(1)
             redirected_path = httpd.last_get_path
 
-        print()
-        print('Get a new access token with authorization code, which is provided as return path: {0}'.format(redirected_path))
+        self.log()
+        self.log('Get a new access token with authorization code, which is provided as return path: {0}'.format(redirected_path))
         session.fetch_token(self.access_token_endpoint, client_secret = self.client_secret, authorization_response = redirected_path, verify=self.ssl_verify)
-        self.__save_token_to_cache(session.token)
+        self.log('OAuth2 flow provided the token below.')
+        self.log(pprint.pformat(session.token, indent = 4))
+        self.__set_token(session.token)
 
         return session.token['access_token']
 
-    def __get_refreshed_access_token(self):
+    def __get_cached_or_refreshed_access_token(self):
+        '''
+        Private method of the class, called with the locks held.
+        Reuse the cached access token if it is still valid and not the one this instance already holds (i.e. rejected or expiring).
+        This happens when another process has refreshed the token. No network call is made in this case.
+        Otherwise, get a new access token from refresh token.
+        Save the updated token object, which includes refersh_token, for later refrehsh operation.
+        Returning None if failing to get the new access token with any reason.
+        '''
+        self.log()
+        self.log('Read cached token from {0}'.format(self.cache_file))
+        cached_token = self.token_store.load()
+        if cached_token is not None and self.__is_token_fresh(cached_token) and \
+                (self.token is None or self.token.get('access_token') != cached_token['access_token']):
+            self.log('Reuse cached access token.')
+            self.__set_token(cached_token, save = False)
+            return cached_token['access_token']
+
+        # Cached token has the latest refresh token, in case another process has refreshed it.
+        if cached_token is not None and 'refresh_token' in cached_token:
+            token = cached_token
+        elif self.token is not None and self.token_username is None and 'refresh_token' in self.token:
+            token = self.token
+        else:
+            self.log('No refresh token is available.')
+            return None
+        return self.__get_refreshed_access_token(token)
+
+    def __get_refreshed_access_token(self, token):
         '''
         Private method of the class.
         Get a new access token from refresh token.
@@ -90,82 +152,148 @@ class PanoptoOAuth2():
         Returning None if failing to get the new access token with any reason.
         '''
         try:
-            print()
-            print('Read cached token from {0}'.format(self.cache_file))
-            with open(self.cache_file, 'rb') as fr:
-                token = pickle.load(fr)
-
+            from requests_oauthlib import OAuth2Session
             session = OAuth2Session(self.client_id, token = token)
 
-            print()
-            print('Get a new access token by using saved refresh token.')
+            self.log()
+            self.log('Get a new access token by using saved refresh token.')
             extra = {'client_id': self.client_id, 'client_secret': self.client_secret}
             session.refresh_token(self.access_token_endpoint, verify=self.ssl_verify, **extra)
-            self.__save_token_to_cache(session.token)
+            self.__set_token(session.token)
 
             return session.token['access_token']
 
         # Catch any failures (exceptions) and return with None.
         except Exception as e:
-            print('Failed to refresh access token: ' + str(e))
+            self.log('Failed to refresh access token: ' + str(e))
             return None
 
+    def __set_token(self, token, username = None, save = True):
+        '''
+        Private method of the class.
+        Keep the token object in memory, save it to the cache unless save is False, and schedule its background refresh.
+        The token of Resource Owner Grant is not saved.
+        '''
+        token = dict(token)
+        if 'expires_at' not in token and 'expires_in' in token:
+            token['expires_at'] = time.time() + int(token['expires_in'])
+        self.token = token
+        self.token_username = username
+        if username is None and save:
+            self.__save_token_to_cache(token)
+        self.__schedule_background_refresh()
+
+    def __is_token_fresh(self, token):
+        '''
+        Private method of the class.
+        True if the token exists and does not expire within the refresh margin (see __refresh_margin).
+        '''
+        if token is None or 'access_token' not in token:
+            return False
+        if 'expires_at' not in token:
+            return True
+        return time.time() < token['expires_at'] - self.__refresh_margin(token)
+
+    def __refresh_margin(self, token):
+        '''
+        Private method of the class.
+        Return REFRESH_MARGIN_SECONDS, capped at the half of the token's lifetime (expires_in), so that a token of short lifetime
+        is fresh when it is issued, instead of being refreshed again and again.
+        '''
+        try:
+            return min(REFRESH_MARGIN_SECONDS, float(token['expires_in']) / 2)
+        except (KeyError, TypeError, ValueError):
+            return REFRESH_MARGIN_SECONDS
+
+    def __schedule_background_refresh(self):
+        '''
+        Private method of the class.
+        Start a timer to refresh the current token the refresh margin before it expires.
+        Only a token with refresh_token (Authorization Code Grant) is refreshed in the background.
+        '''
+        if self.refresh_timer is not None:
+            self.refresh_timer.cancel()
+            self.refresh_timer = None
+        if self.token_username is not None or 'refresh_token' not in self.token or 'expires_at' not in self.token:
+            return
+        delay = max(0, self.token['expires_at'] - self.__refresh_margin(self.token) - time.time())
+        self.refresh_timer = threading.Timer(delay, self.__refresh_in_background)
+        self.refresh_timer.daemon = True
+        self.refresh_timer.start()
+
+    def __refresh_in_background(self):
+        '''
+        Private method of the class. Called by the timer thread.
+        '''
+        with self.token_lock:
+            if not self.__is_token_fresh(self.token):
+                with self.token_store.lock():
+                    self.__get_cached_or_refreshed_access_token()
+
+    def get_cached_access_token(self):
+        '''
+        Return the current access token if it is not going to expire within REFRESH_MARGIN_SECONDS, without blocking.
+        None if there is no such token and caller needs to get a new one.
+        '''
+        token = self.token
+        if self.__is_token_fresh(token):
+            return token['access_token']
+        return None
+
+    def invalidate_access_token(self, access_token):
+        '''
+        Notify that the server rejected the access token (e.g. 401 Unauthorized).
+        The next call to get the access token gets a new one, unless another caller has already done so.
+        '''
+        with self.token_lock:
+            if self.token is not None and self.token.get('access_token') == access_token:
+                self.token = dict(self.token, expires_at = 0)
+
     def __save_token_to_cache(self, token):
         '''
         Private method of the class.
         Save entire token object from oauthlib (not just refresh token).
         '''
-        with open(self.cache_file, 'wb') as fw:
-            pickle.dump(token, fw)
-        print('OAuth2 flow provided the token below. Cache it to {0}'.format(self.cache_file))
-        pprint.pprint(token, indent = 4)
+        self.token_store.save(token)
+        self.log('Cached the token to {0}'.format(self.cache_file))
 
     def get_access_token_resource_owner_grant(self, username, password):
         '''
         Get OAuth2 access token by Resource Owner Grant (User Based Server Application).
+        This method returns the current access token of the same user if it is not going to expire within REFRESH_MARGIN_SECONDS.
+        '''
+        with self.token_lock:
+            if self.token_username == username and self.__is_token_fresh(self.token):
+                return self.token['access_token']
+            return self.__get_access_token_resource_owner_grant(username, password)
+
+    def __get_access_token_resource_owner_grant(self, username, password):
+        '''
+        Private method of the class. Body of get_access_token_resource_owner_grant, called with the lock held.
         '''
+        from requests_oauthlib import OAuth2Session
+        from oauthlib.oauth2 import LegacyApplicationClient  # specific to Resource Owner Grant
+        import pprint
         session = OAuth2Session(client = LegacyApplicationClient(client_id = self.client_id))
 
         # Retrieve access token
-        print()
-        print('Get a new access token with username and password.')
+        self.log()
+        self.log('Get a new access token with username and password.')
         scope = DEFAULT_SCOPE
         session.fetch_token(
             token_url = self.access_token_endpoint, scope = scope,
             client_id = self.client_id, client_secret = self.client_secret,
             username = username, password = password, verify=self.ssl_verify)
 
-        print('OAuth2 flow provided the token below.')
-        pprint.pprint(session.token, indent = 4)
+        self.log('OAuth2 flow provided the token below.')
+        self.log(pprint.pformat(session.token, indent = 4))
+        self.__set_token(session.token, username)
         return session.token['access_token']
 
 
-class RedirectTCPServer(ThreadingTCPServer):
-    '''
-    A helper class for Authorization Code Grant.
-    Custom class of ThreadingTCPServer with RedirectHandler class as handler.
-    last_get_path property is set whenever GET method is called by the handler.
-    '''
-    def __init__(self):
-        # Class property, representing the path of the most recent GET call.
-        self.last_get_path = None
-        # Create an instance at REDIRECT_PORT with RedirectHandler class.
-        super().__init__(('', REDIRECT_PORT), RedirectHandler)
-        # Override the attribute of the server.
-        self.allow_reuse_address = True
-
-
-class RedirectHandler(BaseHTTPRequestHandler):
-    '''
-    A helper class for Authorization Code Grant.
-    '''
-    def do_GET(self):
-        '''
-        Handle a GET request. Set the path to the server's property.
-        '''
-        self.server.last_get_path = self.path
-        self.send_response(200)
-        self.send_header('Content-type', 'text/html')
-        self.end_headers()
-        self.wfile.write('<html><body><p>Authorization redirect was received. You may close this page.</p></body></html>'.encode('utf-8'))
-        self.wfile.flush()
+def __getattr__(name):
+    # RedirectTCPServer and RedirectHandler have moved to panopto_redirect_server. Load it when they are used from here.
+    if name in ('RedirectTCPServer', 'RedirectHandler'):
+        import panopto_redirect_server
+        return getattr(panopto_redirect_server, name)
+    raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
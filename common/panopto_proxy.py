@@ -0,0 +1,174 @@
+#!python3
+import os
+import socket
+import threading
+import http.client
+import urllib.parse
+import requests
+from requests.structures import CaseInsensitiveDict
+from panopto_api_client import PanoptoApiClient
+from panopto_transport import DEFAULT_READ_TIMEOUT
+import panopto_json
+
+# Unix socket of the proxy daemon, used when the path is not given.
+DEFAULT_SOCKET_PATH = os.path.expanduser('~/.panopto_proxy.sock')
+
+# Placeholders of the server name and the access token of the clients behind the daemon.
+# The daemon calls its own server with its own token, so they are never sent to Panopto.
+PROXY_SERVER = 'http://panopto-proxy'
+PROXY_ACCESS_TOKEN = 'proxy'
+
+# Prefix of the API paths forwarded by the daemon.
+API_PREFIX = '/Panopto/api/v1/'
+
+# This module is the client side of the daemon, imported by the samples. The daemon itself is in panopto_proxy_server,
+# so that the samples do not load http.server and socketserver.
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    '''
+    HTTPConnection over a Unix socket instead of TCP.
+    '''
+    def __init__(self, socket_path, timeout = DEFAULT_READ_TIMEOUT):
+        super().__init__('localhost', timeout = timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class ProxyResponse:
+    '''
+    Response of UnixSocketTransport, with the subset of requests' Response used by PanoptoApiClient.
+    '''
+    def __init__(self, url, status_code, headers, content):
+        self.url = url
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+
+    def json(self):
+        return panopto_json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError('{0} Error for url: {1}'.format(self.status_code, self.url), response = self)
+
+
+class UnixSocketTransport:
+    '''
+    Transport of PanoptoApiClient which sends the requests to the proxy daemon over its Unix socket.
+    Each thread keeps its own connection alive. The Authorization header is not sent, as the daemon adds its own.
+    '''
+    def __init__(self, socket_path = DEFAULT_SOCKET_PATH, timeout = DEFAULT_READ_TIMEOUT):
+        '''
+        timeout is seconds to wait for each response, which includes the daemon's retries of the call.
+        '''
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.local = threading.local()
+        self.connections = []
+        self.lock = threading.Lock()
+
+    def request(self, method, url, json = None, headers = None):
+        split = urllib.parse.urlsplit(url)
+        target = split.path + ('?' + split.query if split.query else '')
+        body = panopto_json.dumps(json).encode('utf-8') if json is not None else None
+        request_headers = {name: value for name, value in (headers or {}).items() if name.lower() != 'authorization'}
+        if body is not None:
+            request_headers['Content-Type'] = 'application/json'
+        try:
+            return self.__send(method, url, target, body, request_headers)
+        except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+            # The kept-alive connection was closed, e.g. by restart of the daemon. Retry once on a new connection,
+            # unless the method is POST which may have been done already.
+            if method == 'POST':
+                raise
+            return self.__send(method, url, target, body, request_headers)
+
+    def __send(self, method, url, target, body, headers):
+        '''
+        Private method of the class.
+        '''
+        connection = self.__connection()
+        try:
+            connection.request(method, target, body = body, headers = headers)
+            resp = connection.getresponse()
+            content = resp.read()
+        except Exception:
+            self.__discard_connection()
+            raise
+        return ProxyResponse(url, resp.status, resp.getheaders(), content)
+
+    def __connection(self):
+        '''
+        Private method of the class. Return the connection of the current thread.
+        '''
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = UnixHTTPConnection(self.socket_path, self.timeout)
+            self.local.connection = connection
+            with self.lock:
+                self.connections.append(connection)
+        return connection
+
+    def __discard_connection(self):
+        '''
+        Private method of the class.
+        '''
+        connection = getattr(self.local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self.local.connection = None
+            with self.lock:
+                self.connections.remove(connection)
+
+    def close(self):
+        with self.lock:
+            for connection in self.connections:
+                connection.close()
+            self.connections = []
+
+
+class PassThroughRateLimiter:
+    '''
+    Rate limiter which never waits, for the clients behind the daemon. The daemon's own rate limiter paces the calls of all processes.
+    '''
+    def reserve(self):
+        return 0
+
+    def acquire(self):
+        pass
+
+    def on_success(self):
+        pass
+
+    def on_throttled(self, attempt, retry_after = None):
+        return retry_after if retry_after is not None else 1.0
+
+
+def is_proxy_running(socket_path = DEFAULT_SOCKET_PATH):
+    '''
+    Return True if a daemon accepts connections on the socket.
+    '''
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+def connect_proxy(socket_path = DEFAULT_SOCKET_PATH, timeout = DEFAULT_READ_TIMEOUT, **kwargs):
+    '''
+    Return PanoptoApiClient which calls the API through the proxy daemon on the socket.
+    It needs no authorization nor TLS handshake, so that a short-lived process starts calling the API immediately.
+    Pass it as client of PanoptoFolders, PanoptoSessions, etc. Other parameters (e.g. max_workers) are passed to PanoptoApiClient.
+    ConnectionError is thrown if no daemon is running on the socket.
+    '''
+    if not is_proxy_running(socket_path):
+        raise ConnectionError('Proxy daemon is not running on {0}'.format(socket_path))
+    return PanoptoApiClient(PROXY_SERVER, True, None, get_access_token = lambda: PROXY_ACCESS_TOKEN,
+                            rate_limiter = PassThroughRateLimiter(), transport = UnixSocketTransport(socket_path, timeout), **kwargs)
@@ -0,0 +1,108 @@
+#!python3
+import os
+import urllib.parse
+from http.server import BaseHTTPRequestHandler
+from socketserver import ThreadingUnixStreamServer
+from panopto_proxy import is_proxy_running, DEFAULT_SOCKET_PATH, API_PREFIX
+import panopto_json
+
+class PanoptoProxyServer(ThreadingUnixStreamServer):
+    '''
+    Local API proxy daemon which listens on a Unix socket, same approach as RedirectTCPServer of panopto_redirect_server.
+    Each connection is served by its own thread with ProxyHandler, and all of them call the API through one PanoptoApiClient,
+    so that short-lived processes share its warm access token, connection pool, rate limiter and response cache.
+
+    The socket file is readable and writable by the owner only, as any process connected to it calls the API as the daemon's user.
+    '''
+    daemon_threads = True
+
+    def __init__(self, client, socket_path = DEFAULT_SOCKET_PATH, verbose = False):
+        '''
+        client is PanoptoApiClient which calls the API. Its cache (ResponseCache), if any, is shared by all the processes.
+        A stale socket file left by a previous daemon is removed. RuntimeError is thrown if another daemon is running on it.
+        '''
+        self.client = client
+        self.verbose = verbose
+        if os.path.exists(socket_path):
+            if is_proxy_running(socket_path):
+                raise RuntimeError('Proxy daemon is already running on {0}'.format(socket_path))
+            os.remove(socket_path)
+        # Create the socket file without permission of the others, so that it is never accessible by them even for a moment.
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, ProxyHandler)
+        finally:
+            os.umask(old_umask)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+class ProxyHandler(BaseHTTPRequestHandler):
+    '''
+    Handler of PanoptoProxyServer. A request of '/Panopto/api/v1/{path}' is called by the daemon's PanoptoApiClient,
+    which adds the access token and retries on 401 and 429, and its response status and body are returned as they are.
+    GET is served from the response cache if it is enabled. Any other method clears the cache, as it may modify the data.
+    Connections are kept alive (HTTP/1.1), so that a client sends all of its calls over one connection per thread.
+    '''
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.__forward('GET')
+
+    def do_POST(self):
+        self.__forward('POST')
+
+    def do_PUT(self):
+        self.__forward('PUT')
+
+    def do_DELETE(self):
+        self.__forward('DELETE')
+
+    def __forward(self, method):
+        '''
+        Private method of the class. Call the API and send back its response.
+        '''
+        url = urllib.parse.urlsplit(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length > 0 else None
+        if not url.path.startswith(API_PREFIX):
+            self.__send(404, panopto_json.dumps({'Message': 'Not an API path: {0}'.format(url.path)}).encode('utf-8'))
+            return
+
+        path = url.path[len(API_PREFIX):]
+        params = dict(urllib.parse.parse_qsl(url.query, keep_blank_values = True))
+        client = self.server.client
+        try:
+            if method == 'GET':
+                status, content = 200, panopto_json.dumps(client.get(path, params)).encode('utf-8')
+            else:
+                payload = panopto_json.loads(body) if body else None
+                resp = client.request(method, path, params = params, json = payload)
+                client.invalidate_cache('*')
+                status, content = resp.status_code, resp.content
+        except Exception as e:
+            response = getattr(e, 'response', None)
+            if response is not None:
+                # Error response which the client does not retry, e.g. 404. The caller sees the same error.
+                status, content = response.status_code, response.content
+            else:
+                status, content = 502, panopto_json.dumps({'Message': str(e)}).encode('utf-8')
+        self.__send(status, content)
+
+    def __send(self, status, content):
+        '''
+        Private method of the class.
+        '''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        # client_address of Unix socket is empty, so BaseHTTPRequestHandler's one does not work.
+        if self.server.verbose:
+            print('{0} {1}'.format(self.log_date_time_string(), format % args))
@@ -0,0 +1,160 @@
+#!python3
+import time
+import random
+import threading
+import email.utils
+
+# Rate (requests per second) of AdaptiveRateLimiter after the first 429, when the sending rate before it is not known.
+DEFAULT_THROTTLED_RATE = 10.0
+# Lowest and highest rate while throttled. At the highest rate, the limiter stops pacing again.
+DEFAULT_MIN_RATE = 0.5
+DEFAULT_MAX_RATE = 100.0
+
+class AdaptiveRateLimiter:
+    '''
+    Rate limiter shared by all threads and calls of an API client.
+
+    Calls are not paced until the server returns 429 (Too many requests), so that a client which is never throttled runs at full speed.
+    On the first 429, a token bucket starts at decrease_factor of the rate the calls were sent at during the last second.
+    While throttled, 429 cuts the rate by decrease_factor, and the rate grows by increase_factor per second of calls without 429.
+    When it reaches max_rate, pacing stops again.
+    On 429, the caller waits for jittered exponential backoff capped by backoff_cap, or server provided Retry-After if longer.
+    Retry-After also pauses all other callers of the same limiter until the time passes.
+    '''
+    def __init__(self, rate = None, min_rate = DEFAULT_MIN_RATE, max_rate = DEFAULT_MAX_RATE,
+                 increase_factor = 2.0, decrease_factor = 0.5, backoff_base = 0.5, backoff_cap = 30.0):
+        '''
+        rate is the initial rate in requests per second. None (default) starts without pacing.
+        '''
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_factor = increase_factor
+        self.decrease_factor = decrease_factor
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        self.lock = threading.Lock()
+        now = time.monotonic()
+        # Allow a burst up to one second worth of requests (at least one request).
+        self.tokens = max(1.0, rate) if rate is not None else 1.0
+        self.last_refill = now
+        self.last_increase = now
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        # Number of calls sent in the current and the previous one second window, to estimate the rate while not pacing.
+        self.window_start = now
+        self.window_count = 0
+        self.previous_window_count = 0
+
+    def __refill(self, now):
+        '''
+        Private method of the class. Add tokens for the elapsed time. Caller must hold the lock.
+        '''
+        self.tokens = min(max(1.0, self.rate), self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def __count(self, now):
+        '''
+        Private method of the class. Count a call sent while not pacing. Caller must hold the lock.
+        '''
+        if now - self.window_start >= 1.0:
+            self.previous_window_count = self.window_count if now - self.window_start < 2.0 else 0
+            self.window_start = now
+            self.window_count = 0
+        self.window_count += 1
+
+    def reserve(self):
+        '''
+        Take a token without blocking. Return 0 if a request is allowed to be sent now.
+        Otherwise, return the seconds to wait before calling this again.
+        This is used by asyncio code, which waits by asyncio.sleep instead of blocking the thread.
+        '''
+        with self.lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                return self.paused_until - now
+            if self.rate is None:
+                self.__count(now)
+                return 0
+            self.__refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        '''
+        Block until a request is allowed to be sent.
+        '''
+        while True:
+            wait = self.reserve()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def on_success(self):
+        '''
+        Notify a successful call. While pacing, grow the rate by increase_factor per second since the last growth,
+        and stop pacing when it reaches max_rate.
+        '''
+        with self.lock:
+            if self.rate is None:
+                return
+            now = time.monotonic()
+            self.rate = self.rate * self.increase_factor ** (now - self.last_increase)
+            self.last_increase = now
+            if self.rate >= self.max_rate:
+                self.rate = None
+
+    def on_throttled(self, attempt, retry_after = None):
+        '''
+        Notify 429 (Too many requests) response of attempt-th retry (starting from 1), with Retry-After value in seconds if any.
+        Multiplicatively decrease the rate, and return the seconds the caller should wait before the retry.
+        '''
+        with self.lock:
+            now = time.monotonic()
+            if self.rate is None:
+                # Start pacing below the rate the calls were sent at, counting the current window if it is longer.
+                elapsed = now - self.window_start
+                sent_rate = max(self.previous_window_count, self.window_count / elapsed if elapsed >= 1.0 else self.window_count)
+                rate = sent_rate * self.decrease_factor if sent_rate > 0 else DEFAULT_THROTTLED_RATE
+                self.rate = min(self.max_rate * self.decrease_factor, max(self.min_rate, rate))
+                self.tokens = 0
+                self.last_refill = now
+                self.last_increase = now
+                self.last_decrease = now
+            # Concurrent callers tend to receive 429 at once. Decrease only once per the current interval.
+            elif now - self.last_decrease >= 1 / self.rate:
+                self.__refill(now)
+                self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+                self.tokens = min(self.tokens, 0)
+                self.last_decrease = now
+                self.last_increase = now
+
+            # Full jitter exponential backoff, so that callers throttled at the same time do not retry in lockstep.
+            delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** (attempt - 1))))
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+                self.paused_until = max(self.paused_until, now + retry_after)
+            return delay
+
+
+def parse_retry_after(value):
+    '''
+    Parse Retry-After header value, either seconds or HTTP date, and return seconds to wait.
+    None if the value is missing or invalid.
+    '''
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_time = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_time is None:
+        return None
+    return max(0.0, retry_time.timestamp() - time.time())
@@ -0,0 +1,33 @@
+#!python3
+from http.server import BaseHTTPRequestHandler
+from socketserver import ThreadingTCPServer
+
+class RedirectTCPServer(ThreadingTCPServer):
+    '''
+    A helper class for Authorization Code Grant.
+    Custom class of ThreadingTCPServer with RedirectHandler class as handler.
+    last_get_path property is set whenever GET method is called by the handler.
+    '''
+    def __init__(self, port):
+        # Class property, representing the path of the most recent GET call.
+        self.last_get_path = None
+        # Create an instance at the port with RedirectHandler class.
+        super().__init__(('', port), RedirectHandler)
+        # Override the attribute of the server.
+        self.allow_reuse_address = True
+
+
+class RedirectHandler(BaseHTTPRequestHandler):
+    '''
+    A helper class for Authorization Code Grant.
+    '''
+    def do_GET(self):
+        '''
+        Handle a GET request. Set the path to the server's property.
+        '''
+        self.server.last_get_path = self.path
+        self.send_response(200)
+        self.send_header('Content-type', 'text/html')
+        self.end_headers()
+        self.wfile.write('<html><body><p>Authorization redirect was received. You may close this page.</p></body></html>'.encode('utf-8'))
+        self.wfile.flush()
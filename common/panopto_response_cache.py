@@ -0,0 +1,110 @@
+#!python3
+import time
+import json
+import sqlite3
+import fnmatch
+import threading
+from collections import OrderedDict
+
+# Default number of entries kept in memory, and seconds an entry is used without revalidation.
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_TTL_SECONDS = 60
+
+class CacheEntry:
+    '''
+    A cached response: parsed body, validators (ETag and Last-Modified) for conditional request, and the expiry time.
+    '''
+    __slots__ = ('data', 'etag', 'last_modified', 'expires_at')
+
+    def __init__(self, data, etag, last_modified, expires_at):
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    def is_fresh(self):
+        return time.time() < self.expires_at
+
+
+class ResponseCache:
+    '''
+    Cache of GET responses used by PanoptoApiClient, keyed by endpoint and query parameters.
+
+    Entries are kept in an in-process LRU of max_entries, and optionally in SQLite database file at path,
+    which survives the process and can be shared by multiple processes.
+    An entry is used as is for ttl seconds. After that, it is revalidated by conditional request if the server gave a validator.
+    Note that the responses depend on the server and the user. Do not share the database file among them.
+    '''
+    def __init__(self, max_entries = DEFAULT_MAX_ENTRIES, ttl = DEFAULT_TTL_SECONDS, path = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path, check_same_thread = False)
+            self.db.execute('CREATE TABLE IF NOT EXISTS responses '
+                            '(key TEXT PRIMARY KEY, data TEXT, etag TEXT, last_modified TEXT, expires_at REAL)')
+            self.db.commit()
+
+    def get(self, key):
+        '''
+        Return the CacheEntry of the key, which may be expired. None if it does not exist.
+        '''
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                return entry
+            if self.db is None:
+                return None
+            row = self.db.execute('SELECT data, etag, last_modified, expires_at FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            entry = CacheEntry(json.loads(row[0]), row[1], row[2], row[3])
+            self.__put_in_memory(key, entry)
+            return entry
+
+    def put(self, key, data, etag = None, last_modified = None):
+        '''
+        Store the parsed response with its validators, and return its CacheEntry.
+        '''
+        entry = CacheEntry(data, etag, last_modified, time.time() + self.ttl)
+        with self.lock:
+            self.__put_in_memory(key, entry)
+            if self.db is not None:
+                self.db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)',
+                                (key, json.dumps(data), etag, last_modified, entry.expires_at))
+                self.db.commit()
+        return entry
+
+    def touch(self, key, entry):
+        '''
+        Extend the expiry of the entry, after the server tells it is not modified.
+        '''
+        entry.expires_at = time.time() + self.ttl
+        with self.lock:
+            if self.db is not None:
+                self.db.execute('UPDATE responses SET expires_at = ? WHERE key = ?', (entry.expires_at, key))
+                self.db.commit()
+
+    def invalidate(self, pattern):
+        '''
+        Remove all entries whose key matches the pattern with shell-style wildcards, e.g. 'folders/*/children*'.
+        '''
+        with self.lock:
+            for key in [key for key in self.entries if fnmatch.fnmatchcase(key, pattern)]:
+                del self.entries[key]
+            if self.db is not None:
+                self.db.execute('DELETE FROM responses WHERE key GLOB ?', (pattern,))
+                self.db.commit()
+
+    def __put_in_memory(self, key, entry):
+        '''
+        Private method of the class. Caller must hold the lock.
+        '''
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last = False)
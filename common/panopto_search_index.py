@@ -0,0 +1,229 @@
+#!python3
+import json
+import shlex
+import sqlite3
+import threading
+
+# Default maximum number of entries returned by a search.
+DEFAULT_SEARCH_LIMIT = 100
+
+# Trigram index answers terms of this many characters or more. Shorter terms are examined on each candidate row.
+TRIGRAM_LENGTH = 3
+
+class SearchIndex:
+    '''
+    Local index of folders and sessions in SQLite database file, to search them without calling the API.
+
+    Name and description are kept in FTS5 tables with trigram tokenizer, so that substring and prefix searches of
+    3 characters or more are answered from the index. If SQLite of this Python does not support it, plain tables are used instead,
+    which give the same results by scanning.
+
+    The index is filled by upsert_folders / upsert_sessions, e.g. from PanoptoFolderCrawler and PanoptoSessionSync
+    (see folders-cli/index.py), and is only as fresh as its last refresh.
+    '''
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread = False)
+        self.db.execute('CREATE TABLE IF NOT EXISTS folders (id TEXT PRIMARY KEY, parent_id TEXT, data TEXT)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, folder_id TEXT, data TEXT)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS sessions_folder_id ON sessions (folder_id)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        # Whether the text table of each main table is FTS5, which may be a plain table in an existing file.
+        self.fts = {}
+        for table in ('folders', 'sessions'):
+            try:
+                self.db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS {0}_text USING fts5(name, description, tokenize = 'trigram')".format(table))
+            except sqlite3.OperationalError:
+                # FTS5 or trigram tokenizer (SQLite 3.34 or later) is not available.
+                self.db.execute('CREATE TABLE IF NOT EXISTS {0}_text (name TEXT, description TEXT)'.format(table))
+            sql = self.db.execute("SELECT sql FROM sqlite_master WHERE name = '{0}_text'".format(table)).fetchone()[0]
+            self.fts[table] = 'fts5' in sql.lower()
+        self.db.commit()
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    def upsert_folders(self, folders):
+        '''
+        Add or update folder objects returned by API.
+        '''
+        with self.lock:
+            for folder in folders:
+                parent_id = folder['ParentFolder']['Id'] if folder.get('ParentFolder') else None
+                self.__upsert('folders', folder, parent_id)
+            self.db.commit()
+
+    def upsert_sessions(self, sessions):
+        '''
+        Add or update session objects returned by API.
+        '''
+        with self.lock:
+            for session in sessions:
+                self.__upsert('sessions', session, session.get('Folder'))
+            self.db.commit()
+
+    def __upsert(self, table, entry, parent_id):
+        '''
+        Private method of the class. Caller must hold the lock and commit.
+        The text table shares the rowid with the main table.
+        '''
+        data = json.dumps(entry)
+        text = (entry.get('Name') or '', entry.get('Description') or '')
+        row = self.db.execute('SELECT rowid FROM {0} WHERE id = ?'.format(table), (entry['Id'],)).fetchone()
+        if row is not None:
+            self.db.execute('UPDATE {0} SET {1} = ?, data = ? WHERE rowid = ?'.format(table, self.__parent_column(table)), (parent_id, data, row[0]))
+            self.db.execute('DELETE FROM {0}_text WHERE rowid = ?'.format(table), (row[0],))
+            rowid = row[0]
+        else:
+            rowid = self.db.execute('INSERT INTO {0} (id, {1}, data) VALUES (?, ?, ?)'.format(table, self.__parent_column(table)),
+                                    (entry['Id'], parent_id, data)).lastrowid
+        self.db.execute('INSERT INTO {0}_text (rowid, name, description) VALUES (?, ?, ?)'.format(table), (rowid,) + text)
+
+    def __parent_column(self, table):
+        return 'parent_id' if table == 'folders' else 'folder_id'
+
+    def delete_folder(self, folder_id):
+        '''
+        Remove the folder and its sessions from the index.
+        '''
+        with self.lock:
+            self.__delete_where('sessions', 'folder_id = ?', (folder_id,))
+            self.__delete_where('folders', 'id = ?', (folder_id,))
+            self.db.commit()
+
+    def delete_session(self, session_id):
+        '''
+        Remove the session from the index.
+        '''
+        with self.lock:
+            self.__delete_where('sessions', 'id = ?', (session_id,))
+            self.db.commit()
+
+    def retain_folders(self, folder_ids):
+        '''
+        Remove the folders which are not in folder_ids, and their sessions, from the index.
+        This is called after a complete crawl, to drop the folders deleted on the server.
+        '''
+        with self.lock:
+            self.db.execute('CREATE TEMP TABLE IF NOT EXISTS retained (id TEXT PRIMARY KEY)')
+            self.db.execute('DELETE FROM retained')
+            self.db.executemany('INSERT OR IGNORE INTO retained VALUES (?)', ((folder_id,) for folder_id in folder_ids))
+            self.__delete_where('sessions', 'folder_id NOT IN (SELECT id FROM retained)', ())
+            self.__delete_where('folders', 'id NOT IN (SELECT id FROM retained)', ())
+            self.db.execute('DELETE FROM retained')
+            self.db.commit()
+
+    def replace_folder_sessions(self, folder_id, sessions):
+        '''
+        Replace all sessions of the folder with the given session objects.
+        '''
+        with self.lock:
+            self.__delete_where('sessions', 'folder_id = ?', (folder_id,))
+            for session in sessions:
+                self.__upsert('sessions', session, folder_id)
+            self.db.commit()
+
+    def __delete_where(self, table, condition, parameters):
+        '''
+        Private method of the class. Delete the rows of the main table and the text table. Caller must hold the lock and commit.
+        '''
+        self.db.execute('DELETE FROM {0}_text WHERE rowid IN (SELECT rowid FROM {0} WHERE {1})'.format(table, condition), parameters)
+        self.db.execute('DELETE FROM {0} WHERE {1}'.format(table, condition), parameters)
+
+    def get_meta(self, key):
+        with self.lock:
+            row = self.db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def set_meta(self, key, value):
+        with self.lock:
+            self.db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, value))
+            self.db.commit()
+
+    def search_folders(self, query, limit = DEFAULT_SEARCH_LIMIT):
+        '''
+        Return the list of folder objects matching the query, ordered by name. See search_sessions for the query syntax.
+        'folder:{id}' term filters the sub folders of the folder.
+        '''
+        return self.__search('folders', 'parent_id', query, limit)
+
+    def search_sessions(self, query, limit = DEFAULT_SEARCH_LIMIT):
+        '''
+        Return the list of session objects matching the query, ordered by name.
+
+        The query is space separated terms, and an entry must match all of them. Matching is case insensitive.
+        Terms of 3 characters or more are answered by the trigram index. Shorter terms only narrow down the entries matching
+        the other terms, so a query of short terms alone scans all entries. With folder:{id}, the entries of the folder are examined.
+          word: name or description contains the word.
+          word*: name or description starts with the word.
+          name:word, description:word (or name:word* etc.): only the given field is examined.
+          folder:{id}: the session is in the folder.
+        Use double quotes for a term with spaces, e.g. "final exam" or name:"final exam".
+        '''
+        return self.__search('sessions', 'folder_id', query, limit)
+
+    def __search(self, table, parent_column, query, limit):
+        '''
+        Private method of the class. Build SQL from the query terms and run it.
+        Each indexed term is a subquery of the matching rowids, by MATCH of the FTS5 table with a column filter.
+        The subqueries of the columns are combined by UNION, as OR of the columns in one query disables the index.
+        '''
+        conditions = []
+        parameters = []
+        terms = []
+        for term in self.__split_query(query):
+            field, separator, value = term.partition(':')
+            if not separator or field.lower() not in ('name', 'description', 'folder'):
+                field, value = None, term
+            else:
+                field = field.lower()
+            terms.append((field, value))
+        # The entries of a folder are found by the index of the parent column, and are few enough to examine one by one.
+        # The trigram index is not used then, as a common word would match most of the entries of all folders.
+        use_index = self.fts[table] and not any(field == 'folder' for field, value in terms)
+
+        for field, value in terms:
+            if field == 'folder':
+                conditions.append('m.{0} = ?'.format(parent_column))
+                parameters.append(value)
+                continue
+            prefix = value.endswith('*')
+            if prefix:
+                value = value[:-1]
+            if not value:
+                continue
+            columns = [field] if field else ['name', 'description']
+            if use_index and len(value) >= TRIGRAM_LENGTH:
+                # The phrase in double quotes may have any character, with double quote doubled. ^ matches the start of the column.
+                phrase = '{0}"{1}"'.format('^ ' if prefix else '', value.replace('"', '""'))
+                subqueries = ['SELECT rowid FROM {0}_text WHERE {0}_text MATCH ?'.format(table)] * len(columns)
+                conditions.append('m.rowid IN (' + ' UNION '.join(subqueries) + ')')
+                parameters.extend('{0} : {1}'.format(column, phrase) for column in columns)
+            else:
+                # Too short for the trigram index, in a folder, or no index. Examined on each row which matches the other conditions.
+                pattern = self.__escape_like(value) + '%' if prefix else '%' + self.__escape_like(value) + '%'
+                conditions.append('(' + ' OR '.join("t.{0} LIKE ? ESCAPE '\\'".format(column) for column in columns) + ')')
+                parameters.extend([pattern] * len(columns))
+
+        sql = 'SELECT m.data FROM {0} m JOIN {0}_text t ON t.rowid = m.rowid'.format(table)
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY t.name LIMIT ?'
+        parameters.append(limit)
+        with self.lock:
+            rows = self.db.execute(sql, parameters).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def __split_query(self, query):
+        '''
+        Private method of the class. Split the query by spaces, keeping the double quoted parts together.
+        '''
+        try:
+            return shlex.split(query)
+        except ValueError:
+            # Unbalanced quote.
+            return query.replace('"', ' ').split()
+
+    def __escape_like(self, value):
+        return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
@@ -0,0 +1,60 @@
+#!python3
+import threading
+from concurrent.futures import Future
+
+class SingleFlight:
+    '''
+    Coalescing of concurrent identical calls (single-flight), shared by all threads of an API client.
+    While a call of a key is in flight, other callers of the same key wait for it and receive its result or exception,
+    instead of making their own call. The key is forgotten as soon as the call completes, so a later call is made again.
+    The callers receive the same object. Do not modify it, same as the objects returned by ResponseCache.
+    '''
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, function):
+        '''
+        Return function() of the call in flight for the key, or of a new call if there is none.
+        '''
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None:
+                leader = False
+            else:
+                leader = True
+                call = self.calls[key] = Future()
+        if not leader:
+            return call.result()
+        try:
+            result = function()
+            call.set_result(result)
+            return result
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+
+
+class AsyncSingleFlight:
+    '''
+    asyncio version of SingleFlight, shared by all tasks of an event loop.
+    '''
+    def __init__(self):
+        self.calls = {}
+
+    async def do(self, key, function):
+        '''
+        Return await function() of the call in flight for the key, or of a new call if there is none.
+        The call runs as its own task, so that it completes for the other waiters even if the first caller is cancelled.
+        '''
+        # asyncio is imported here, so that the threaded clients do not load it.
+        import asyncio
+        task = self.calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(function())
+            self.calls[key] = task
+            task.add_done_callback(lambda done: self.calls.pop(key, None))
+        return await asyncio.shield(task)
@@ -0,0 +1,16 @@
+#!python3
+from panopto_json_file import JsonFile
+
+class TokenStore(JsonFile):
+    '''
+    File based store of OAuth2 token object, shared by multiple processes.
+
+    The token is written atomically by JsonFile, so that a reader never sees partially written content.
+    lock() is held while the token is refreshed, so that only one process refreshes the token at a time
+    and the others reuse the refreshed one.
+    '''
+    def save(self, token):
+        '''
+        Save the token object atomically.
+        '''
+        super().save(dict(token))
@@ -0,0 +1,104 @@
+#!python3
+import socket
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+# Names of the transports accepted by create_transport, e.g. for --transport option of the samples.
+TRANSPORT_NAMES = ['requests', 'http2']
+
+# Maximum number of connections of the HTTP/2 transport. Over HTTP/2, one connection carries all concurrent calls
+# and more are opened only when its streams run out. This bounds the connections of HTTP/1.1 fallback.
+DEFAULT_HTTP2_MAX_CONNECTIONS = 10
+
+# Maximum number of connections kept in the pool of each host. Worker threads above this number open connections
+# which are discarded after the call, so this should be at least the number of threads calling the API.
+DEFAULT_POOL_MAXSIZE = 32
+
+# Seconds to wait for the connection to be established, and for each read of the response.
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 60
+DEFAULT_TIMEOUT = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
+
+# TCP options of each connection: urllib3's default (TCP_NODELAY) and TCP keep-alive,
+# so that idle connections in the pool are not silently dropped by NAT or firewalls.
+DEFAULT_SOCKET_OPTIONS = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+
+class PanoptoHTTPAdapter(HTTPAdapter):
+    '''
+    HTTPAdapter with default timeout and TCP options. requests has no timeout by default,
+    so a call on a hung connection would block its worker forever.
+    '''
+    def __init__(self, timeout = DEFAULT_TIMEOUT, socket_options = None, **kwargs):
+        '''
+        timeout is (connect, read) in seconds, or a number for both, used when the call does not give its own.
+        socket_options is a list of (level, option, value) set to each new connection. DEFAULT_SOCKET_OPTIONS if it is omitted.
+        Other parameters (pool_connections, pool_maxsize, pool_block, max_retries) are passed to HTTPAdapter.
+        '''
+        self.timeout = timeout
+        self.socket_options = socket_options if socket_options is not None else DEFAULT_SOCKET_OPTIONS
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = self.socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+    def send(self, request, timeout = None, **kwargs):
+        if timeout is None:
+            timeout = self.timeout
+        return super().send(request, timeout = timeout, **kwargs)
+
+def mount_adapter(session, pool_maxsize = DEFAULT_POOL_MAXSIZE, timeout = DEFAULT_TIMEOUT, socket_options = None):
+    '''
+    Mount PanoptoHTTPAdapter of the given pool size, timeout and TCP options to requests' Session for both http and https.
+    Use this to configure a Session shared with other code, before passing it to PanoptoApiClient as transport.
+    '''
+    adapter = PanoptoHTTPAdapter(timeout = timeout, socket_options = socket_options, pool_maxsize = pool_maxsize)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def create_requests_transport(ssl_verify, pool_maxsize = DEFAULT_POOL_MAXSIZE, timeout = DEFAULT_TIMEOUT, socket_options = None):
+    '''
+    Return requests' Session, the default transport of PanoptoApiClient, with PanoptoHTTPAdapter mounted.
+    It is HTTP/1.1 only, so each concurrent call needs its own connection in the pool. Connections are kept alive in the pool.
+    ref. https://2.python-requests.org/en/master/user/advanced/#session-objects
+    '''
+    session = requests.Session()
+    session.verify = ssl_verify
+    return mount_adapter(session, pool_maxsize, timeout, socket_options)
+
+def create_http2_transport(ssl_verify, max_connections = DEFAULT_HTTP2_MAX_CONNECTIONS, timeout = DEFAULT_TIMEOUT):
+    '''
+    Return httpx.Client with HTTP/2 enabled, which multiplexes concurrent calls of all threads over one connection.
+    HTTP/2 is negotiated by TLS (ALPN). If the server does not support it, or the URL is http://, HTTP/1.1 is used instead.
+    timeout is (connect, read) in seconds, or a number for both.
+    This requires httpx and h2 modules (pip install httpx[http2]).
+    '''
+    try:
+        import httpx
+        import h2
+    except ImportError as e:
+        raise ImportError('HTTP/2 transport requires httpx and h2 modules (pip install httpx[http2]): {0}'.format(e))
+    limits = httpx.Limits(max_connections = max_connections, max_keepalive_connections = max_connections)
+    return httpx.Client(http2 = True, verify = ssl_verify, limits = limits, timeout = to_httpx_timeout(timeout))
+
+def to_httpx_timeout(timeout):
+    '''
+    Return httpx.Timeout of timeout given as (connect, read) in seconds, or a number for both.
+    '''
+    import httpx
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect = connect)
+    return httpx.Timeout(timeout)
+
+def create_transport(name, ssl_verify, timeout = DEFAULT_TIMEOUT):
+    '''
+    Return a new transport of the name in TRANSPORT_NAMES.
+    '''
+    if name == 'requests':
+        return create_requests_transport(ssl_verify, timeout = timeout)
+    if name == 'http2':
+        return create_http2_transport(ssl_verify, timeout = timeout)
+    raise ValueError('Unknown transport: {0}'.format(name))
@@ -0,0 +1,55 @@
+#!python3
+import sys
+import argparse
+import json
+import urllib3
+
+from panopto_folders import PanoptoFolders
+
+from os.path import dirname, join, abspath
+sys.path.insert(0, abspath(join(dirname(__file__), '..', 'common')))
+from panopto_oauth2 import PanoptoOAuth2
+from panopto_api_client import PanoptoApiClient
+from panopto_transport import create_transport, TRANSPORT_NAMES
+from panopto_metrics import MetricsCollector
+from panopto_bulk import run_bulk_csv, summarize_bulk_results, DEFAULT_BULK_MAX_WORKERS
+
+def parse_argument():
+    parser = argparse.ArgumentParser(description='Sample of bulk rename / delete with Folders API')
+    parser.add_argument('--server', dest='server', required=True, help='Server name as FQDN')
+    parser.add_argument('--client-id', dest='client_id', required=True, help='Client ID of OAuth2 client')
+    parser.add_argument('--client-secret', dest='client_secret', required=True, help='Client Secret of OAuth2 client')
+    parser.add_argument('--operation', dest='operation', required=True, choices=['rename', 'delete'], help='Operation to apply to the folders')
+    parser.add_argument('--input', dest='input', required=True, help='CSV file of folder ID per line, followed by new name for rename operation')
+    parser.add_argument('--report', dest='report', required=False, help='Output file of per-folder result as JSON lines. Standard output by default.')
+    parser.add_argument('--checkpoint', dest='checkpoint', required=False, help='Checkpoint file to resume an interrupted run. Folders succeeded in the previous run are skipped.')
+    parser.add_argument('--max-workers', dest='max_workers', type=int, default=DEFAULT_BULK_MAX_WORKERS, help='Number of folders processed in parallel')
+    parser.add_argument('--metrics', dest='metrics', required=False, help='Output file of API call metrics. JSON if the name ends with .json, Prometheus text format otherwise.')
+    parser.add_argument('--transport', dest='transport', choices=TRANSPORT_NAMES, default='requests', help='HTTP transport. http2 multiplexes concurrent calls over one connection, and requires httpx[http2].')
+    parser.add_argument('--skip-verify', dest='skip_verify', action='store_true', required=False, help='Skip SSL certificate verification. (Never apply to the production code)')
+    return parser.parse_args()
+
+def main():
+    args = parse_argument()
+
+    if args.skip_verify:
+        # This line is needed to suppress annoying warning message.
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+    # Load OAuth2 logic
+    oauth2 = PanoptoOAuth2(args.server, args.client_id, args.client_secret, not args.skip_verify)
+
+    # Load Folders API logic. Timing of each API call is recorded by metrics.
+    metrics = MetricsCollector()
+    transport = create_transport(args.transport, not args.skip_verify)
+    client = PanoptoApiClient(args.server, not args.skip_verify, oauth2, instruments = [metrics], transport = transport)
+    folders = PanoptoFolders(args.server, not args.skip_verify, oauth2, client = client)
+
+    completed = run_bulk_csv(args.input, args.operation, folders.bulk_update_folder_names, folders.bulk_delete_folders, args.max_workers, args.checkpoint, args.report)
+
+    print(json.dumps(summarize_bulk_results(completed)), file = sys.stderr)
+    if args.metrics:
+        metrics.write(args.metrics)
+
+if __name__ == '__main__':
+    main()
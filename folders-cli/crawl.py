@@ -0,0 +1,65 @@
+#!python3
+import sys
+import argparse
+import json
+import urllib3
+
+from panopto_folders import PanoptoFolders, GUID_TOPLEVEL
+from panopto_folder_crawler import PanoptoFolderCrawler, DEFAULT_CRAWLER_MAX_WORKERS
+
+from os.path import dirname, join, abspath
+sys.path.insert(0, abspath(join(dirname(__file__), '..', 'common')))
+from panopto_oauth2 import PanoptoOAuth2
+from panopto_api_client import PanoptoApiClient
+from panopto_transport import create_transport, TRANSPORT_NAMES
+from panopto_metrics import MetricsCollector
+
+def parse_argument():
+    parser = argparse.ArgumentParser(description='Sample of crawling the folder tree with Folders API')
+    parser.add_argument('--server', dest='server', required=True, help='Server name as FQDN')
+    parser.add_argument('--client-id', dest='client_id', required=True, help='Client ID of OAuth2 client')
+    parser.add_argument('--client-secret', dest='client_secret', required=True, help='Client Secret of OAuth2 client')
+    parser.add_argument('--folder-id', dest='folder_id', default=GUID_TOPLEVEL, help='The ID of the folder to start with. Top level folder by default.')
+    parser.add_argument('--max-depth', dest='max_depth', type=int, default=None, help='Maximum depth to crawl. Unlimited by default.')
+    parser.add_argument('--max-workers', dest='max_workers', type=int, default=DEFAULT_CRAWLER_MAX_WORKERS, help='Number of folders expanded in parallel.')
+    parser.add_argument('--include-sessions', dest='include_sessions', action='store_true', help='List sessions of each folder too.')
+    parser.add_argument('--output', dest='output', required=False, help='Output file name. Standard output by default.')
+    parser.add_argument('--metrics', dest='metrics', required=False, help='Output file of API call metrics. JSON if the name ends with .json, Prometheus text format otherwise.')
+    parser.add_argument('--transport', dest='transport', choices=TRANSPORT_NAMES, default='requests', help='HTTP transport. http2 multiplexes concurrent calls over one connection, and requires httpx[http2].')
+    parser.add_argument('--skip-verify', dest='skip_verify', action='store_true', required=False, help='Skip SSL certificate verification. (Never apply to the production code)')
+    return parser.parse_args()
+
+def main():
+    args = parse_argument()
+
+    if args.skip_verify:
+        # This line is needed to suppress annoying warning message.
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+    # Load OAuth2 logic
+    oauth2 = PanoptoOAuth2(args.server, args.client_id, args.client_secret, not args.skip_verify)
+
+    # Load Folders API logic. Timing of each API call is recorded by metrics.
+    metrics = MetricsCollector()
+    transport = create_transport(args.transport, not args.skip_verify)
+    client = PanoptoApiClient(args.server, not args.skip_verify, oauth2, instruments = [metrics], transport = transport)
+    folders = PanoptoFolders(args.server, not args.skip_verify, oauth2, client = client)
+
+    crawler = PanoptoFolderCrawler(folders, max_workers = args.max_workers, max_depth = args.max_depth, include_sessions = args.include_sessions)
+
+    # Write each folder's record as one line of JSON (NDJSON) as soon as it is crawled.
+    output = open(args.output, 'w', encoding = 'utf-8') if args.output else sys.stdout
+    try:
+        count = 0
+        for record in crawler.crawl(args.folder_id):
+            output.write(json.dumps(record) + '\n')
+            count += 1
+        print('Crawled {0} folders.'.format(count), file = sys.stderr)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if args.metrics:
+            metrics.write(args.metrics)
+
+if __name__ == '__main__':
+    main()
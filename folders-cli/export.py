@@ -0,0 +1,51 @@
+#!python3
+import sys
+import argparse
+import urllib3
+
+from panopto_folders import PanoptoFolders, GUID_TOPLEVEL
+from panopto_folder_crawler import DEFAULT_CRAWLER_MAX_WORKERS
+from panopto_export import PanoptoExporter, EXPORT_FORMATS, DEFAULT_ROWS_PER_PART
+
+from os.path import dirname, join, abspath
+sys.path.insert(0, abspath(join(dirname(__file__), '..', 'common')))
+from panopto_oauth2 import PanoptoOAuth2
+
+def parse_argument():
+    parser = argparse.ArgumentParser(description='Sample of exporting the folder tree and its sessions with Folders API')
+    parser.add_argument('--server', dest='server', required=True, help='Server name as FQDN')
+    parser.add_argument('--client-id', dest='client_id', required=True, help='Client ID of OAuth2 client')
+    parser.add_argument('--client-secret', dest='client_secret', required=True, help='Client Secret of OAuth2 client')
+    parser.add_argument('--output', dest='output', required=True, help='Output directory of the part files')
+    parser.add_argument('--format', dest='format', choices=EXPORT_FORMATS, default='ndjson', help='gzip compressed JSON lines, or Parquet which requires pyarrow')
+    parser.add_argument('--checkpoint', dest='checkpoint', required=False, help='Checkpoint file to resume an interrupted export. Folders exported by the previous run are skipped.')
+    parser.add_argument('--folder-id', dest='folder_id', default=GUID_TOPLEVEL, help='The ID of the folder to export with its sub folders. Top level folder by default.')
+    parser.add_argument('--max-workers', dest='max_workers', type=int, default=DEFAULT_CRAWLER_MAX_WORKERS, help='Number of folders processed in parallel.')
+    parser.add_argument('--rows-per-part', dest='rows_per_part', type=int, default=DEFAULT_ROWS_PER_PART, help='Number of rows of each part file.')
+    parser.add_argument('--skip-verify', dest='skip_verify', action='store_true', required=False, help='Skip SSL certificate verification. (Never apply to the production code)')
+    return parser.parse_args()
+
+def main():
+    args = parse_argument()
+
+    if args.skip_verify:
+        # This line is needed to suppress annoying warning message.
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+    # Load OAuth2 logic
+    oauth2 = PanoptoOAuth2(args.server, args.client_id, args.client_secret, not args.skip_verify)
+
+    # Load Folders API logic
+    folders = PanoptoFolders(args.server, not args.skip_verify, oauth2, max_workers = args.max_workers)
+
+    exporter = PanoptoExporter(folders, args.output, args.format, args.checkpoint, args.max_workers, args.rows_per_part)
+    summary = exporter.export(args.folder_id)
+    for folder_id, error in summary['Errors']:
+        print('Failed to export folder {0}: {1}'.format(folder_id, error), file = sys.stderr)
+    print('Exported {0} folders and {1} sessions. {2} part files in {3}.'.format(
+        summary['Folders'], summary['Sessions'], len(summary['Parts']), args.output), file = sys.stderr)
+    if summary['Errors']:
+        exit(-1)
+
+if __name__ == '__main__':
+    main()
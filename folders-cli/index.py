@@ -0,0 +1,79 @@
+#!python3
+import sys
+import time
+import argparse
+import urllib3
+
+from panopto_folders import PanoptoFolders, GUID_TOPLEVEL
+from panopto_folder_crawler import PanoptoFolderCrawler, DEFAULT_CRAWLER_MAX_WORKERS
+from panopto_session_sync import PanoptoSessionSync
+
+from os.path import dirname, join, abspath
+sys.path.insert(0, abspath(join(dirname(__file__), '..', 'common')))
+from panopto_oauth2 import PanoptoOAuth2
+from panopto_search_index import SearchIndex
+
+def parse_argument():
+    parser = argparse.ArgumentParser(description='Sample of building the local search index of folders and sessions')
+    parser.add_argument('--server', dest='server', required=True, help='Server name as FQDN')
+    parser.add_argument('--client-id', dest='client_id', required=True, help='Client ID of OAuth2 client')
+    parser.add_argument('--client-secret', dest='client_secret', required=True, help='Client Secret of OAuth2 client')
+    parser.add_argument('--index', dest='index', required=True, help='SQLite file of the index. Created if it does not exist.')
+    parser.add_argument('--folder-id', dest='folder_id', default=GUID_TOPLEVEL, help='The ID of the folder to index with its sub folders. Top level folder by default.')
+    parser.add_argument('--full', dest='full', action='store_true', help='Replace all sessions in the index, instead of adding the new ones since the previous run.')
+    parser.add_argument('--max-workers', dest='max_workers', type=int, default=DEFAULT_CRAWLER_MAX_WORKERS, help='Number of folders processed in parallel.')
+    parser.add_argument('--skip-verify', dest='skip_verify', action='store_true', required=False, help='Skip SSL certificate verification. (Never apply to the production code)')
+    return parser.parse_args()
+
+def main():
+    args = parse_argument()
+
+    if args.skip_verify:
+        # This line is needed to suppress annoying warning message.
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+    # Load OAuth2 logic
+    oauth2 = PanoptoOAuth2(args.server, args.client_id, args.client_secret, not args.skip_verify)
+
+    # Load Folders API logic
+    folders = PanoptoFolders(args.server, not args.skip_verify, oauth2)
+
+    index = SearchIndex(args.index)
+
+    # Folders are crawled every time. Full refresh lists the sessions of each folder during the crawl as well.
+    crawler = PanoptoFolderCrawler(folders, max_workers = args.max_workers, include_sessions = args.full)
+    folder_ids = []
+    failed = False
+    for record in crawler.crawl(args.folder_id):
+        if record['Error'] is not None:
+            print('Failed to expand folder {0}: {1}'.format(record['Id'], record['Error']), file = sys.stderr)
+            failed = True
+        if record['Folder'] is None:
+            continue
+        folder_ids.append(record['Id'])
+        index.upsert_folders([record['Folder']])
+        if record['Sessions'] is not None:
+            index.replace_folder_sessions(record['Id'], record['Sessions'])
+    print('Indexed {0} folders.'.format(len(folder_ids)), file = sys.stderr)
+
+    # Drop deleted folders, only if the whole tree is crawled successfully.
+    if args.folder_id == GUID_TOPLEVEL and not failed:
+        index.retain_folders(folder_ids)
+
+    # Otherwise, add sessions created since the previous run. The watermarks are kept next to the index file.
+    if not args.full:
+        sync = PanoptoSessionSync(folders, args.index + '.sync')
+        session_count = 0
+        for folder_id, sessions, error in sync.sync(folder_ids, max_workers = args.max_workers):
+            if error is not None:
+                print('Failed to sync folder {0}: {1}'.format(folder_id, error), file = sys.stderr)
+                continue
+            index.upsert_sessions(sessions)
+            session_count += len(sessions)
+        print('Indexed {0} new or changed sessions.'.format(session_count), file = sys.stderr)
+
+    index.set_meta('refreshed_at', time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()))
+    index.close()
+
+if __name__ == '__main__':
+    main()
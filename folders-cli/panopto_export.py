@@ -0,0 +1,334 @@
+#!python3
+import os
+import sys
+import gzip
+import pickle
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from panopto_folders import GUID_TOPLEVEL
+from panopto_folder_crawler import PanoptoFolderCrawler, DEFAULT_CRAWLER_MAX_WORKERS
+
+from os.path import dirname, join, abspath
+sys.path.insert(0, abspath(join(dirname(__file__), '..', 'common')))
+from panopto_json_file import JsonFile
+import panopto_json
+
+# Output formats. parquet requires pyarrow module.
+EXPORT_FORMATS = ['ndjson', 'parquet']
+
+# Number of rows buffered before they are written as one row group of Parquet.
+DEFAULT_EXPORT_BATCH_SIZE = 10000
+
+# Sessions of a folder are spooled in chunks of this many rows by the worker thread, until the folder is written to the part file.
+SPOOL_CHUNK_ROWS = 1000
+
+# Bytes of the spool of a folder kept in memory. Larger spools are moved to a temporary file in the output directory.
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+# A part file is closed and recorded to the checkpoint when it has this many rows, at the end of a folder.
+DEFAULT_ROWS_PER_PART = 500000
+
+# Columns of the output: (name, type, path of the field in the API object).
+FOLDER_COLUMNS = [
+    ('Id', 'string', ('Id',)),
+    ('Name', 'string', ('Name',)),
+    ('Description', 'string', ('Description',)),
+    ('ParentFolderId', 'string', ('ParentFolder', 'Id')),
+    ('ParentFolderName', 'string', ('ParentFolder', 'Name')),
+    ('FolderUrl', 'string', ('Urls', 'FolderUrl')),
+    ('EmbedUrl', 'string', ('Urls', 'EmbedUrl')),
+    ('ShareSettingsUrl', 'string', ('Urls', 'ShareSettingsUrl')),
+]
+
+SESSION_COLUMNS = [
+    ('Id', 'string', ('Id',)),
+    ('Name', 'string', ('Name',)),
+    ('Description', 'string', ('Description',)),
+    ('FolderId', 'string', ('Folder',)),
+    ('FolderName', 'string', ('FolderDetails', 'Name')),
+    ('StartTime', 'string', ('StartTime',)),
+    ('CreatedDate', 'string', ('CreatedDate',)),
+    ('Duration', 'double', ('Duration',)),
+    ('CreatedById', 'string', ('CreatedBy', 'Id')),
+    ('CreatedByUsername', 'string', ('CreatedBy', 'Username')),
+    ('ViewerUrl', 'string', ('Urls', 'ViewerUrl')),
+    ('EmbedUrl', 'string', ('Urls', 'EmbedUrl')),
+    ('ShareSettingsUrl', 'string', ('Urls', 'ShareSettingsUrl')),
+    ('DownloadUrl', 'string', ('Urls', 'DownloadUrl')),
+    ('CaptionDownloadUrl', 'string', ('Urls', 'CaptionDownloadUrl')),
+    ('EditorUrl', 'string', ('Urls', 'EditorUrl')),
+]
+
+def flatten(entry, columns):
+    '''
+    Return the tuple of the column values of the API object. A missing field is None.
+    '''
+    row = []
+    for name, column_type, path in columns:
+        value = entry
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        row.append(value)
+    return tuple(row)
+
+
+class NdjsonPartWriter:
+    '''
+    Writer of a part file of gzip compressed JSON lines. Each row is written as an object of the column names.
+    Rows are encoded and written batch_size at a time as one string, to reduce the calls of the compressor.
+    The file is written with .tmp suffix, and renamed to the final name by commit.
+    '''
+    def __init__(self, path, columns, batch_size = DEFAULT_EXPORT_BATCH_SIZE):
+        self.path = path
+        self.names = [name for name, column_type, field_path in columns]
+        self.batch_size = batch_size
+        self.row_count = 0
+        self.file = gzip.open(path + '.tmp', 'wt', encoding = 'utf-8')
+
+    def write(self, rows):
+        for start in range(0, len(rows), self.batch_size):
+            self.file.write(''.join(panopto_json.dumps(dict(zip(self.names, row))) + '\n' for row in rows[start:start + self.batch_size]))
+        self.row_count += len(rows)
+
+    def commit(self):
+        self.file.close()
+        os.replace(self.path + '.tmp', self.path)
+
+    def abort(self):
+        self.file.close()
+        os.remove(self.path + '.tmp')
+
+
+class ParquetPartWriter:
+    '''
+    Writer of a part file of Parquet. Rows are buffered and written as a row group of batch_size rows, so that memory is bounded.
+    The file is written with .tmp suffix, and renamed to the final name by commit. This requires pyarrow module (pip install pyarrow).
+    '''
+    def __init__(self, path, columns, batch_size = DEFAULT_EXPORT_BATCH_SIZE):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError('Parquet export requires pyarrow module (pip install pyarrow): {0}'.format(e))
+        self.pyarrow = pyarrow
+        self.path = path
+        self.batch_size = batch_size
+        self.schema = pyarrow.schema([(name, getattr(pyarrow, column_type)()) for name, column_type, field_path in columns])
+        self.row_count = 0
+        self.buffer = []
+        self.writer = pyarrow.parquet.ParquetWriter(path + '.tmp', self.schema, compression = 'zstd')
+
+    def write(self, rows):
+        self.buffer.extend(rows)
+        self.row_count += len(rows)
+        while len(self.buffer) >= self.batch_size:
+            self.__flush(self.buffer[:self.batch_size])
+            del self.buffer[:self.batch_size]
+
+    def __flush(self, rows):
+        '''
+        Private method of the class. Write the rows as one row group.
+        '''
+        columns = [self.pyarrow.array([row[index] for row in rows], type = field.type) for index, field in enumerate(self.schema)]
+        self.writer.write_table(self.pyarrow.Table.from_arrays(columns, schema = self.schema))
+
+    def commit(self):
+        if self.buffer:
+            self.__flush(self.buffer)
+            self.buffer = []
+        self.writer.close()
+        os.replace(self.path + '.tmp', self.path)
+
+    def abort(self):
+        self.writer.close()
+        os.remove(self.path + '.tmp')
+
+
+class PanoptoExporter:
+    '''
+    Export of the folder tree and all of its sessions to part files in a directory, on top of PanoptoFolders.
+
+    Folders are crawled by PanoptoFolderCrawler and written to folders-NNNNN part files.
+    Then the sessions of the folders are listed in parallel, and written to sessions-NNNNN part files as each folder completes.
+    Only max_workers folders are listed at a time. API objects are flattened to rows as each page arrives, and spooled
+    (to a temporary file if it is large) until the folder completes, so that memory grows neither with the size of the tenant
+    nor with the largest folder. The rows of a folder are written to one part file only when all of them are listed.
+
+    If checkpoint_file is given, each part file is recorded to it when the part is closed, together with the folders whose
+    sessions are all in the part. When the same checkpoint file is given again, those folders are skipped and the part numbering
+    continues, so that an interrupted export resumes. The part being written when it was interrupted is discarded.
+    '''
+    def __init__(self, folders, output_dir, format = 'ndjson', checkpoint_file = None, max_workers = DEFAULT_CRAWLER_MAX_WORKERS,
+                 rows_per_part = DEFAULT_ROWS_PER_PART, batch_size = DEFAULT_EXPORT_BATCH_SIZE):
+        '''
+        Constructor of exporter instance.
+        folders is PanoptoFolders instance. format is one of EXPORT_FORMATS.
+        '''
+        if format not in EXPORT_FORMATS:
+            raise ValueError('Unknown format: {0}'.format(format))
+        self.folders = folders
+        self.output_dir = output_dir
+        self.format = format
+        self.store = JsonFile(checkpoint_file) if checkpoint_file is not None else None
+        self.max_workers = max_workers
+        self.rows_per_part = rows_per_part
+        self.batch_size = batch_size
+
+    def export(self, folder_id = GUID_TOPLEVEL):
+        '''
+        Export the folder and all of its sub folders, and their sessions.
+        Return the summary dictionary: the number of 'Folders' and 'Sessions' written by this run, the list of 'Parts' file names,
+        and 'Errors' as the list of (folder ID, error message) of the folders which failed. Failed folders are retried by the next run.
+        '''
+        os.makedirs(self.output_dir, exist_ok = True)
+        for name in os.listdir(self.output_dir):
+            if name.endswith('.tmp'):
+                # Part file being written when the previous run was interrupted.
+                os.remove(os.path.join(self.output_dir, name))
+        state = self.__load_state()
+        summary = {'Folders': 0, 'Sessions': 0, 'Parts': state['Parts'], 'Errors': []}
+
+        # The folder tree is crawled every time, as the list of folders to export sessions from.
+        folder_ids = []
+        writer = None if state['FoldersDone'] else self.__open_part('folders', state, FOLDER_COLUMNS)
+        for record in PanoptoFolderCrawler(self.folders, max_workers = self.max_workers).crawl(folder_id):
+            if record['Error'] is not None:
+                summary['Errors'].append((record['Id'], record['Error']))
+            if record['Folder'] is None:
+                continue
+            folder_ids.append(record['Id'])
+            if writer is not None:
+                writer.write([flatten(record['Folder'], FOLDER_COLUMNS)])
+                summary['Folders'] += 1
+                if writer.row_count >= self.rows_per_part:
+                    self.__commit_part(writer, state, [])
+                    writer = self.__open_part('folders', state, FOLDER_COLUMNS)
+        if writer is not None:
+            if summary['Errors']:
+                # Some sub trees are missing. Export the folders again by the next run.
+                writer.abort()
+            else:
+                state['FoldersDone'] = True
+                self.__commit_part(writer, state, [])
+
+        done = set(state['Folders'])
+        remaining = (folder_id for folder_id in folder_ids if folder_id not in done)
+        writer = self.__open_part('sessions', state, SESSION_COLUMNS)
+        completed = []
+        try:
+            for folder_id, spool, error in self.__list_sessions(remaining):
+                if error is not None:
+                    summary['Errors'].append((folder_id, error))
+                    continue
+                with spool:
+                    for rows in self.__read_spool(spool):
+                        writer.write(rows)
+                        summary['Sessions'] += len(rows)
+                completed.append(folder_id)
+                if writer.row_count >= self.rows_per_part:
+                    self.__commit_part(writer, state, completed)
+                    writer = self.__open_part('sessions', state, SESSION_COLUMNS)
+                    completed = []
+        except BaseException:
+            writer.abort()
+            raise
+        if writer.row_count > 0:
+            self.__commit_part(writer, state, completed)
+        else:
+            writer.abort()
+            self.__save_state(state, completed)
+        return summary
+
+    def __list_sessions(self, folder_ids):
+        '''
+        Private method of the class. Yield (folder ID, spool of rows, error message or None) of the folders in completion order,
+        with up to max_workers folders listed at a time.
+        '''
+        with ThreadPoolExecutor(max_workers = self.max_workers) as executor:
+            pending = {}
+            for folder_id in folder_ids:
+                if len(pending) >= self.max_workers:
+                    done, not_done = wait(pending, return_when = FIRST_COMPLETED)
+                    for future in done:
+                        yield self.__result(pending.pop(future), future)
+                pending[executor.submit(self.__folder_rows, folder_id)] = folder_id
+            while pending:
+                done, not_done = wait(pending, return_when = FIRST_COMPLETED)
+                for future in done:
+                    yield self.__result(pending.pop(future), future)
+
+    def __folder_rows(self, folder_id):
+        '''
+        Private method of the class, called by worker threads.
+        Return the spool file of the rows of all sessions of the folder, written in chunks of SPOOL_CHUNK_ROWS as the pages arrive.
+        '''
+        spool = tempfile.SpooledTemporaryFile(max_size = SPOOL_MAX_MEMORY, suffix = '.tmp', dir = self.output_dir)
+        try:
+            rows = []
+            for session in self.folders.iter_sessions(folder_id):
+                rows.append(flatten(session, SESSION_COLUMNS))
+                if len(rows) >= SPOOL_CHUNK_ROWS:
+                    pickle.dump(rows, spool, pickle.HIGHEST_PROTOCOL)
+                    rows = []
+            if rows:
+                pickle.dump(rows, spool, pickle.HIGHEST_PROTOCOL)
+            spool.seek(0)
+            return spool
+        except BaseException:
+            spool.close()
+            raise
+
+    def __read_spool(self, spool):
+        '''
+        Private method of the class. Yield the chunks of rows written by __folder_rows.
+        '''
+        while True:
+            try:
+                yield pickle.load(spool)
+            except EOFError:
+                return
+
+    def __result(self, folder_id, future):
+        '''
+        Private method of the class.
+        '''
+        try:
+            return folder_id, future.result(), None
+        except Exception as e:
+            return folder_id, None, str(e)
+
+    def __open_part(self, kind, state, columns):
+        '''
+        Private method of the class. Return the writer of the next part file of the kind ('folders' or 'sessions').
+        '''
+        number = sum(1 for name in state['Parts'] if name.startswith(kind + '-'))
+        extension = '.ndjson.gz' if self.format == 'ndjson' else '.parquet'
+        path = os.path.join(self.output_dir, '{0}-{1:05d}{2}'.format(kind, number, extension))
+        writer_class = NdjsonPartWriter if self.format == 'ndjson' else ParquetPartWriter
+        return writer_class(path, columns, self.batch_size)
+
+    def __commit_part(self, writer, state, folder_ids):
+        '''
+        Private method of the class. Close the part file, and record it with the folders completed in it.
+        '''
+        writer.commit()
+        state['Parts'].append(os.path.basename(writer.path))
+        self.__save_state(state, folder_ids)
+
+    def __save_state(self, state, folder_ids):
+        state['Folders'].extend(folder_ids)
+        if self.store is not None:
+            self.store.save(state)
+
+    def __load_state(self):
+        '''
+        Private method of the class. Return the checkpoint, or a new one. A checkpoint of another format is not used.
+        Folder part files are written again from the first one unless all of them were completed.
+        '''
+        state = self.store.load() if self.store is not None else None
+        if state is None or state.get('Format') != self.format:
+            state = {'Format': self.format, 'FoldersDone': False, 'Folders': [], 'Parts': []}
+        if not state['FoldersDone']:
+            state['Parts'] = [name for name in state['Parts'] if not name.startswith('folders-')]
+        return state
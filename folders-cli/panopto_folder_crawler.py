@@ -0,0 +1,84 @@
+#!python3
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from panopto_folders import GUID_TOPLEVEL
+
+# Number of folders expanded in parallel.
+DEFAULT_CRAWLER_MAX_WORKERS = 8
+
+class PanoptoFolderCrawler:
+    '''
+    Crawler of the folder tree, on top of PanoptoFolders.
+    It expands the tree breadth-first from a given folder, and processes many folders in parallel by a bounded thread pool.
+    '''
+    def __init__(self, folders, max_workers = DEFAULT_CRAWLER_MAX_WORKERS, max_depth = None, include_sessions = False):
+        '''
+        Constructor of folder crawler instance.
+        folders is PanoptoFolders instance.
+        max_workers is the number of folders expanded in parallel.
+        max_depth limits the depth of the crawl. The start folder is depth 0 and its sub folders are depth 1. None is unlimited.
+        include_sessions is to list the sessions of each folder (except top level folder) by get_sessions.
+        '''
+        self.folders = folders
+        self.max_workers = max_workers
+        self.max_depth = max_depth
+        self.include_sessions = include_sessions
+
+    def crawl(self, folder_id = GUID_TOPLEVEL):
+        '''
+        Crawl the folder tree from the given folder, and yield a record of each folder as it is expanded.
+        The records come level by level, but the order within the same level is not defined.
+
+        Each record is a dictionary of:
+          'Folder': Folder object returned by API. None for top level folder.
+          'Id': Folder ID.
+          'ParentFolderId': Parent folder ID. None for the start folder.
+          'Depth': Depth from the start folder.
+          'ChildFolderIds': List of sub folder IDs. None if the folder is not expanded because of max_depth.
+          'Sessions': List of sessions if include_sessions is set, otherwise None.
+          'Error': Error message if expanding this folder failed, otherwise None.
+        A folder that is found more than once (e.g. a cycle) is expanded only at the first time.
+        '''
+        if folder_id == GUID_TOPLEVEL:
+            start_folder = None
+        else:
+            start_folder = self.folders.get_folder(folder_id)
+
+        seen = {folder_id}
+        with ThreadPoolExecutor(max_workers = self.max_workers) as executor:
+            pending = {executor.submit(self.__expand, start_folder, folder_id, None, 0)}
+            while pending:
+                done, pending = wait(pending, return_when = FIRST_COMPLETED)
+                for future in done:
+                    record, children = future.result()
+                    for child in children:
+                        if child['Id'] in seen:
+                            continue
+                        seen.add(child['Id'])
+                        pending.add(executor.submit(self.__expand, child, child['Id'], record['Id'], record['Depth'] + 1))
+                    yield record
+
+    def __expand(self, folder, folder_id, parent_folder_id, depth):
+        '''
+        Private method of the class, called by worker threads.
+        List sub folders (and sessions) of the folder, and return its record and the list of sub folders.
+        '''
+        record = {
+            'Folder': folder,
+            'Id': folder_id,
+            'ParentFolderId': parent_folder_id,
+            'Depth': depth,
+            'ChildFolderIds': None,
+            'Sessions': None,
+            'Error': None,
+        }
+        children = []
+        try:
+            if self.max_depth is None or depth < self.max_depth:
+                children = self.folders.get_children(folder_id)
+                record['ChildFolderIds'] = [child['Id'] for child in children]
+            if self.include_sessions and folder_id != GUID_TOPLEVEL:
+                record['Sessions'] = self.folders.get_sessions(folder_id)
+        except Exception as e:
+            record['Error'] = str(e)
+        return record, children
@@ -1,95 +1,53 @@
 #!python3
-import requests
-import urllib.parse
-import time
+import sys
+
+from os.path import dirname, join, abspath
+sys.path.insert(0, abspath(join(dirname(__file__), '..', 'common')))
+from panopto_api_client import PanoptoApiClient, DEFAULT_MAX_WORKERS
+from panopto_transport import DEFAULT_TIMEOUT
+from panopto_bulk import BulkOperationRunner, DEFAULT_BULK_MAX_WORKERS
+
+# Top level folder is represented by zero GUID.
+# However, it is not the real folder and some API beahves differently than actual folder.
+GUID_TOPLEVEL = '00000000-0000-0000-0000-000000000000'
 
 class PanoptoFolders:
-    def __init__(self, server, ssl_verify, oauth2):
+    def __init__(self, server, ssl_verify, oauth2, max_workers = DEFAULT_MAX_WORKERS, client = None, cache = None,
+                 transport = None, pool_maxsize = None, timeout = DEFAULT_TIMEOUT, log = print):
         '''
         Constructor of folders API handler instance.
         This goes through authorization step of the target server.
+        max_workers is the number of pages fetched in parallel by the paginated methods.
+        client is an existing PanoptoApiClient to share its connection pool and access token with other handlers.
+        If it is omitted, a new PanoptoApiClient is created, with cache (ResponseCache) if it is given,
+        and transport, pool_maxsize, timeout and log (see PanoptoApiClient), e.g. to share requests' Session with other code.
         '''
         self.server = server
         self.ssl_verify = ssl_verify
         self.oauth2 = oauth2
+        if client is None:
+            client = PanoptoApiClient(server, ssl_verify, oauth2, max_workers = max_workers, cache = cache,
+                                      transport = transport, pool_maxsize = pool_maxsize, timeout = timeout, log = log)
+        self.client = client
 
-        # Use requests module's Session object in this example.
-        # ref. https://2.python-requests.org/en/master/user/advanced/#session-objects
-        self.requests_session = requests.Session()
-        self.requests_session.verify = self.ssl_verify
-
-        self.__setup_or_refresh_access_token()
-
-    def __setup_or_refresh_access_token(self):
+    def get_children(self, folder_id, stats = None):
         '''
-        This method invokes OAuth2 Authorization Code Grant authorization flow.
-        It goes through browser UI for the first time.
-        It refreshes the access token after that and no user interfaction is requetsed.
-        This is called at the initialization of the class, as well as when 401 (Unaurhotized) is returend.
+        Call GET /api/v1/folders/{id}/children API and return the list of entries.
+        This code has hard coded sort order of Name / Asc.
         '''
-        access_token = self.oauth2.get_access_token_authorization_code_grant()
-        self.requests_session.headers.update({'Authorization': 'Bearer ' + access_token})
+        return self.client.get_all_pages('folders/{0}/children'.format(folder_id), {'sortField': 'Name', 'sortOrder': 'Asc'}, stats = stats)
 
-    def __inspect_response_is_retry_needed(self, response):
+    def iter_children(self, folder_id):
         '''
-        Inspect the response of a requets' call.
-        True indicates the retry needed, False indicates success. Othrwise an exception is thrown.
-        Reference: https://stackoverflow.com/a/24519419
-
-        This method detects 401 (Unauthorized), refresh the access token, and returns as "is retry needed".
-        This method also detects 429 (Too many request) which means API throttling by the server. Wait a sec and return as "is retry needed".
-        Prodcution code should handle other failure cases and errors as appropriate.
+        Generator version of get_children. Yield entries as each page arrives.
         '''
-        if response.status_code // 100 == 2:
-            # Success on 2xx response.
-            return False
-            
-        if response.status_code == 401:
-            print('Unauthorized. Refresh access token.')
-            self.__setup_or_refresh_access_token()
-            return True
+        return self.client.iter_pages('folders/{0}/children'.format(folder_id), {'sortField': 'Name', 'sortOrder': 'Asc'})
 
-        if response.status_code == 429:
-            print('Too many requests. Wait one sec, and retry.')
-            time.sleep(1)
-            return True
-
-        # Throw unhandled cases.
-        response.raise_for_status()
-
-    def get_children(self, folder_id):
-        '''
-        Call GET /api/v1/folders/{id}/children API and return the list of entries.
-        This code has hard coded sort order of Name / Asc.
-        '''
-        result = []
-        page_number = 0
-        while True:
-            url = 'https://{0}/Panopto/api/v1/folders/{1}/children?pageNumber={2}&sortField=Name&sortOrder=Asc'.format(self.server, folder_id, page_number)
-            resp = self.requests_session.get(url = url)
-            if self.__inspect_response_is_retry_needed(resp):
-                continue
-            data = resp.json()
-            entries = data['Results']
-            if len(entries) == 0:
-                break
-            for entry in entries:
-                result.append(entry)
-            page_number += 1
-        return result
-
-    def get_folder(self, folder_id):
+    def get_folder(self, folder_id, stats = None):
         '''
         Call GET /api/v1/folders/{id} API and return the response
         '''
-        while True:
-            url = 'https://{0}/Panopto/api/v1/folders/{1}'.format(self.server, folder_id)
-            resp = self.requests_session.get(url = url)
-            if self.__inspect_response_is_retry_needed(resp):
-                continue
-            data = resp.json()
-            break
-        return data
+        return self.client.get('folders/{0}'.format(folder_id), stats = stats)
 
     def update_folder_name(self, folder_id, new_name):
         '''
@@ -97,16 +55,11 @@ class PanoptoFolders:
         Return True if it succeeds, False if it fails.
         '''
         try:
-            while True:
-                url = 'https://{0}/Panopto/api/v1/folders/{1}'.format(self.server, folder_id)
-                payload = {'Name': new_name}
-                headers = {'content-type': 'application/json'}
-                resp = self.requests_session.put(url = url, json = payload, headers = headers)
-                if self.__inspect_response_is_retry_needed(resp):
-                    continue
-                return True
+            self.client.request('PUT', 'folders/{0}'.format(folder_id), json = {'Name': new_name})
+            self.__invalidate_cache(folder_id)
+            return True
         except Exception as e:
-            print('Rename failed. {0}'.format(e))
+            self.client.log('Rename failed. {0}'.format(e))
             return False
 
     def delete_folder(self, folder_id):
@@ -115,54 +68,74 @@ class PanoptoFolders:
         Return True if it succeeds, False if it fails.
         '''
         try:
-            while True:
-                url = 'https://{0}/Panopto/api/v1/folders/{1}'.format(self.server, folder_id)
-                resp = self.requests_session.delete(url = url)
-                if self.__inspect_response_is_retry_needed(resp):
-                    continue
-                return True
+            self.client.request('DELETE', 'folders/{0}'.format(folder_id))
+            self.__invalidate_cache(folder_id)
+            return True
         except Exception as e:
-            print('Deletion failed. {0}'.format(e))
+            self.client.log('Deletion failed. {0}'.format(e))
             return False
 
-    def search_folders(self, query):
+    def bulk_update_folder_names(self, id_name_pairs, max_workers = DEFAULT_BULK_MAX_WORKERS, checkpoint_file = None):
+        '''
+        Call PUT /api/v1/folders/{id} API to update the name of many folders in parallel.
+        id_name_pairs is an iterable of (folder ID, new name).
+        Yield BulkItemResult of each folder in completion order. See BulkOperationRunner for checkpoint_file.
+        '''
+        def operation(folder_id, new_name, stats):
+            self.client.request('PUT', 'folders/{0}'.format(folder_id), json = {'Name': new_name}, stats = stats)
+        return self.__run_bulk(id_name_pairs, operation, max_workers, checkpoint_file)
+
+    def bulk_delete_folders(self, folder_ids, max_workers = DEFAULT_BULK_MAX_WORKERS, checkpoint_file = None):
+        '''
+        Call DELETE /api/v1/folders/{id} API to delete many folders in parallel.
+        Yield BulkItemResult of each folder in completion order. See BulkOperationRunner for checkpoint_file.
+        '''
+        def operation(folder_id, argument, stats):
+            self.client.request('DELETE', 'folders/{0}'.format(folder_id), stats = stats)
+        return self.__run_bulk(((folder_id, None) for folder_id in folder_ids), operation, max_workers, checkpoint_file)
+
+    def __run_bulk(self, items, operation, max_workers, checkpoint_file):
+        '''
+        Private method of the class. Run bulk operation, and invalidate cache of the modified folders at the end.
+        '''
+        modified = False
+        try:
+            for result in BulkOperationRunner(max_workers, checkpoint_file).run(items, operation):
+                modified = modified or result.success
+                yield result
+        finally:
+            if modified:
+                self.client.invalidate_cache('folders/*')
+
+    def __invalidate_cache(self, folder_id):
+        '''
+        Private method of the class.
+        Remove cached responses affected by modification of the folder: the folder itself and its listings,
+        children listings (the parent's one is not known here), and search results.
+        '''
+        self.client.invalidate_cache('folders/{0}*'.format(folder_id), 'folders/*/children*', 'folders/search*')
+
+    def search_folders(self, query, stats = None):
         '''
         Call GET /api/v1/folders/search API and return the list of entries.
         '''
-        result = []
-        page_number = 0
-        while True:
-            url = 'https://{0}/Panopto/api/v1/folders/search?searchQuery={1}&pageNumber={2}'.format(
-                self.server, urllib.parse.quote_plus(query), page_number)
-            resp = self.requests_session.get(url = url)
-            if self.__inspect_response_is_retry_needed(resp):
-                continue
-            data = resp.json()
-            entries = data['Results']
-            if len(entries) == 0:
-                break
-            for entry in entries:
-                result.append(entry)
-            page_number += 1
-        return result
-
-    def get_sessions(self, folder_id):
+        return self.client.get_all_pages('folders/search', {'searchQuery': query}, stats = stats)
+
+    def iter_search_folders(self, query):
+        '''
+        Generator version of search_folders. Yield entries as each page arrives.
+        '''
+        return self.client.iter_pages('folders/search', {'searchQuery': query})
+
+    def get_sessions(self, folder_id, stats = None):
         '''
         Call GET /api/v1/folders/{id}/sessions API and return the list of entries.
         This code has hard coded sort order of CreatedDate / Desc.
         '''
-        result = []
-        page_number = 0
-        while True:
-            url = 'https://{0}/Panopto/api/v1/folders/{1}/sessions?pageNumber={2}&sortField=CreatedDate&sortOrder=Desc'.format(self.server, folder_id, page_number)
-            resp = self.requests_session.get(url = url)
-            if self.__inspect_response_is_retry_needed(resp):
-                continue
-            data = resp.json()
-            entries = data['Results']
-            if len(entries) == 0:
-                break
-            for entry in entries:
-                result.append(entry)
-            page_number += 1
-        return result
+        return self.client.get_all_pages('folders/{0}/sessions'.format(folder_id), {'sortField': 'CreatedDate', 'sortOrder': 'Desc'}, stats = stats)
+
+    def iter_sessions(self, folder_id):
+        '''
+        Generator version of get_sessions. Yield entries as each page arrives.
+        '''
+        return self.client.iter_pages('folders/{0}/sessions'.format(folder_id), {'sortField': 'CreatedDate', 'sortOrder': 'Desc'})
@@ -0,0 +1,80 @@
+#!python3
+
+class PanoptoFoldersAsync:
+    '''
+    asyncio version of PanoptoFolders. Methods are coroutines (or async generators) with the same behavior.
+    '''
+    def __init__(self, client):
+        '''
+        Constructor of asyncio folders API handler instance.
+        client is PanoptoApiClientAsync, which may be shared with other handlers.
+        '''
+        self.client = client
+
+    async def get_children(self, folder_id):
+        '''
+        Call GET /api/v1/folders/{id}/children API and return the list of entries.
+        This code has hard coded sort order of Name / Asc.
+        '''
+        return await self.client.get_all_pages('folders/{0}/children'.format(folder_id), {'sortField': 'Name', 'sortOrder': 'Asc'})
+
+    def iter_children(self, folder_id):
+        '''
+        Async generator version of get_children. Yield entries as each page arrives.
+        '''
+        return self.client.iter_pages('folders/{0}/children'.format(folder_id), {'sortField': 'Name', 'sortOrder': 'Asc'})
+
+    async def get_folder(self, folder_id):
+        '''
+        Call GET /api/v1/folders/{id} API and return the response
+        '''
+        return await self.client.get('folders/{0}'.format(folder_id))
+
+    async def update_folder_name(self, folder_id, new_name):
+        '''
+        Call PUT /api/v1/folders/{id} API to update the name
+        Return True if it succeeds, False if it fails.
+        '''
+        try:
+            await self.client.request('PUT', 'folders/{0}'.format(folder_id), json = {'Name': new_name})
+            return True
+        except Exception as e:
+            self.client.log('Rename failed. {0}'.format(e))
+            return False
+
+    async def delete_folder(self, folder_id):
+        '''
+        Call DELETE /api/v1/folders/{id} API to delete a folder
+        Return True if it succeeds, False if it fails.
+        '''
+        try:
+            await self.client.request('DELETE', 'folders/{0}'.format(folder_id))
+            return True
+        except Exception as e:
+            self.client.log('Deletion failed. {0}'.format(e))
+            return False
+
+    async def search_folders(self, query):
+        '''
+        Call GET /api/v1/folders/search API and return the list of entries.
+        '''
+        return await self.client.get_all_pages('folders/search', {'searchQuery': query})
+
+    def iter_search_folders(self, query):
+        '''
+        Async generator version of search_folders. Yield entries as each page arrives.
+        '''
+        return self.client.iter_pages('folders/search', {'searchQuery': query})
+
+    async def get_sessions(self, folder_id):
+        '''
+        Call GET /api/v1/folders/{id}/sessions API and return the list of entries.
+        This code has hard coded sort order of CreatedDate / Desc.
+        '''
+        return await self.client.get_all_pages('folders/{0}/sessions'.format(folder_id), {'sortField': 'CreatedDate', 'sortOrder': 'Desc'})
+
+    def iter_sessions(self, folder_id):
+        '''
+        Async generator version of get_sessions. Yield entries as each page arrives.
+        '''
+        return self.client.iter_pages('folders/{0}/sessions'.format(folder_id), {'sortField': 'CreatedDate', 'sortOrder': 'Desc'})
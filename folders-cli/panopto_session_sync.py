@@ -0,0 +1,189 @@
+#!python3
+import re
+import sys
+import time
+import json
+import datetime
+import hashlib
+import threading
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from os.path import dirname, join, abspath
+sys.path.insert(0, abspath(join(dirname(__file__), '..', 'common')))
+from panopto_json_file import JsonFile
+
+# Number of folders synchronized in parallel.
+DEFAULT_SYNC_MAX_WORKERS = 8
+
+# sync saves the state file at this interval, instead of after each folder.
+SAVE_INTERVAL_SECONDS = 5
+
+class PanoptoSessionSync:
+    '''
+    Incremental synchronization of sessions in folders, on top of PanoptoFolders.
+
+    Sessions are listed newest first (CreatedDate / Desc). For each folder, the state file keeps the watermark,
+    which is the newest CreatedDate seen and the IDs of sessions at that time, and a fingerprint of the sessions at the watermark
+    and of those without CreatedDate. Dates are compared as points in time, not as strings.
+    The next run stops paginating as soon as it reaches a session older than the watermark (skipping the known ones at it),
+    and returns only the sessions which are new or whose fingerprint has changed.
+
+    Modification of a session older than the watermark is not detected by the incremental run, because the listing stops
+    before it. Run with full = True occasionally to list and return all sessions, which picks up such changes.
+    Fingerprints of older sessions are not kept, so that the state stays small however many sessions the folders have.
+    The state file is written atomically (by JsonFile), so that an interrupted run keeps the progress saved so far.
+    '''
+    def __init__(self, folders, state_file, watermark_field = 'CreatedDate'):
+        '''
+        Constructor of session sync instance.
+        folders is PanoptoFolders instance.
+        state_file is JSON file to keep the watermarks across runs. It is created if it does not exist.
+        watermark_field is the field of session object to compare with the watermark. It must be the sort field of the listing.
+        If a session does not have the field, the listing of the folder is not stopped early.
+        '''
+        self.folders = folders
+        self.store = JsonFile(state_file)
+        self.watermark_field = watermark_field
+        self.lock = threading.Lock()
+        self.state = None
+
+    def sync_folder(self, folder_id, full = False):
+        '''
+        Return the list of new or changed sessions of the folder since the previous run, newest first.
+        All sessions of the folder are returned at the first run. The state file is updated before this returns.
+        '''
+        result, folder_state = self.__sync_folder(folder_id, full)
+        self.__commit(folder_id, folder_state)
+        self.save()
+        return result
+
+    def sync(self, folder_ids, full = False, max_workers = DEFAULT_SYNC_MAX_WORKERS):
+        '''
+        Synchronize multiple folders in parallel. Yield (folder ID, list of new or changed sessions, error message or None)
+        of each folder in completion order.
+        The state of a folder is updated after the caller has processed its sessions and asked for the next folder,
+        so that the sessions are not lost if the caller stops in the middle. The state of a failed folder is not updated.
+        The state file is saved every SAVE_INTERVAL_SECONDS and at the end.
+        '''
+        last_save = time.monotonic()
+        try:
+            with ThreadPoolExecutor(max_workers = max_workers) as executor:
+                futures = {executor.submit(self.__sync_folder, folder_id, full): folder_id for folder_id in folder_ids}
+                for future in as_completed(futures):
+                    folder_id = futures[future]
+                    try:
+                        result, folder_state = future.result()
+                    except Exception as e:
+                        yield folder_id, [], str(e)
+                        continue
+                    yield folder_id, result, None
+                    self.__commit(folder_id, folder_state)
+                    if time.monotonic() - last_save >= SAVE_INTERVAL_SECONDS:
+                        self.save()
+                        last_save = time.monotonic()
+        finally:
+            self.save()
+
+    def save(self):
+        '''
+        Save the state to the state file.
+        '''
+        with self.lock:
+            if self.state is not None:
+                self.store.save(self.state)
+
+    def __sync_folder(self, folder_id, full):
+        '''
+        Private method of the class.
+        Return the list of new or changed sessions of the folder, and the new state of the folder which is not committed yet.
+        '''
+        with self.lock:
+            folder_state = self.__load_state().get(folder_id, {})
+        watermark_text = folder_state.get('Watermark')
+        watermark = self.__parse_date(watermark_text)
+        watermark_ids = set(folder_state.get('WatermarkIds', []))
+        # [fingerprint, watermark field] of each session ID. The state of older versions has the fingerprint only,
+        # of all sessions seen. Those at the watermark are kept.
+        previous_fingerprints = {}
+        for session_id, entry in folder_state.get('Fingerprints', {}).items():
+            if isinstance(entry, list):
+                previous_fingerprints[session_id] = entry
+            elif session_id in watermark_ids:
+                previous_fingerprints[session_id] = [entry, watermark_text]
+        # Full listing rebuilds the fingerprints, so that deleted sessions are forgotten.
+        fingerprints = {} if full else dict(previous_fingerprints)
+
+        result = []
+        newest = None
+        newest_text = None
+        newest_ids = []
+        with closing(self.folders.iter_sessions(folder_id)) as sessions:
+            for session in sessions:
+                text = session.get(self.watermark_field)
+                value = self.__parse_date(text)
+                if not full and watermark is not None and value is not None:
+                    if value < watermark:
+                        # Reached the sessions older than the previous run. Remaining pages are all older.
+                        break
+                    if value == watermark and session['Id'] in watermark_ids:
+                        # Seen at the previous run. A new session of the same time may follow it, so keep listing.
+                        continue
+                if value is not None and (newest is None or value > newest):
+                    newest, newest_text, newest_ids = value, text, []
+                if value is not None and value == newest:
+                    newest_ids.append(session['Id'])
+                fingerprint = self.__fingerprint(session)
+                if previous_fingerprints.get(session['Id'], [None])[0] != fingerprint:
+                    result.append(session)
+                fingerprints[session['Id']] = [fingerprint, text]
+
+        # Keep the previous watermark if nothing newer is found.
+        if newest is None or (watermark is not None and newest < watermark):
+            newest, newest_text, newest_ids = watermark, watermark_text, sorted(watermark_ids)
+        elif newest == watermark:
+            newest_ids = sorted(set(newest_ids) | watermark_ids)
+        # Keep the fingerprints only of the sessions which the next incremental run may list again:
+        # those at the watermark, and those without the watermark field.
+        fingerprints = {session_id: entry for session_id, entry in fingerprints.items()
+                        if self.__parse_date(entry[1]) in (None, newest)}
+        return result, {'Watermark': newest_text, 'WatermarkIds': newest_ids, 'Fingerprints': fingerprints}
+
+    def __commit(self, folder_id, folder_state):
+        '''
+        Private method of the class. Update the state of the folder in memory.
+        '''
+        with self.lock:
+            self.__load_state()[folder_id] = folder_state
+
+    def __load_state(self):
+        '''
+        Private method of the class. Read the state file at the first time. Caller must hold the lock.
+        '''
+        if self.state is None:
+            self.state = self.store.load() or {}
+        return self.state
+
+    def __parse_date(self, value):
+        '''
+        Private method of the class. Return datetime of ISO 8601 string of the API, e.g. '2024-01-02T03:04:05.1234567Z',
+        so that the watermarks are compared in time regardless of the fraction digits and the time zone. Naive time is UTC.
+        None if it is None or not a date. Other values (e.g. numbers) are returned as they are.
+        '''
+        if not isinstance(value, str):
+            return value
+        # fromisoformat of Python before 3.11 does not accept 'Z' suffix, nor other than 3 or 6 digits of fraction.
+        text = re.sub(r'\.(\d+)', lambda match: '.' + (match.group(1) + '000000')[:6], value.replace('Z', '+00:00'))
+        try:
+            date = datetime.datetime.fromisoformat(text)
+        except ValueError:
+            return None
+        if date.tzinfo is None:
+            date = date.replace(tzinfo = datetime.timezone.utc)
+        return date
+
+    def __fingerprint(self, session):
+        '''
+        Private method of the class. Return a short hash of the session object to detect its change.
+        '''
+        return hashlib.sha1(json.dumps(session, sort_keys = True).encode('utf-8')).hexdigest()[:16]
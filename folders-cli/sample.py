@@ -1,54 +1,117 @@
 #!python3
 import sys
 import argparse
-import requests
+import functools
+import json
 import urllib3
 
-from panopto_folders import PanoptoFolders
+from panopto_folders import PanoptoFolders, GUID_TOPLEVEL
 
 from os.path import dirname, join, abspath
 sys.path.insert(0, abspath(join(dirname(__file__), '..', 'common')))
 from panopto_oauth2 import PanoptoOAuth2
-
-# Top level folder is represented by zero GUID.
-# However, it is not the real folder and some API beahves differently than actual folder.
-GUID_TOPLEVEL = '00000000-0000-0000-0000-000000000000'
+from panopto_response_cache import ResponseCache
+from panopto_search_index import SearchIndex
+from panopto_batch import run_batch
+from panopto_bulk import DEFAULT_BULK_MAX_WORKERS
+from panopto_proxy import connect_proxy, DEFAULT_SOCKET_PATH
 
 def parse_argument():
     parser = argparse.ArgumentParser(description='Sample of Folders API')
     parser.add_argument('--server', dest='server', required=True, help='Server name as FQDN')
-    parser.add_argument('--client-id', dest='client_id', required=True, help='Client ID of OAuth2 client')
-    parser.add_argument('--client-secret', dest='client_secret', required=True, help='Client Secret of OAuth2 client')
+    parser.add_argument('--client-id', dest='client_id', required=False, help='Client ID of OAuth2 client. Not needed with --proxy.')
+    parser.add_argument('--client-secret', dest='client_secret', required=False, help='Client Secret of OAuth2 client. Not needed with --proxy.')
+    parser.add_argument('--cache-file', dest='cache_file', required=False, help='SQLite file to keep API responses across runs. Kept in memory only by default.')
+    parser.add_argument('--index', dest='index', required=False, help='Local search index file built by index.py. [S] searches it instead of calling the API.')
+    parser.add_argument('--batch', dest='batch', required=False, help='Run the commands of this file (- for standard input) instead of the menu, and write the results as JSON lines. See README.md.')
+    parser.add_argument('--max-workers', dest='max_workers', type=int, default=DEFAULT_BULK_MAX_WORKERS, help='Number of batch commands run in parallel.')
+    parser.add_argument('--proxy', dest='proxy', nargs='?', const=DEFAULT_SOCKET_PATH, required=False, help='Call the API through the proxy daemon (proxy-daemon/proxy.py) on this Unix socket. {0} if the path is omitted.'.format(DEFAULT_SOCKET_PATH))
     parser.add_argument('--skip-verify', dest='skip_verify', action='store_true', required=False, help='Skip SSL certificate verification. (Never apply to the production code)')
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.proxy is None and (args.client_id is None or args.client_secret is None):
+        parser.error('--client-id and --client-secret are required unless --proxy is given')
+    return args
 
 def main():
     args = parse_argument()
 
+    # In batch mode, standard output is only for the results. Messages of the API client and OAuth2 go to standard error.
+    log = functools.partial(print, file = sys.stderr) if args.batch is not None else print
+
     if args.skip_verify:
         # This line is needed to suppress annoying warning message.
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-    # Use requests module's Session object in this example.
-    # ref. https://2.python-requests.org/en/master/user/advanced/#session-objects
-    requests_session = requests.Session()
-    requests_session.verify = not args.skip_verify
+    # Load Folders API logic. Responses are cached, so that revisiting the same folder does not call the API again.
+    # Batch commands run concurrently, and they are not cached, so that a command does not see a response older than another one's change.
+    cache = ResponseCache(path = args.cache_file) if args.batch is None else None
+    if args.proxy is not None:
+        # The daemon holds the access token and the connection pool, so this process neither authorizes nor connects to the server.
+        oauth2 = None
+        client = connect_proxy(args.proxy, cache = cache, log = log)
+    else:
+        # Load OAuth2 logic
+        oauth2 = PanoptoOAuth2(args.server, args.client_id, args.client_secret, not args.skip_verify, log = log)
+        client = None
+    folders = PanoptoFolders(args.server, not args.skip_verify, oauth2, client = client, cache = cache, log = log)
     
-    # Load OAuth2 logic
-    oauth2 = PanoptoOAuth2(args.server, args.client_id, args.client_secret, not args.skip_verify)
+    # Load the local search index, if given.
+    index = SearchIndex(args.index) if args.index else None
+
+    if args.batch is not None:
+        process_batch(folders, index, args.batch, args.max_workers, sys.stdout)
+        return
 
-    # Load Folders API logic
-    folders = PanoptoFolders(args.server, not args.skip_verify, oauth2)
-    
     current_folder_id = GUID_TOPLEVEL
     
     while True:
         print('----------------------------')
         current_folder = get_and_display_folder(folders, current_folder_id)
         sub_folders = get_and_display_sub_folders(folders, current_folder_id)
-        current_folder_id = process_selection(folders, current_folder, sub_folders)
+        current_folder_id = process_selection(folders, current_folder, sub_folders, index)
+
+
+def process_batch(folders, index, file_name, max_workers, output):
+    '''
+    Run the commands of the file, or standard input if it is '-', and write the result of each line to output as JSON line.
+    '''
+    client = folders.client
+
+    def rename(stats, folder_id, new_name):
+        client.request('PUT', 'folders/{0}'.format(folder_id), json = {'Name': new_name}, stats = stats)
+        if index is not None:
+            index.upsert_folders([folders.get_folder(folder_id)])
+
+    def delete(stats, folder_id):
+        client.request('DELETE', 'folders/{0}'.format(folder_id), stats = stats)
+        if index is not None:
+            index.delete_folder(folder_id)
+
+    def search(stats, query):
+        if index is not None:
+            return index.search_folders(query)
+        return folders.search_folders(query, stats = stats)
+
+    commands = {
+        'get': (1, lambda stats, folder_id: folders.get_folder(folder_id, stats = stats)),
+        'list': (1, lambda stats, folder_id: folders.get_children(folder_id, stats = stats)),
+        'sessions': (1, lambda stats, folder_id: folders.get_sessions(folder_id, stats = stats)),
+        'search': (1, search),
+        'rename': (2, rename),
+        'delete': (1, delete),
+    }
+
+    def emit(record):
+        output.write(json.dumps(record) + '\n')
+        output.flush()
+
+    lines = sys.stdin if file_name == '-' else open(file_name, 'r', encoding = 'utf-8')
+    try:
+        run_batch(lines, commands, 'get', emit, max_workers)
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
 
-    
 def get_and_display_folder(folders, folder_id):
     '''
     Returning folder object that is returned by API.
@@ -87,7 +150,7 @@ def get_and_display_sub_folders(folders, current_folder_id):
     
     return result
 
-def process_selection(folders, current_folder, sub_folders):
+def process_selection(folders, current_folder, sub_folders, index):
     if current_folder is None:
         new_folder_id = GUID_TOPLEVEL
         parent_folder_id = GUID_TOPLEVEL
@@ -117,12 +180,12 @@ def process_selection(folders, current_folder, sub_folders):
     if selection.lower() == 'p':
         new_folder_id = parent_folder_id
     elif selection.lower() == 'r' and current_folder is not None:
-        rename_folder(folders, current_folder)
+        rename_folder(folders, current_folder, index)
     elif selection.lower() == 'd' and current_folder is not None:
-        if delete_folder(folders, current_folder):
+        if delete_folder(folders, current_folder, index):
             new_folder_id = parent_folder_id
     elif selection.lower() == 's':
-        result = search_folder(folders)
+        result = search_folder(folders, index)
         if result is not None:
             new_folder_id = result
     elif selection.lower() == 'l' and current_folder is not None:
@@ -132,16 +195,29 @@ def process_selection(folders, current_folder, sub_folders):
     
     return new_folder_id
 
-def rename_folder(folders, folder):
+def rename_folder(folders, folder, index):
     new_name = input('Enter new name: ')
-    return folders.update_folder_name(folder['Id'], new_name)
+    if not folders.update_folder_name(folder['Id'], new_name):
+        return False
+    if index is not None:
+        index.upsert_folders([folders.get_folder(folder['Id'])])
+    return True
     
-def delete_folder(folders, folder):
-    return folders.delete_folder(folder['Id'])
-
-def search_folder(folders):
-    query = input('Enter search keyword: ')
-    entries = folders.search_folders(query)
+def delete_folder(folders, folder, index):
+    if not folders.delete_folder(folder['Id']):
+        return False
+    if index is not None:
+        index.delete_folder(folder['Id'])
+    return True
+
+def search_folder(folders, index):
+    if index is not None:
+        # Local index supports prefix (word*) and field (name:word, description:word) terms.
+        query = input('Enter search keyword (local index): ')
+        entries = index.search_folders(query)
+    else:
+        query = input('Enter search keyword: ')
+        entries = folders.search_folders(query)
 
     if len(entries) == 0:
         print('  No hit.')
@@ -0,0 +1,79 @@
+#!python3
+import sys
+import argparse
+import json
+import urllib3
+
+from panopto_folders import PanoptoFolders, GUID_TOPLEVEL
+from panopto_folder_crawler import PanoptoFolderCrawler
+from panopto_session_sync import PanoptoSessionSync, DEFAULT_SYNC_MAX_WORKERS
+
+from os.path import dirname, join, abspath
+sys.path.insert(0, abspath(join(dirname(__file__), '..', 'common')))
+from panopto_oauth2 import PanoptoOAuth2
+
+def parse_argument():
+    parser = argparse.ArgumentParser(description='Sample of incremental session sync with Folders API')
+    parser.add_argument('--server', dest='server', required=True, help='Server name as FQDN')
+    parser.add_argument('--client-id', dest='client_id', required=True, help='Client ID of OAuth2 client')
+    parser.add_argument('--client-secret', dest='client_secret', required=True, help='Client Secret of OAuth2 client')
+    parser.add_argument('--state', dest='state', required=True, help='State file to keep the watermark of each folder across runs')
+    parser.add_argument('--folder-id', dest='folder_ids', action='append', help='The ID of the folder to sync. May be repeated. Top level folder by default, which needs --recursive.')
+    parser.add_argument('--recursive', dest='recursive', action='store_true', help='Sync all sub folders of the given folders as well.')
+    parser.add_argument('--full', dest='full', action='store_true', help='List all sessions to detect changes of old sessions, instead of stopping at the watermark.')
+    parser.add_argument('--max-workers', dest='max_workers', type=int, default=DEFAULT_SYNC_MAX_WORKERS, help='Number of folders synchronized in parallel.')
+    parser.add_argument('--output', dest='output', required=False, help='Output file name of new or changed sessions as JSON lines. Standard output by default.')
+    parser.add_argument('--skip-verify', dest='skip_verify', action='store_true', required=False, help='Skip SSL certificate verification. (Never apply to the production code)')
+    return parser.parse_args()
+
+def list_folder_ids(folders, folder_ids, recursive):
+    '''
+    Yield the given folder IDs, and all of their sub folder IDs if recursive is set. Top level folder has no sessions and is skipped.
+    '''
+    for folder_id in folder_ids:
+        if not recursive:
+            yield folder_id
+            continue
+        for record in PanoptoFolderCrawler(folders).crawl(folder_id):
+            if record['Error'] is not None:
+                print('Failed to expand folder {0}: {1}'.format(record['Id'], record['Error']), file = sys.stderr)
+            if record['Id'] != GUID_TOPLEVEL:
+                yield record['Id']
+
+def main():
+    args = parse_argument()
+
+    if args.skip_verify:
+        # This line is needed to suppress annoying warning message.
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+    # Load OAuth2 logic
+    oauth2 = PanoptoOAuth2(args.server, args.client_id, args.client_secret, not args.skip_verify)
+
+    # Load Folders API logic
+    folders = PanoptoFolders(args.server, not args.skip_verify, oauth2)
+
+    sync = PanoptoSessionSync(folders, args.state)
+    folder_ids = list_folder_ids(folders, args.folder_ids or [GUID_TOPLEVEL], args.recursive)
+
+    # Write each new or changed session as one line of JSON (NDJSON).
+    output = open(args.output, 'w', encoding = 'utf-8') if args.output else sys.stdout
+    try:
+        folder_count = 0
+        session_count = 0
+        for folder_id, sessions, error in sync.sync(folder_ids, args.full, args.max_workers):
+            if error is not None:
+                print('Failed to sync folder {0}: {1}'.format(folder_id, error), file = sys.stderr)
+                continue
+            for session in sessions:
+                output.write(json.dumps(session) + '\n')
+            output.flush()
+            folder_count += 1
+            session_count += len(sessions)
+        print('Synchronized {0} folders. {1} new or changed sessions.'.format(folder_count, session_count), file = sys.stderr)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+#!python3
+import sys
+import signal
+import argparse
+import urllib3
+
+from os.path import dirname, join, abspath
+sys.path.insert(0, abspath(join(dirname(__file__), '..', 'common')))
+from panopto_oauth2 import PanoptoOAuth2
+from panopto_api_client import PanoptoApiClient
+from panopto_response_cache import ResponseCache, DEFAULT_TTL_SECONDS
+from panopto_proxy import DEFAULT_SOCKET_PATH
+from panopto_proxy_server import PanoptoProxyServer
+
+def parse_argument():
+    parser = argparse.ArgumentParser(description='Local API proxy daemon which shares authorization, connection pool and cache among processes')
+    parser.add_argument('--server', dest='server', required=True, help='Server name as FQDN')
+    parser.add_argument('--client-id', dest='client_id', required=True, help='Client ID of OAuth2 client')
+    parser.add_argument('--client-secret', dest='client_secret', required=True, help='Client Secret of OAuth2 client')
+    parser.add_argument('--socket', dest='socket', default=DEFAULT_SOCKET_PATH, help='Unix socket to listen on. {0} by default.'.format(DEFAULT_SOCKET_PATH))
+    parser.add_argument('--cache-file', dest='cache_file', required=False, help='SQLite file to keep API responses across restarts. Kept in memory only by default.')
+    parser.add_argument('--cache-ttl', dest='cache_ttl', type=int, default=DEFAULT_TTL_SECONDS, help='Seconds a cached response is used without revalidation.')
+    parser.add_argument('--no-cache', dest='no_cache', action='store_true', help='Do not cache API responses.')
+    parser.add_argument('--verbose', dest='verbose', action='store_true', help='Print each request.')
+    parser.add_argument('--skip-verify', dest='skip_verify', action='store_true', required=False, help='Skip SSL certificate verification. (Never apply to the production code)')
+    return parser.parse_args()
+
+def main():
+    args = parse_argument()
+
+    if args.skip_verify:
+        # This line is needed to suppress annoying warning message.
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+    # Load OAuth2 logic. The first authorization may go through the browser. After that, the token is refreshed in the background.
+    oauth2 = PanoptoOAuth2(args.server, args.client_id, args.client_secret, not args.skip_verify)
+
+    # One client serves all the processes, so that they share its access token, connection pool, rate limiter and cache.
+    cache = ResponseCache(ttl = args.cache_ttl, path = args.cache_file) if not args.no_cache else None
+    client = PanoptoApiClient(args.server, not args.skip_verify, oauth2, cache = cache)
+
+    server = PanoptoProxyServer(client, args.socket, verbose = args.verbose)
+    print('Listening on {0}. Press Ctrl+C to stop.'.format(args.socket))
+    # Stop by SIGTERM (e.g. kill or systemd) same as Ctrl+C, so that the socket file is removed.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        client.close()
+
+if __name__ == '__main__':
+    main()
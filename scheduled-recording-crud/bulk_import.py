@@ -0,0 +1,63 @@
+#!python3
+import sys
+import argparse
+import json
+import urllib3
+
+from panopto_scheduled_recordings import PanoptoScheduledRecordings
+from panopto_scheduled_recording_import import ScheduledRecordingImporter, load_recording_definitions
+from panopto_remote_recorder_directory import RemoteRecorderDirectory
+
+from os.path import dirname, join, abspath
+sys.path.insert(0, abspath(join(dirname(__file__), '..', 'common')))
+from panopto_oauth2 import PanoptoOAuth2
+from panopto_api_client import PanoptoApiClient
+from panopto_bulk import summarize_bulk_results, DEFAULT_BULK_MAX_WORKERS
+
+def parse_argument():
+    parser = argparse.ArgumentParser(description='Sample of bulk import of scheduled recordings')
+    parser.add_argument('--server', dest='server', required=True, help='Server name as FQDN')
+    parser.add_argument('--client-id', dest='client_id', required=True, help='Client ID of OAuth2 client')
+    parser.add_argument('--client-secret', dest='client_secret', required=True, help='Client Secret of OAuth2 client')
+    parser.add_argument('--input', dest='input', required=True, help='CSV file with header row, or JSON file (.json) of recording definitions')
+    parser.add_argument('--report', dest='report', required=False, help='Output file of per-row result as JSON lines. Standard output by default.')
+    parser.add_argument('--checkpoint', dest='checkpoint', required=False, help='Checkpoint file to resume an interrupted run. Rows succeeded in the previous run are skipped.')
+    parser.add_argument('--max-workers', dest='max_workers', type=int, default=DEFAULT_BULK_MAX_WORKERS, help='Number of recordings created in parallel')
+    parser.add_argument('--resolve-conflicts', dest='resolve_conflicts', action='store_true', help='Let the server resolve conflicts with existing sessions, instead of failing the row')
+    parser.add_argument('--recorder-cache', dest='recorder_cache', required=False, help='Resolve recorder names from the list of all recorders, kept in this file for an hour. Each name is searched otherwise.')
+    parser.add_argument('--dry-run', dest='dry_run', action='store_true', help='Validate the definitions and report invalid rows only. Nothing is created.')
+    parser.add_argument('--skip-verify', dest='skip_verify', action='store_true', required=False, help='Skip SSL certificate verification. (Never apply to the production code)')
+    return parser.parse_args()
+
+def main():
+    args = parse_argument()
+
+    if args.skip_verify:
+        # This line is needed to suppress annoying warning message.
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+    # Load OAuth2 logic
+    oauth2 = PanoptoOAuth2(args.server, args.client_id, args.client_secret, not args.skip_verify)
+
+    # Load Scheduled Recordings API logic
+    client = PanoptoApiClient(args.server, not args.skip_verify, oauth2)
+    scheduled_recordings = PanoptoScheduledRecordings(client)
+
+    definitions = load_recording_definitions(args.input)
+    directory = RemoteRecorderDirectory(scheduled_recordings, cache_file = args.recorder_cache) if args.recorder_cache else None
+    importer = ScheduledRecordingImporter(scheduled_recordings, args.max_workers, args.checkpoint, args.resolve_conflicts, directory)
+
+    report = open(args.report, 'w', encoding = 'utf-8') if args.report else sys.stdout
+    try:
+        completed = []
+        for result in importer.run(definitions, args.dry_run):
+            report.write(json.dumps(result.to_dict()) + '\n')
+            completed.append(result)
+    finally:
+        if report is not sys.stdout:
+            report.close()
+
+    print(json.dumps(summarize_bulk_results(completed)), file = sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!python3
+import sys
+import time
+import threading
+
+from os.path import dirname, join, abspath
+sys.path.insert(0, abspath(join(dirname(__file__), '..', 'common')))
+from panopto_json_file import JsonFile
+
+# Seconds the list of remote recorders is used before it is listed again.
+DEFAULT_DIRECTORY_TTL_SECONDS = 3600
+
+class RemoteRecorderDirectory:
+    '''
+    Directory of all remote recorders, on top of PanoptoScheduledRecordings.
+
+    All pages of remoteRecorders/search with empty query are listed once, and indexed by name and by ID,
+    so that any number of names are resolved without calling the API. The recorder objects include DefaultRecordingFolder.
+    The list is listed again when it is older than ttl seconds.
+
+    If cache_file is given, the list is saved to it (atomically, by JsonFile) and reused by later processes within ttl,
+    so that short-lived tools running many times a day do not list the recorders every time.
+    '''
+    def __init__(self, scheduled_recordings, ttl = DEFAULT_DIRECTORY_TTL_SECONDS, cache_file = None):
+        self.scheduled_recordings = scheduled_recordings
+        self.ttl = ttl
+        self.store = JsonFile(cache_file) if cache_file is not None else None
+        # The lock is held while listing, so that concurrent callers share one refresh.
+        self.lock = threading.Lock()
+        self.refreshed_at = None
+        self.by_name = {}
+        self.by_id = {}
+
+    def refresh(self):
+        '''
+        List all remote recorders from the server, and rebuild the indexes.
+        '''
+        with self.lock:
+            self.__refresh()
+
+    def __refresh(self):
+        '''
+        Private method of the class. Caller must hold the lock.
+        '''
+        recorders = self.scheduled_recordings.search_remote_recorders('')
+        refreshed_at = time.time()
+        self.__build(recorders, refreshed_at)
+        if self.store is not None:
+            with self.store.lock():
+                self.store.save({'RefreshedAt': refreshed_at, 'Recorders': recorders})
+
+    def __build(self, recorders, refreshed_at):
+        '''
+        Private method of the class. Build the indexes and replace the current ones. Caller must hold the lock.
+        '''
+        by_name = {}
+        by_id = {}
+        for recorder in recorders:
+            by_name.setdefault(recorder['Name'], []).append(recorder)
+            by_id[recorder['Id']] = recorder
+        self.by_name = by_name
+        self.by_id = by_id
+        self.refreshed_at = refreshed_at
+
+    def __ensure_fresh(self):
+        '''
+        Private method of the class.
+        Load the cache file, or list the recorders from the server, if the indexes are older than ttl.
+        '''
+        if self.refreshed_at is not None and time.time() < self.refreshed_at + self.ttl:
+            return
+        with self.lock:
+            if self.refreshed_at is not None and time.time() < self.refreshed_at + self.ttl:
+                return
+            cached = self.store.load() if self.store is not None else None
+            if cached is not None and time.time() < cached.get('RefreshedAt', 0) + self.ttl:
+                self.__build(cached['Recorders'], cached['RefreshedAt'])
+                return
+            self.__refresh()
+
+    def resolve(self, names):
+        '''
+        Return a dictionary of name -> list of remote recorders with the exact name (empty if none), for all given names.
+        '''
+        self.__ensure_fresh()
+        by_name = self.by_name
+        return {name: list(by_name.get(name, [])) for name in names}
+
+    def get_by_name(self, name):
+        '''
+        Return the list of remote recorders with the exact name.
+        '''
+        return self.resolve([name])[name]
+
+    def get_by_id(self, recorder_id):
+        '''
+        Return the remote recorder of the ID. None if it is not found.
+        '''
+        self.__ensure_fresh()
+        return self.by_id.get(recorder_id)
@@ -0,0 +1,216 @@
+#!python3
+import sys
+import csv
+import json
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from os.path import dirname, join, abspath
+sys.path.insert(0, abspath(join(dirname(__file__), '..', 'common')))
+from panopto_bulk import BulkItemResult, BulkOperationRunner, DEFAULT_BULK_MAX_WORKERS
+
+def load_recording_definitions(file_name):
+    '''
+    Read scheduled recording definitions from CSV file with header row, or JSON file of a list of objects (if the name ends with .json).
+    Return the list of (row ID, definition dictionary), where row ID is the 1-based position of the definition as string.
+    A row of JSON file which is not an object is returned as it is, and reported by the validation of ScheduledRecordingImporter.
+
+    Each definition has:
+      Name, RecorderName, StartTime, EndTime: required. Times are ISO 8601, e.g. 2024-09-02T09:00:00.
+      Description: optional.
+      FolderId: optional. The default recording folder of the recorder is used if it is omitted.
+      IsBroadcast, SuppressPrimary, SuppressSecondary: optional boolean, false by default. CSV accepts true/false, yes/no and 1/0.
+    '''
+    with open(file_name, 'r', encoding = 'utf-8', newline = '') as fr:
+        if file_name.endswith('.json'):
+            definitions = json.load(fr)
+            if not isinstance(definitions, list):
+                raise ValueError('{0} is not a list of objects'.format(file_name))
+        else:
+            definitions = [row for row in csv.DictReader(fr) if any(row.values())]
+    return [(str(index + 1), definition) for index, definition in enumerate(definitions)]
+
+
+class ScheduledRecordingImporter:
+    '''
+    Pipeline to create many scheduled recordings, on top of PanoptoScheduledRecordings.
+
+    Before anything is sent, each definition is validated:
+     1. Required fields and times are checked.
+     2. Recorder names are resolved by remoteRecorders/search, once per unique name. Resolved recorders are kept by this instance.
+        With RemoteRecorderDirectory, all names are resolved from the list of all recorders instead.
+     3. Definitions on the same recorder whose times overlap are rejected, all of them.
+    Then the valid definitions are created by POST in parallel with BulkOperationRunner, which reports the result of each row.
+    A definition which conflicts with existing sessions on the server fails, unless resolve_conflicts is set.
+    '''
+    def __init__(self, scheduled_recordings, max_workers = DEFAULT_BULK_MAX_WORKERS, checkpoint_file = None, resolve_conflicts = False,
+                 directory = None):
+        '''
+        Constructor of scheduled recording importer instance.
+        scheduled_recordings is PanoptoScheduledRecordings instance.
+        max_workers is the number of recorder names resolved and recordings created in parallel.
+        See BulkOperationRunner for checkpoint_file.
+        resolve_conflicts is passed to POST /api/v1/scheduledRecordings API.
+        directory is RemoteRecorderDirectory to resolve recorder names from the list of all recorders, instead of searching each name.
+        '''
+        self.scheduled_recordings = scheduled_recordings
+        self.max_workers = max_workers
+        self.checkpoint_file = checkpoint_file
+        self.resolve_conflicts = resolve_conflicts
+        self.directory = directory
+        # Recorder name -> list of recorders with the exact name.
+        self.recorders = {}
+
+    def run(self, definitions, dry_run = False):
+        '''
+        Validate and create the scheduled recordings of definitions, list of (row ID, definition dictionary).
+        Yield BulkItemResult of each row: the rows failed in validation first, then the created ones in completion order.
+        output of a created row is the session ID of the scheduled recording.
+        If dry_run is set, only the failed rows are yielded and nothing is created.
+        '''
+        payloads, failures = self.validate(definitions)
+        yield from failures
+        if dry_run:
+            return
+
+        def operation(row_id, payload, stats):
+            params = {'resolveConflicts': str(self.resolve_conflicts).lower()}
+            client = self.scheduled_recordings.client
+            resp = client.parse_response(client.request('POST', 'scheduledRecordings', params = params, json = payload, stats = stats))
+            if resp.get('ConflictsExist'):
+                conflicts = [session.get('SessionName') or session.get('SessionID') or str(session) for session in resp.get('ConflictingSessions') or []]
+                raise Exception('Conflicts with existing sessions: {0}'.format(', '.join(conflicts)))
+            return resp['Id']
+        yield from BulkOperationRunner(self.max_workers, self.checkpoint_file).run(payloads, operation)
+
+    def validate(self, definitions):
+        '''
+        Return the list of (row ID, API payload) of valid definitions, and the list of BulkItemResult of invalid ones.
+        '''
+        failures = {}
+        parsed = []
+        for row_id, definition in definitions:
+            # Any problem of a row is reported as the failure of the row, so that the other rows are imported.
+            try:
+                parsed.append((row_id, definition, self.__parse_times(definition)))
+            except (ValueError, TypeError) as e:
+                failures[row_id] = str(e)
+
+        recorders = self.resolve_recorders(set(definition['RecorderName'] for row_id, definition, times in parsed))
+        by_recorder = {}
+        for row_id, definition, times in parsed:
+            matches = recorders[definition['RecorderName']]
+            if isinstance(matches, str):
+                failures[row_id] = matches
+            elif len(matches) != 1:
+                failures[row_id] = "{0} recorders named '{1}'".format(len(matches) or 'No', definition['RecorderName'])
+            else:
+                by_recorder.setdefault(matches[0]['Id'], []).append((times[0], times[1], row_id))
+
+        for recorder_id, intervals in by_recorder.items():
+            for row_id, other_row_id in self.__find_overlaps(intervals):
+                failures.setdefault(row_id, 'Overlaps with row {0} on the same recorder'.format(other_row_id))
+
+        payloads = []
+        for row_id, definition, times in parsed:
+            if row_id not in failures:
+                payloads.append((row_id, self.__make_payload(definition, recorders[definition['RecorderName']][0])))
+        results = [BulkItemResult(row_id, False, None, 0, 0.0, failures[row_id]) for row_id, definition in definitions if row_id in failures]
+        return payloads, results
+
+    def resolve_recorders(self, names):
+        '''
+        Return a dictionary of recorder name -> list of recorders with the exact name, or error message if the search failed.
+        Names not resolved yet by this instance are searched in parallel, unless directory is given.
+        '''
+        if self.directory is not None:
+            try:
+                return self.directory.resolve(names)
+            except Exception as e:
+                return {name: 'Failed to list recorders: {0}'.format(e) for name in names}
+
+        unknown = [name for name in names if name not in self.recorders]
+
+        def search(name):
+            try:
+                return self.scheduled_recordings.find_remote_recorders(name)
+            except Exception as e:
+                return 'Failed to search recorder: {0}'.format(e)
+
+        result = {name: self.recorders[name] for name in names if name in self.recorders}
+        with ThreadPoolExecutor(max_workers = self.max_workers) as executor:
+            for name, matches in zip(unknown, executor.map(search, unknown)):
+                result[name] = matches
+                # A failure is not kept, so that the name is searched again next time.
+                if not isinstance(matches, str):
+                    self.recorders[name] = matches
+        return result
+
+    def __parse_times(self, definition):
+        '''
+        Private method of the class. Check the required fields and the types of the fields, and return (start, end) as datetime for comparison.
+        Times with time zone are compared in UTC. Times without it are compared as they are.
+        '''
+        if not isinstance(definition, dict):
+            raise ValueError('Row is not an object: {0}'.format(json.dumps(definition)))
+        for field in ('Name', 'RecorderName', 'StartTime', 'EndTime'):
+            if definition.get(field) in (None, ''):
+                raise ValueError('{0} is missing'.format(field))
+        for field in ('Name', 'RecorderName', 'StartTime', 'EndTime', 'Description', 'FolderId'):
+            if definition.get(field) is not None and not isinstance(definition[field], str):
+                raise ValueError('{0} is not a string: {1}'.format(field, json.dumps(definition[field])))
+        for field in ('IsBroadcast', 'SuppressPrimary', 'SuppressSecondary'):
+            if definition.get(field) is not None and not isinstance(definition[field], (bool, int, str)):
+                raise ValueError('{0} is not a boolean: {1}'.format(field, json.dumps(definition[field])))
+        times = []
+        for field in ('StartTime', 'EndTime'):
+            try:
+                # fromisoformat of Python before 3.11 does not accept 'Z' suffix.
+                value = datetime.datetime.fromisoformat(definition[field].replace('Z', '+00:00'))
+            except ValueError:
+                raise ValueError('{0} is not ISO 8601: {1}'.format(field, definition[field]))
+            if value.tzinfo is not None:
+                value = value.astimezone(datetime.timezone.utc).replace(tzinfo = None)
+            times.append(value)
+        if times[0] >= times[1]:
+            raise ValueError('EndTime is not after StartTime')
+        return times
+
+    def __find_overlaps(self, intervals):
+        '''
+        Private method of the class. intervals is a list of (start, end, row ID) on the same recorder.
+        Yield (row ID, row ID of another interval overlapping with it) for each overlapping interval.
+        '''
+        latest = None
+        for start, end, row_id in sorted(intervals):
+            if latest is not None and start < latest[0]:
+                yield row_id, latest[1]
+                yield latest[1], row_id
+            if latest is None or end > latest[0]:
+                latest = (end, row_id)
+
+    def __make_payload(self, definition, recorder):
+        '''
+        Private method of the class. Return the body of POST /api/v1/scheduledRecordings API.
+        '''
+        folder_id = definition.get('FolderId') or recorder['DefaultRecordingFolder']['Id']
+        return {
+            'Name': definition['Name'],
+            'Description': definition.get('Description') or '',
+            'StartTime': definition['StartTime'],
+            'EndTime': definition['EndTime'],
+            'FolderId': folder_id,
+            'Recorders': [
+                {
+                    'RemoteRecorderId': recorder['Id'],
+                    'SuppressPrimary': self.__to_bool(definition.get('SuppressPrimary')),
+                    'SuppressSecondary': self.__to_bool(definition.get('SuppressSecondary')),
+                }
+            ],
+            'IsBroadcast': self.__to_bool(definition.get('IsBroadcast')),
+        }
+
+    def __to_bool(self, value):
+        if isinstance(value, str):
+            return value.strip().lower() in ('true', 'yes', '1')
+        return bool(value)
@@ -0,0 +1,96 @@
+#!python3
+
+class PanoptoScheduledRecordings:
+    '''
+    Scheduled Recordings API handler, on top of PanoptoApiClient.
+    '''
+    def __init__(self, client):
+        '''
+        Constructor of scheduled recordings API handler instance.
+        client is PanoptoApiClient, which may be shared with other handlers.
+        '''
+        self.client = client
+
+    def get_scheduled_recording(self, session_id):
+        '''
+        Call GET /api/v1/scheduledRecordings/{id} API and return the response
+        '''
+        return self.client.get('scheduledRecordings/{0}'.format(session_id))
+
+    def create_scheduled_recording(self, scheduled_recording, resolve_conflicts = False):
+        '''
+        Call POST /api/v1/scheduledRecordings API and return the response
+        '''
+        return self.client.post('scheduledRecordings', scheduled_recording, {'resolveConflicts': str(resolve_conflicts).lower()})
+
+    def update_scheduled_recording(self, session_id, scheduled_recording):
+        '''
+        Call PUT /api/v1/scheduledRecordings/{id} API with the fields to update, and return the response
+        '''
+        return self.client.put('scheduledRecordings/{0}'.format(session_id), scheduled_recording)
+
+    def delete_scheduled_recording(self, session_id):
+        '''
+        Call DELETE /api/v1/scheduledRecordings/{id} API and return the response
+        '''
+        return self.client.delete('scheduledRecordings/{0}'.format(session_id))
+
+    def search_remote_recorders(self, query):
+        '''
+        Call GET /api/v1/remoteRecorders/search API and return the list of entries of all pages.
+        '''
+        return self.client.get_all_pages('remoteRecorders/search', {'searchQuery': query})
+
+    def find_remote_recorders(self, name):
+        '''
+        Return the list of remote recorders whose name is exactly the given name. Search may return partial matches too.
+        '''
+        return [recorder for recorder in self.search_remote_recorders(name) if recorder['Name'] == name]
+
+
+class PanoptoScheduledRecordingsAsync:
+    '''
+    asyncio version of PanoptoScheduledRecordings, on top of PanoptoApiClientAsync.
+    '''
+    def __init__(self, client):
+        '''
+        Constructor of asyncio scheduled recordings API handler instance.
+        client is PanoptoApiClientAsync, which may be shared with other handlers.
+        '''
+        self.client = client
+
+    async def get_scheduled_recording(self, session_id):
+        '''
+        Call GET /api/v1/scheduledRecordings/{id} API and return the response
+        '''
+        return await self.client.get('scheduledRecordings/{0}'.format(session_id))
+
+    async def create_scheduled_recording(self, scheduled_recording, resolve_conflicts = False):
+        '''
+        Call POST /api/v1/scheduledRecordings API and return the response
+        '''
+        return await self.client.post('scheduledRecordings', scheduled_recording, {'resolveConflicts': str(resolve_conflicts).lower()})
+
+    async def update_scheduled_recording(self, session_id, scheduled_recording):
+        '''
+        Call PUT /api/v1/scheduledRecordings/{id} API with the fields to update, and return the response
+        '''
+        return await self.client.put('scheduledRecordings/{0}'.format(session_id), scheduled_recording)
+
+    async def delete_scheduled_recording(self, session_id):
+        '''
+        Call DELETE /api/v1/scheduledRecordings/{id} API and return the response
+        '''
+        return await self.client.delete('scheduledRecordings/{0}'.format(session_id))
+
+    async def search_remote_recorders(self, query):
+        '''
+        Call GET /api/v1/remoteRecorders/search API and return the list of entries of all pages.
+        '''
+        return await self.client.get_all_pages('remoteRecorders/search', {'searchQuery': query})
+
+    async def find_remote_recorders(self, name):
+        '''
+        Return the list of remote recorders whose name is exactly the given name. Search may return partial matches too.
+        '''
+        return [recorder for recorder in await self.search_remote_recorders(name) if recorder['Name'] == name]
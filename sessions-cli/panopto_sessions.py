@@ -1,74 +1,35 @@
 #!python3
-import requests
-import urllib.parse
-import time
+import sys
+
+from os.path import dirname, join, abspath
+sys.path.insert(0, abspath(join(dirname(__file__), '..', 'common')))
+from panopto_api_client import PanoptoApiClient
+from panopto_transport import DEFAULT_TIMEOUT
+from panopto_bulk import BulkOperationRunner, DEFAULT_BULK_MAX_WORKERS
 
 class PanoptoSessions:
-    def __init__(self, server, ssl_verify, oauth2):
+    def __init__(self, server, ssl_verify, oauth2, client = None, cache = None,
+                 transport = None, pool_maxsize = None, timeout = DEFAULT_TIMEOUT, log = print):
         '''
         Constructor of sessions API handler instance.
         This goes through authorization step of the target server.
+        client is an existing PanoptoApiClient to share its connection pool and access token with other handlers.
+        If it is omitted, a new PanoptoApiClient is created, with cache (ResponseCache) if it is given,
+        and transport, pool_maxsize, timeout and log (see PanoptoApiClient), e.g. to share requests' Session with other code.
         '''
         self.server = server
         self.ssl_verify = ssl_verify
         self.oauth2 = oauth2
+        if client is None:
+            client = PanoptoApiClient(server, ssl_verify, oauth2, cache = cache,
+                                      transport = transport, pool_maxsize = pool_maxsize, timeout = timeout, log = log)
+        self.client = client
 
-        # Use requests module's Session object in this example.
-        # ref. https://2.python-requests.org/en/master/user/advanced/#session-objects
-        self.requests_session = requests.Session()
-        self.requests_session.verify = self.ssl_verify
-
-        self.__setup_or_refresh_access_token()
-
-    def __setup_or_refresh_access_token(self):
-        '''
-        This method invokes OAuth2 Authorization Code Grant authorization flow.
-        It goes through browser UI for the first time.
-        It refreshes the access token after that and no user interfaction is requetsed.
-        This is called at the initialization of the class, as well as when 401 (Unauthorized) is returend.
-        '''
-        access_token = self.oauth2.get_access_token_authorization_code_grant()
-        self.requests_session.headers.update({'Authorization': 'Bearer ' + access_token})
-
-    def __inspect_response_is_retry_needed(self, response):
-        '''
-        Inspect the response of a requets' call.
-        True indicates the retry needed, False indicates success. Othrwise an exception is thrown.
-        Reference: https://stackoverflow.com/a/24519419
-
-        This method detects 401 (Unauthorized), refresh the access token, and returns as "is retry needed".
-        This method also detects 429 (Too many request) which means API throttling by the server. Wait a sec and return as "is retry needed".
-        Prodcution code should handle other failure cases and errors as appropriate.
-        '''
-        if response.status_code // 100 == 2:
-            # Success on 2xx response.
-            return False
-            
-        if response.status_code == 401:
-            print('Unauthorized. Refresh access token.')
-            self.__setup_or_refresh_access_token()
-            return True
-
-        if response.status_code == 429:
-            print('Too many requests. Wait one sec, and retry.')
-            time.sleep(1)
-            return True
-
-        # Throw unhandled cases.
-        response.raise_for_status()
-
-    def get_session(self, session_id):
+    def get_session(self, session_id, stats = None):
         '''
         Call GET /api/v1/sessions/{id} API and return the response
         '''
-        while True:
-            url = 'https://{0}/Panopto/api/v1/sessions/{1}'.format(self.server, session_id)
-            resp = self.requests_session.get(url = url)
-            if self.__inspect_response_is_retry_needed(resp):
-                continue
-            data = resp.json()
-            break
-        return data
+        return self.client.get('sessions/{0}'.format(session_id), stats = stats)
 
     def update_session_name(self, session_id, new_name):
         '''
@@ -76,16 +37,11 @@ class PanoptoSessions:
         Return True if it succeeds, False if it fails.
         '''
         try:
-            while True:
-                url = 'https://{0}/Panopto/api/v1/sessions/{1}'.format(self.server, session_id)
-                payload = {'Name': new_name}
-                headers = {'content-type': 'application/json'}
-                resp = self.requests_session.put(url = url, json = payload, headers = headers)
-                if self.__inspect_response_is_retry_needed(resp):
-                    continue
-                return True
+            self.client.request('PUT', 'sessions/{0}'.format(session_id), json = {'Name': new_name})
+            self.__invalidate_cache(session_id)
+            return True
         except Exception as e:
-            print('Rename failed. {0}'.format(e))
+            self.client.log('Rename failed. {0}'.format(e))
             return False
 
     def delete_session(self, session_id):
@@ -94,33 +50,61 @@ class PanoptoSessions:
         Return True if it succeeds, False if it fails.
         '''
         try:
-            while True:
-                url = 'https://{0}/Panopto/api/v1/sessions/{1}'.format(self.server, session_id)
-                resp = self.requests_session.delete(url = url)
-                if self.__inspect_response_is_retry_needed(resp):
-                    continue
-                return True
+            self.client.request('DELETE', 'sessions/{0}'.format(session_id))
+            self.__invalidate_cache(session_id)
+            return True
         except Exception as e:
-            print('Deletion failed. {0}'.format(e))
+            self.client.log('Deletion failed. {0}'.format(e))
             return False
 
-    def search_sessions(self, query):
+    def bulk_update_session_names(self, id_name_pairs, max_workers = DEFAULT_BULK_MAX_WORKERS, checkpoint_file = None):
+        '''
+        Call PUT /api/v1/sessions/{id} API to update the name of many sessions in parallel.
+        id_name_pairs is an iterable of (session ID, new name).
+        Yield BulkItemResult of each session in completion order. See BulkOperationRunner for checkpoint_file.
+        '''
+        def operation(session_id, new_name, stats):
+            self.client.request('PUT', 'sessions/{0}'.format(session_id), json = {'Name': new_name}, stats = stats)
+        return self.__run_bulk(id_name_pairs, operation, max_workers, checkpoint_file)
+
+    def bulk_delete_sessions(self, session_ids, max_workers = DEFAULT_BULK_MAX_WORKERS, checkpoint_file = None):
+        '''
+        Call DELETE /api/v1/sessions/{id} API to delete many sessions in parallel.
+        Yield BulkItemResult of each session in completion order. See BulkOperationRunner for checkpoint_file.
+        '''
+        def operation(session_id, argument, stats):
+            self.client.request('DELETE', 'sessions/{0}'.format(session_id), stats = stats)
+        return self.__run_bulk(((session_id, None) for session_id in session_ids), operation, max_workers, checkpoint_file)
+
+    def __run_bulk(self, items, operation, max_workers, checkpoint_file):
+        '''
+        Private method of the class. Run bulk operation, and invalidate cache of the modified sessions at the end.
+        '''
+        modified = False
+        try:
+            for result in BulkOperationRunner(max_workers, checkpoint_file).run(items, operation):
+                modified = modified or result.success
+                yield result
+        finally:
+            if modified:
+                self.client.invalidate_cache('sessions/*', 'folders/*/sessions*')
+
+    def __invalidate_cache(self, session_id):
+        '''
+        Private method of the class.
+        Remove cached responses affected by modification of the session: the session itself,
+        sessions listings of folders (the session's folder is not known here), and search results.
+        '''
+        self.client.invalidate_cache('sessions/{0}*'.format(session_id), 'folders/*/sessions*', 'sessions/search*')
+
+    def search_sessions(self, query, stats = None):
         '''
         Call GET /api/v1/sessions/search API and return the list of entries.
         '''
-        result = []
-        page_number = 0
-        while True:
-            url = 'https://{0}/Panopto/api/v1/sessions/search?searchQuery={1}&pageNumber={2}'.format(
-                self.server, urllib.parse.quote_plus(query), page_number)
-            resp = self.requests_session.get(url = url)
-            if self.__inspect_response_is_retry_needed(resp):
-                continue
-            data = resp.json()
-            entries = data['Results']
-            if len(entries) == 0:
-                break
-            for entry in entries:
-                result.append(entry)
-            page_number += 1
-        return result
+        return self.client.get_all_pages('sessions/search', {'searchQuery': query}, stats = stats)
+
+    def iter_search_sessions(self, query):
+        '''
+        Generator version of search_sessions. Yield entries as each page arrives.
+        '''
+        return self.client.iter_pages('sessions/search', {'searchQuery': query})
@@ -0,0 +1,54 @@
+#!python3
+
+class PanoptoSessionsAsync:
+    '''
+    asyncio version of PanoptoSessions. Methods are coroutines (or async generators) with the same behavior.
+    '''
+    def __init__(self, client):
+        '''
+        Constructor of asyncio sessions API handler instance.
+        client is PanoptoApiClientAsync, which may be shared with other handlers.
+        '''
+        self.client = client
+
+    async def get_session(self, session_id):
+        '''
+        Call GET /api/v1/sessions/{id} API and return the response
+        '''
+        return await self.client.get('sessions/{0}'.format(session_id))
+
+    async def update_session_name(self, session_id, new_name):
+        '''
+        Call PUT /api/v1/sessions/{id} API to update the name
+        Return True if it succeeds, False if it fails.
+        '''
+        try:
+            await self.client.request('PUT', 'sessions/{0}'.format(session_id), json = {'Name': new_name})
+            return True
+        except Exception as e:
+            self.client.log('Rename failed. {0}'.format(e))
+            return False
+
+    async def delete_session(self, session_id):
+        '''
+        Call DELETE /api/v1/sessions/{id} API to delete a session
+        Return True if it succeeds, False if it fails.
+        '''
+        try:
+            await self.client.request('DELETE', 'sessions/{0}'.format(session_id))
+            return True
+        except Exception as e:
+            self.client.log('Deletion failed. {0}'.format(e))
+            return False
+
+    async def search_sessions(self, query):
+        '''
+        Call GET /api/v1/sessions/search API and return the list of entries.
+        '''
+        return await self.client.get_all_pages('sessions/search', {'searchQuery': query})
+
+    def iter_search_sessions(self, query):
+        '''
+        Async generator version of search_sessions. Yield entries as each page arrives.
+        '''
+        return self.client.iter_pages('sessions/search', {'searchQuery': query})
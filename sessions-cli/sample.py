@@ -1,7 +1,8 @@
 #!python3
 import sys
 import argparse
-import requests
+import functools
+import json
 import urllib3
 
 from panopto_sessions import PanoptoSessions
@@ -9,34 +10,59 @@ from panopto_sessions import PanoptoSessions
 from os.path import dirname, join, abspath
 sys.path.insert(0, abspath(join(dirname(__file__), '..', 'common')))
 from panopto_oauth2 import PanoptoOAuth2
+from panopto_response_cache import ResponseCache
+from panopto_search_index import SearchIndex
+from panopto_batch import run_batch
+from panopto_bulk import DEFAULT_BULK_MAX_WORKERS
+from panopto_proxy import connect_proxy, DEFAULT_SOCKET_PATH
 
 def parse_argument():
     parser = argparse.ArgumentParser(description='Sample of Folders API')
     parser.add_argument('--server', dest='server', required=True, help='Server name as FQDN')
-    parser.add_argument('--client-id', dest='client_id', required=True, help='Client ID of OAuth2 client')
-    parser.add_argument('--client-secret', dest='client_secret', required=True, help='Client Secret of OAuth2 client')
+    parser.add_argument('--client-id', dest='client_id', required=False, help='Client ID of OAuth2 client. Not needed with --proxy.')
+    parser.add_argument('--client-secret', dest='client_secret', required=False, help='Client Secret of OAuth2 client. Not needed with --proxy.')
     parser.add_argument('--session-id', dest='session_id', required=False, help='The ID of the session to start with.')
+    parser.add_argument('--cache-file', dest='cache_file', required=False, help='SQLite file to keep API responses across runs. Kept in memory only by default.')
+    parser.add_argument('--index', dest='index', required=False, help='Local search index file built by folders-cli/index.py. [S] searches it instead of calling the API.')
+    parser.add_argument('--batch', dest='batch', required=False, help='Run the commands of this file (- for standard input) instead of the menu, and write the results as JSON lines. See README.md.')
+    parser.add_argument('--max-workers', dest='max_workers', type=int, default=DEFAULT_BULK_MAX_WORKERS, help='Number of batch commands run in parallel.')
+    parser.add_argument('--proxy', dest='proxy', nargs='?', const=DEFAULT_SOCKET_PATH, required=False, help='Call the API through the proxy daemon (proxy-daemon/proxy.py) on this Unix socket. {0} if the path is omitted.'.format(DEFAULT_SOCKET_PATH))
     parser.add_argument('--skip-verify', dest='skip_verify', action='store_true', required=False, help='Skip SSL certificate verification. (Never apply to the production code)')
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.proxy is None and (args.client_id is None or args.client_secret is None):
+        parser.error('--client-id and --client-secret are required unless --proxy is given')
+    return args
 
 def main():
     args = parse_argument()
 
+    # In batch mode, standard output is only for the results. Messages of the API client and OAuth2 go to standard error.
+    log = functools.partial(print, file = sys.stderr) if args.batch is not None else print
+
     if args.skip_verify:
         # This line is needed to suppress annoying warning message.
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-    # Use requests module's Session object in this example.
-    # ref. https://2.python-requests.org/en/master/user/advanced/#session-objects
-    requests_session = requests.Session()
-    requests_session.verify = not args.skip_verify
+    # Load Sessions API logic. Responses are cached, so that revisiting the same session does not call the API again.
+    # Batch commands run concurrently, and they are not cached, so that a command does not see a response older than another one's change.
+    cache = ResponseCache(path = args.cache_file) if args.batch is None else None
+    if args.proxy is not None:
+        # The daemon holds the access token and the connection pool, so this process neither authorizes nor connects to the server.
+        oauth2 = None
+        client = connect_proxy(args.proxy, cache = cache, log = log)
+    else:
+        # Load OAuth2 logic
+        oauth2 = PanoptoOAuth2(args.server, args.client_id, args.client_secret, not args.skip_verify, log = log)
+        client = None
+    sessions = PanoptoSessions(args.server, not args.skip_verify, oauth2, client = client, cache = cache, log = log)
     
-    # Load OAuth2 logic
-    oauth2 = PanoptoOAuth2(args.server, args.client_id, args.client_secret, not args.skip_verify)
+    # Load the local search index, if given.
+    index = SearchIndex(args.index) if args.index else None
+
+    if args.batch is not None:
+        process_batch(sessions, index, args.batch, args.max_workers, sys.stdout)
+        return
 
-    # Load Sessions API logic
-    sessions = PanoptoSessions(args.server, not args.skip_verify, oauth2)
-    
     if args.session_id is not None:
         current_session_id = args.session_id
     else:
@@ -48,9 +74,52 @@ def main():
         if current_session_id is not None:
             session = get_and_display_session(sessions, current_session_id)
             
-        current_session_id = process_selection(sessions, current_session_id)
+        current_session_id = process_selection(sessions, current_session_id, index)
+
+
+def process_batch(sessions, index, file_name, max_workers, output):
+    '''
+    Run the commands of the file, or standard input if it is '-', and write the result of each line to output as JSON line.
+    '''
+    client = sessions.client
+
+    def rename(stats, session_id, new_name):
+        client.request('PUT', 'sessions/{0}'.format(session_id), json = {'Name': new_name}, stats = stats)
+        if index is not None:
+            index.upsert_sessions([sessions.get_session(session_id)])
+
+    def delete(stats, session_id):
+        client.request('DELETE', 'sessions/{0}'.format(session_id), stats = stats)
+        if index is not None:
+            index.delete_session(session_id)
+
+    def search(stats, query):
+        if index is not None:
+            return index.search_sessions(query)
+        return sessions.search_sessions(query, stats = stats)
+
+    def list_sessions(stats, folder_id):
+        return client.get_all_pages('folders/{0}/sessions'.format(folder_id), {'sortField': 'CreatedDate', 'sortOrder': 'Desc'}, stats = stats)
+
+    commands = {
+        'get': (1, lambda stats, session_id: sessions.get_session(session_id, stats = stats)),
+        'list': (1, list_sessions),
+        'search': (1, search),
+        'rename': (2, rename),
+        'delete': (1, delete),
+    }
+
+    def emit(record):
+        output.write(json.dumps(record) + '\n')
+        output.flush()
+
+    lines = sys.stdin if file_name == '-' else open(file_name, 'r', encoding = 'utf-8')
+    try:
+        run_batch(lines, commands, 'get', emit, max_workers)
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
 
-    
 def get_and_display_session(sessions, session_id):
     '''
     Returning session object that is returned by API.
@@ -74,7 +143,7 @@ def get_and_display_session(sessions, session_id):
     print('  Description: {0}'. format(session['Description']))
     return session
 
-def process_selection(sessions, current_session_id):
+def process_selection(sessions, current_session_id, index):
 
     new_session_id = current_session_id
     print()
@@ -86,12 +155,12 @@ def process_selection(sessions, current_session_id):
     selection = input('Enter a command: ')
 
     if selection.lower() == 'r' and current_session_id is not None:
-        rename_session(sessions, current_session_id)
+        rename_session(sessions, current_session_id, index)
     elif selection.lower() == 'd' and current_session_id is not None:
-        if delete_session(sessions, current_session_id):
+        if delete_session(sessions, current_session_id, index):
             new_session_id = None
     elif selection.lower() == 's':
-        result = search_sessions(sessions)
+        result = search_sessions(sessions, index)
         if result is not None:
             new_session_id = result
     else:
@@ -99,16 +168,29 @@ def process_selection(sessions, current_session_id):
     
     return new_session_id
 
-def rename_session(sessions, session_id):
+def rename_session(sessions, session_id, index):
     new_name = input('Enter new name: ')
-    return sessions.update_session_name(session_id, new_name)
+    if not sessions.update_session_name(session_id, new_name):
+        return False
+    if index is not None:
+        index.upsert_sessions([sessions.get_session(session_id)])
+    return True
     
-def delete_session(sessions, session_id):
-    return sessions.delete_session(session_id)
-
-def search_sessions(sessions):
-    query = input('Enter search keyword: ')
-    entries = sessions.search_sessions(query)
+def delete_session(sessions, session_id, index):
+    if not sessions.delete_session(session_id):
+        return False
+    if index is not None:
+        index.delete_session(session_id)
+    return True
+
+def search_sessions(sessions, index):
+    if index is not None:
+        # Local index supports prefix (word*), field (name:word, description:word) and folder:{id} terms.
+        query = input('Enter search keyword (local index): ')
+        entries = index.search_sessions(query)
+    else:
+        query = input('Enter search keyword: ')
+        entries = sessions.search_sessions(query)
 
     if len(entries) == 0:
         print('  No results.')